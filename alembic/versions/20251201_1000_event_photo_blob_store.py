@@ -0,0 +1,41 @@
+"""move event photos to the blob store
+
+Revision ID: event_photo_blob_store
+Revises: f35cc3868f40, add_event_messages
+Create Date: 2025-12-01 10:00:00.000000
+
+Solo esquema: la copia de los bytes al blob store la hace
+app/scripts/move_event_photos_to_blob_store.py (correrlo después de esta
+migración). La columna photo queda hasta entonces y el script la vacía.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'event_photo_blob_store'
+down_revision = ('f35cc3868f40', 'add_event_messages')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('photo_hash', sa.String(length=64), nullable=True))
+    op.add_column('events', sa.Column('photo_mime', sa.String(length=50), nullable=True))
+    op.add_column('events', sa.Column('photo_size', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    # Las fotos copiadas solo están en el blob store: sin restaurarlas se perderían
+    conn = op.get_bind()
+    pending = conn.execute(
+        sa.text("SELECT count(*) FROM events WHERE photo_hash IS NOT NULL AND photo IS NULL")
+    ).scalar()
+    if pending:
+        raise RuntimeError(
+            f"{pending} eventos tienen la foto solo en el blob store: correr "
+            "python -m app.scripts.move_event_photos_to_blob_store --restore antes de bajar"
+        )
+
+    op.drop_column('events', 'photo_size')
+    op.drop_column('events', 'photo_mime')
+    op.drop_column('events', 'photo_hash')
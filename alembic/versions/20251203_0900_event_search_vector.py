@@ -0,0 +1,55 @@
+"""full-text search on events (tsvector + GIN, spanish + unaccent)
+
+Revision ID: event_search_vector
+Revises: event_photo_blob_store
+Create Date: 2025-12-03 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'event_search_vector'
+down_revision = 'event_photo_blob_store'
+branch_labels = None
+depends_on = None
+
+# Copia fija de lo que definía el modelo Event en esta revisión: la migración
+# no cambia si el modelo cambia después
+SEARCH_CONFIG_SQL = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'spanish_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+"""
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(venue, '')), 'B') || "
+    "setweight(to_tsvector('spanish_unaccent'::regconfig, coalesce(description, '')), 'C')"
+)
+
+
+def upgrade():
+    # Extensión unaccent + configuración de búsqueda spanish_unaccent
+    op.execute(SEARCH_CONFIG_SQL)
+
+    # Columna generada (se recalcula sola en cada INSERT/UPDATE de title/venue/description)
+    op.add_column(
+        'events',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True))
+    )
+    op.create_index('ix_events_search_vector', 'events', ['search_vector'], postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_events_search_vector', table_name='events')
+    op.drop_column('events', 'search_vector')
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent")
@@ -0,0 +1,32 @@
+"""trigram indexes on events.title / events.venue for autocomplete
+
+Revision ID: event_trgm_autocomplete
+Revises: event_search_vector
+Create Date: 2025-12-05 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'event_trgm_autocomplete'
+down_revision = 'event_search_vector'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_events_title_trgm', 'events', ['title'],
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_events_venue_trgm', 'events', ['venue'],
+        postgresql_using='gin', postgresql_ops={'venue': 'gin_trgm_ops'}
+    )
+
+
+def downgrade():
+    # La extensión se deja instalada: otras bases/esquemas pueden usarla
+    op.drop_index('ix_events_venue_trgm', table_name='events')
+    op.drop_index('ix_events_title_trgm', table_name='events')
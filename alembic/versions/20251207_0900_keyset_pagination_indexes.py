@@ -0,0 +1,34 @@
+"""composite indexes for keyset (cursor) pagination
+
+Revision ID: keyset_pagination_indexes
+Revises: event_trgm_autocomplete
+Create Date: 2025-12-07 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'keyset_pagination_indexes'
+down_revision = 'event_trgm_autocomplete'
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas): una por orden paginable
+INDEXES = [
+    ('ix_events_status_start_id', 'events', ['status', 'startDate', 'id']),
+    ('ix_marketplace_listings_status_price_id', 'marketplace_listings', ['status', 'price', 'id']),
+    ('ix_marketplace_listings_status_created_id', 'marketplace_listings', ['status', 'created_at', 'id']),
+    ('ix_tickets_user_purchase_date_id', 'tickets', ['user_id', 'purchaseDate', 'id']),
+    ('ix_purchases_user_created_id', 'purchases', ['user_id', 'created_at', 'id']),
+    ('ix_users_created_id', 'users', ['createdAt', 'id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,52 @@
+"""denormalized price/inventory aggregates on events
+
+Revision ID: event_inventory_aggregates
+Revises: keyset_pagination_indexes
+Create Date: 2025-12-09 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'event_inventory_aggregates'
+down_revision = 'keyset_pagination_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('min_price', sa.Numeric(10, 2), nullable=True))
+    op.add_column('events', sa.Column('max_price', sa.Numeric(10, 2), nullable=True))
+    op.add_column('events', sa.Column('total_sold', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('events', sa.Column('available_tickets', sa.Integer(), nullable=True))
+
+    # Backfill con la misma lógica que refresh_event_aggregates
+    op.execute("""
+        UPDATE events e SET
+            min_price = agg.min_price,
+            max_price = agg.max_price,
+            total_sold = agg.total_sold,
+            available_tickets = GREATEST(e."totalCapacity" - agg.total_sold, 0)
+        FROM (
+            SELECT e2.id,
+                   MIN(tt.price) FILTER (WHERE tt.is_active) AS min_price,
+                   MAX(tt.price) FILTER (WHERE tt.is_active) AS max_price,
+                   COALESCE(SUM(tt.sold_quantity), 0) AS total_sold
+            FROM events e2
+            LEFT JOIN ticket_types tt ON tt.event_id = e2.id
+            GROUP BY e2.id
+        ) agg
+        WHERE agg.id = e.id
+    """)
+    op.alter_column('events', 'available_tickets', nullable=False)
+
+    op.create_index('ix_events_status_min_price', 'events', ['status', 'min_price', 'startDate', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_events_status_min_price', table_name='events')
+    op.drop_column('events', 'available_tickets')
+    op.drop_column('events', 'total_sold')
+    op.drop_column('events', 'max_price')
+    op.drop_column('events', 'min_price')
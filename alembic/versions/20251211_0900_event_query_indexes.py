@@ -0,0 +1,31 @@
+"""indexes for the EventQuery sorts and organizer listing
+
+Revision ID: event_query_indexes
+Revises: event_inventory_aggregates
+Create Date: 2025-12-11 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'event_query_indexes'
+down_revision = 'event_inventory_aggregates'
+branch_labels = None
+depends_on = None
+
+# (nombre, columnas): sort=popularity, sort=newest y eventos vigentes por organizador
+INDEXES = [
+    ('ix_events_status_total_sold_id', ['status', 'total_sold', 'id']),
+    ('ix_events_status_created_id', ['status', 'createdAt', 'id']),
+    ('ix_events_organizer_start', ['organizer_id', 'startDate']),
+]
+
+
+def upgrade():
+    for name, columns in INDEXES:
+        op.create_index(name, 'events', columns)
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='events')
@@ -0,0 +1,31 @@
+"""venue coordinates on events for radius search
+
+Revision ID: event_coordinates
+Revises: event_query_indexes
+Create Date: 2025-12-13 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'event_coordinates'
+down_revision = 'event_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('events', sa.Column('longitude', sa.Float(), nullable=True))
+
+    # Las coordenadas de los eventos existentes las completa
+    # python -m app.scripts.backfill_event_coordinates (usa el geocodificador de la app)
+
+    op.create_index('ix_events_status_lat_lon', 'events', ['status', 'latitude', 'longitude'])
+
+
+def downgrade():
+    op.drop_index('ix_events_status_lat_lon', table_name='events')
+    op.drop_column('events', 'longitude')
+    op.drop_column('events', 'latitude')
@@ -0,0 +1,40 @@
+"""stock holds for open checkouts
+
+Revision ID: inventory_holds
+Revises: event_coordinates
+Create Date: 2025-12-15 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'inventory_holds'
+down_revision = 'event_coordinates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'ticket_types',
+        sa.Column('held_quantity', sa.Integer(), server_default='0', nullable=False)
+    )
+    # NOT VALID: no se revisan filas previas (pudo haber sobreventa); sí todo lo nuevo
+    op.execute(
+        "ALTER TABLE ticket_types ADD CONSTRAINT ck_ticket_types_stock "
+        "CHECK (held_quantity >= 0 AND sold_quantity + held_quantity <= quantity_available) NOT VALID"
+    )
+
+    op.add_column('purchases', sa.Column('hold_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_purchases_hold_expires_at', 'purchases', ['hold_expires_at'],
+        postgresql_where=sa.text('hold_expires_at IS NOT NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_purchases_hold_expires_at', table_name='purchases')
+    op.drop_column('purchases', 'hold_expires_at')
+    op.drop_constraint('ck_ticket_types_stock', 'ticket_types', type_='check')
+    op.drop_column('ticket_types', 'held_quantity')
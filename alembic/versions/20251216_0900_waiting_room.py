@@ -0,0 +1,23 @@
+"""per-event waiting room admission rate
+
+Revision ID: waiting_room
+Revises: inventory_holds
+Create Date: 2025-12-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'waiting_room'
+down_revision = 'inventory_holds'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('waiting_room_rate', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('events', 'waiting_room_rate')
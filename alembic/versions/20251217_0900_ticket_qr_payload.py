@@ -0,0 +1,75 @@
+"""tickets store the QR payload instead of a base64 PNG
+
+Revision ID: ticket_qr_payload
+Revises: waiting_room
+Create Date: 2025-12-17 09:00:00.000000
+
+"""
+import base64
+from io import BytesIO
+
+import qrcode
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'ticket_qr_payload'
+down_revision = 'waiting_room'
+branch_labels = None
+depends_on = None
+
+
+def payload(id_column: str, event_column: str) -> str:
+    """Mismo texto que app.utils.qr_generator.generate_ticket_qr_data (json.dumps)"""
+    return (
+        f"""'{{"ticket_id": "' || {id_column}::text || '", "event_id": "' || {event_column}::text """
+        """|| '", "type": "TICKET_VALIDATION"}'"""
+    )
+
+
+def upgrade():
+    # Tickets: la imagen (o el QR_ERROR_ de un render fallido) pasa a ser su contenido
+    op.execute(
+        'UPDATE tickets SET "qrCode" = ' + payload("id", "event_id") +
+        """ WHERE "qrCode" IS NULL OR "qrCode" LIKE 'data:%' OR "qrCode" LIKE 'QR_ERROR_%'"""
+    )
+    # Transferencias: oldQR es el del ticket transferido; del newQR (ticket nuevo,
+    # sin referencia en la fila) queda la huella sha256 de la imagen
+    op.execute(
+        'UPDATE ticket_transfers tt SET "oldQR" = ' + payload("t.id", "t.event_id") +
+        """ FROM tickets t WHERE t.id = tt.ticket_id AND tt."oldQR" LIKE 'data:%'"""
+    )
+    op.execute(
+        """UPDATE ticket_transfers SET "newQR" = 'sha256:' || encode(sha256(convert_to("newQR", 'UTF8')), 'hex') """
+        """WHERE "newQR" LIKE 'data:%'"""
+    )
+
+
+def qr_data_url(data: str) -> str:
+    """Imagen que guardaba el código anterior (generate_qr_image: H, box_size 10, borde 2)"""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def render_column(table: str, column: str, batch: int = 500) -> None:
+    """Vuelve a guardar en column la imagen PNG del contenido, en lotes"""
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        f"""SELECT id, "{column}" FROM {table} WHERE "{column}" IS NOT NULL """
+        f"""AND "{column}" NOT LIKE 'data:%' AND "{column}" NOT LIKE 'sha256:%'"""
+    )).fetchall()
+    update = sa.text(f'UPDATE {table} SET "{column}" = :image WHERE id = :id')
+    for start in range(0, len(rows), batch):
+        bind.execute(update, [{"id": row[0], "image": qr_data_url(row[1])} for row in rows[start:start + batch]])
+
+
+def downgrade():
+    # tickets.qrCode y ticket_transfers.oldQR vuelven a ser la imagen de su contenido.
+    # Con pérdida: ticket_transfers.newQR quedó reducido a su huella sha256 y no se
+    # puede reconstruir (esas filas conservan "sha256:..." en lugar de la imagen)
+    render_column("tickets", "qrCode")
+    render_column("ticket_transfers", "oldQR")
@@ -0,0 +1,33 @@
+"""how each purchase stock hold ended
+
+Revision ID: purchase_hold_outcome
+Revises: ticket_qr_payload
+Create Date: 2025-12-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'purchase_hold_outcome'
+down_revision = 'ticket_qr_payload'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('purchases', sa.Column('hold_outcome', sa.String(length=20), nullable=True))
+    # Reservas ya resueltas: completadas = vendidas, canceladas por el barrido = vencidas
+    op.execute(
+        "UPDATE purchases SET hold_outcome = 'converted' "
+        "WHERE hold_expires_at IS NULL AND status = 'COMPLETED'"
+    )
+    op.execute(
+        "UPDATE purchases SET hold_outcome = 'expired' "
+        "WHERE hold_expires_at IS NULL AND status = 'CANCELLED' "
+        "AND refund_reason = 'Checkout vencido: reserva de stock liberada'"
+    )
+
+
+def downgrade():
+    op.drop_column('purchases', 'hold_outcome')
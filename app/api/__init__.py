@@ -15,6 +15,7 @@ from .billing import router as billing_router
 from .webhooks import router as webhooks_router
 from .preferences import router as preferences_router
 from .event_messages import router as event_messages_router
+from .waiting_room import router as waiting_room_router
 
 # Main API router
 api_router = APIRouter(prefix="/api")
@@ -36,4 +37,5 @@ api_router.include_router(billing_router)
 api_router.include_router(webhooks_router)
 api_router.include_router(preferences_router)
 api_router.include_router(event_messages_router)
+api_router.include_router(waiting_room_router)
 __all__ = ["api_router"]
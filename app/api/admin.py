@@ -4,7 +4,10 @@ from typing import List, Optional
 from uuid import UUID
 
 from app.core.database import get_db
-from app.core.dependencies import get_current_active_user, require_super_admin, require_content_admin
+from app.core.dependencies import get_current_active_user, require_super_admin, require_content_admin, require_any_admin
+from app.core.pool_metrics import pool_snapshot
+from app.services.catalog_read_model import catalog_read_model
+from app.core.response_cache import CATEGORIES, invalidate_on_commit
 from app.models.user import User
 from app.schemas.admin import (
     UserListResponse, UserDetailResponse, BanUserRequest,
@@ -24,6 +27,7 @@ async def get_all_users(
     page_size: int = Query(8, ge=1, le=50, description="Usuarios por página"),
     search: Optional[str] = Query(None, description="Buscar por nombre o email"),
     is_active: Optional[bool] = Query(None, description="Filtrar por estado activo"),
+    cursor: Optional[str] = Query(None, description="nextCursor de la respuesta anterior (reemplaza a page)"),
     current_admin: User = Depends(require_super_admin),
     db: Session = Depends(get_db)
 ):
@@ -37,7 +41,8 @@ async def get_all_users(
         page=page,
         page_size=page_size,
         search=search,
-        is_active=is_active
+        is_active=is_active,
+        cursor=cursor
     )
 
 @router.get("/users/{user_id}", response_model=UserDetailResponse)
@@ -247,6 +252,36 @@ async def get_admin_stats(
     return admin_service.get_statistics()
 
 
+@router.get("/metrics/db-pool", response_model=dict)
+def get_db_pool_metrics(
+    current_admin: User = Depends(require_any_admin)
+):
+    """
+    Métricas del pool de conexiones a la base de datos
+
+    Por engine (primario, réplica, async): conexiones en uso, overflow en uso,
+    timeouts de checkout, invalidaciones e histograma de espera por conexión.
+
+    Requiere: cualquier rol de administrador
+    """
+    return {"pools": pool_snapshot()}
+
+
+@router.get("/metrics/catalog", response_model=dict)
+def get_catalog_metrics(
+    current_admin: User = Depends(require_any_admin)
+):
+    """
+    Estado del read model del catálogo en memoria de este worker
+
+    Eventos cargados, memoria estimada (total y MB por cada 10k eventos),
+    marca de agua de updatedAt y hora del último refresco.
+
+    Requiere: cualquier rol de administrador
+    """
+    return catalog_read_model.report()
+
+
 # ============= CATEGORÍAS =============
 
 @router.get("/categories", response_model=List[CategoryResponse])
@@ -325,6 +360,7 @@ async def create_category(
     )
 
     db.add(new_category)
+    invalidate_on_commit(db, CATEGORIES)
     db.commit()
     db.refresh(new_category)
 
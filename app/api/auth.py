@@ -6,6 +6,7 @@ from PIL import Image
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user, get_current_user, get_optional_current_user
 from app.services.auth_service import AuthService
+from app.utils.image_derivatives import VARIANT_FORMATS, render_in_pool
 from app.schemas.auth import (
     UserRegister, UserLogin, AuthResponse, UserResponse, 
     MessageResponse, RefreshToken, ChangePassword, 
@@ -292,7 +293,7 @@ async def upload_profile_photo(
     **Max size:** 5MB
     
     **Processing:**
-    - Images >800x800px are automatically resized
+    - Converted to the "card" WebP variant (max 640x400px) in the image process pool
     - Stored as BLOB in PostgreSQL
     - Returns base64 string
     
@@ -300,7 +301,7 @@ async def upload_profile_photo(
     ```json
     {
       "message": "Foto subida exitosamente",
-      "photoUrl": "data:image/jpeg;base64,..."
+      "photoUrl": "data:image/webp;base64,..."
     }
     ```
     """
@@ -322,24 +323,13 @@ async def upload_profile_photo(
             detail="Archivo demasiado grande. Máximo: 5MB"
         )
     
-    # Validar imagen con Pillow
+    # Validar imagen con Pillow y generar la variante (fuera del event loop)
     try:
         image = Image.open(io.BytesIO(contents))
         image.verify()
         
-        # Reabrir para procesar
-        image = Image.open(io.BytesIO(contents))
-        
-        # Redimensionar si es necesario
-        max_size = (800, 800)
-        if image.size[0] > max_size[0] or image.size[1] > max_size[1]:
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # Guardar redimensionada
-            img_byte_arr = io.BytesIO()
-            image_format = image.format or 'JPEG'
-            image.save(img_byte_arr, format=image_format)
-            contents = img_byte_arr.getvalue()
+        rendered = await render_in_pool(contents, [("card", "webp")])
+        contents = rendered[("card", "webp")]
     
     except Exception as e:
         raise HTTPException(
@@ -352,7 +342,7 @@ async def upload_profile_photo(
     updated_user = auth_service.upload_profile_photo(
         current_user.id,
         contents,
-        file.content_type
+        VARIANT_FORMATS["webp"]
     )
     
     if not updated_user:
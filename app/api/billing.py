@@ -8,7 +8,7 @@ from typing import List
 import io
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.dependencies import get_current_active_user
 from app.models.user import User
 from app.services.billing_service import BillingService
@@ -42,7 +42,7 @@ def verify_organizer_role(current_user: User = Depends(get_current_active_user))
 @router.get("/events", response_model=List[OrganizerEventBillingSchema])
 async def get_organizer_events(
     current_user: User = Depends(verify_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     📊 **Obtener lista de eventos con datos de facturación**
@@ -76,7 +76,7 @@ async def get_organizer_events(
 async def get_event_billing_detail(
     event_id: str,
     current_user: User = Depends(verify_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     📈 **Obtener detalle completo de facturación de un evento**
@@ -186,7 +186,7 @@ async def download_billing_report(
     event_id: str,
     format: str = Query(..., description="Formato del reporte (pdf o excel)", regex="^(pdf|excel)$"),
     current_user: User = Depends(verify_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     📥 **Descargar reporte de facturación**
@@ -277,7 +277,7 @@ async def download_billing_report(
 @router.get("/status")
 async def get_billing_status(
     current_user: User = Depends(verify_organizer_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     🔍 **Verificar estado del sistema de facturación**
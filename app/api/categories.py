@@ -1,33 +1,48 @@
-from fastapi import APIRouter, Depends, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.core.response_cache import CATEGORIES, response_cache
 from app.services.category_service import EventCategoryService
 from app.schemas.category import EventCategoryResponse, EventCategoryListResponse
+from app.utils.http_cache import is_not_modified, not_modified, with_validators
 
 router = APIRouter(prefix="/categories", tags=["Event Categories"])
 
 
 @router.get("/", response_model=EventCategoryListResponse)
 async def get_categories(
+    request: Request,
+    response: Response,
     active_only: bool = Query(True, description="Only return active categories"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all event categories
     
     Returns a list of all available event categories sorted by sort_order.
-    By default, only returns active categories.
+    By default, only returns active categories. Supports If-None-Match (304).
     """
     category_service = EventCategoryService(db)
-    return category_service.get_all_categories(active_only=active_only)
+    # Consulta síncrona: en un hilo, fuera del event loop
+    validators = await asyncio.to_thread(category_service.get_categories_validators, active_only)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    result = await response_cache.serve(
+        "categories:list", dict(active_only=active_only), EventCategoryListResponse,
+        lambda: category_service.get_all_categories(active_only=active_only),
+        tags=[CATEGORIES],
+    )
+    return with_validators(result, response, validators)
 
 
 @router.get("/featured", response_model=List[EventCategoryResponse])
 async def get_featured_categories(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get featured categories
@@ -36,13 +51,17 @@ async def get_featured_categories(
     Useful for displaying main categories on homepage.
     """
     category_service = EventCategoryService(db)
-    return category_service.get_featured_categories()
+    return await response_cache.serve(
+        "categories:featured", {}, List[EventCategoryResponse],
+        category_service.get_featured_categories,
+        tags=[CATEGORIES],
+    )
 
 
 @router.get("/{category_id}", response_model=EventCategoryResponse)
 async def get_category(
     category_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get category by ID
@@ -56,7 +75,7 @@ async def get_category(
 @router.get("/slug/{slug}", response_model=EventCategoryResponse)
 async def get_category_by_slug(
     slug: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get category by slug
@@ -1,11 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional, List, Literal
 from uuid import UUID
 import os
-from app.core.database import get_db
-from app.core.dependencies import get_current_active_user
-from app.services.event_service import EventService
+from app.core.database import get_db, get_async_read_db
+from app.core.config import settings
+from app.core.json_responses import trusted_response
+from app.core.response_cache import response_cache, event_list_tags, event_tag
+from app.utils.blob_store import get_blob_store
+from app.utils.http_cache import Validators, is_not_modified, not_modified, with_validators
+from app.utils.image_derivatives import (
+    VARIANT_FORMATS, VARIANT_VERSION, derivative_cache, ensure_derivative, generate_derivatives, pick_format
+)
+from app.core.dependencies import get_current_active_user, get_current_active_user_async
+from app.services.event_service import EventService, AsyncEventService
 from app.schemas.event import (
     EventCreate,
     EventUpdate,
@@ -14,10 +25,11 @@ from app.schemas.event import (
     EventListResponse,
     OrganizerEventResponse,
     EventSearchResponse,
+    EventAutocompleteItem,
     MessageResponse,
     EventStatusUpdate
 )
-from app.models.event import EventStatus, Event
+from app.models.event import EventStatus, Event, photo_version
 from app.models.user import User
 
 
@@ -30,27 +42,59 @@ def get_event_service(db: Session = Depends(get_db)) -> EventService:
     """Inyección de dependencia para la capa de servicio"""
     return EventService(db)
 
+def get_async_event_service(db: AsyncSession = Depends(get_async_read_db)) -> AsyncEventService:
+    """Servicio async para las lecturas públicas más concurridas (réplica de lectura)"""
+    return AsyncEventService(db)
+
 
 # =========================================================
 # 🔹 Búsqueda avanzada
 # =========================================================
 @router.get("/search", response_model=EventSearchResponse)
 async def search_and_list_events(
-    query: Optional[str] = Query(None, description="Búsqueda por título o descripción"),
+    query: Optional[str] = Query(None, description="Búsqueda por título, recinto o descripción"),
     categories: Optional[str] = Query(None, description="Slugs de categorías separadas por comas"),
-    min_price: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
-    max_price: Optional[float] = Query(None, ge=0, description="Precio máximo"),
+    min_price: Optional[float] = Query(None, ge=0, description="Precio mínimo: algún tipo de entrada activo con precio en el rango"),
+    max_price: Optional[float] = Query(None, ge=0, description="Precio máximo (ver min_price)"),
     start_date: Optional[str] = Query(None, description="Fecha de inicio (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[str] = Query(None, description="Fecha de fin (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS)"),
     location: Optional[str] = Query(None, description="Ubicación geográfica (ciudad, región)"),
     venue: Optional[str] = Query(None, description="Nombre del local o recinto específico"),
     status: Optional[EventStatus] = Query(None, description="Estado del evento (DRAFT, PUBLISHED, etc.)"),
+    near: Optional[str] = Query(None, description="Ubicación del usuario: lat,lon (p. ej. -12.05,-77.04)"),
+    radius_km: float = Query(
+        settings.GEO_DEFAULT_RADIUS_KM, gt=0, le=settings.GEO_MAX_RADIUS_KM, description="Radio de búsqueda con near"
+    ),
     page: int = Query(1, ge=1, description="Número de página"),
     page_size: int = Query(20, ge=1, le=100, description="Resultados por página"),
-    event_service: EventService = Depends(get_event_service)
+    sort: Literal["date", "relevance", "price_asc", "price_desc", "popularity", "newest", "distance"] = Query(
+        "date",
+        description="Orden: fecha, relevancia (requiere query), precio mínimo, más vendidos, más recientes o distancia (requiere near)"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor de la respuesta anterior (reemplaza a page)"),
+    count: Literal["auto", "exact", "estimated"] = Query("auto", description="Cómo calcular total"),
+    event_service: AsyncEventService = Depends(get_async_event_service)
 ):
-    """Búsqueda avanzada de eventos con filtros múltiples y paginación."""
-    return event_service.search_events(
+    """
+    Búsqueda avanzada de eventos con filtros múltiples y paginación.
+
+    `query` usa búsqueda de texto completo sobre título, recinto y descripción
+    (sintaxis tipo buscador: "frase exacta", -excluir, OR; sin distinguir tildes).
+
+    `near=lat,lon` + `radius_km` limita a los recintos dentro del radio (se
+    combina con el resto de filtros); cada evento trae `distanceKm` y
+    `sort=distance` ordena del más cercano al más lejano.
+
+    Paginación: `page`/`page_size` (con total) o `cursor` (keyset con
+    sort=date, newest o popularity; sin total, mismo costo en cualquier
+    página). Cada respuesta trae `next_cursor` para seguir con cursor desde
+    la primera página.
+
+    `count`: `exact` cuenta (cacheado unos segundos por filtros), `estimated`
+    usa la estimación del planner y `auto` estima solo búsquedas muy amplias.
+    `total_is_exact` indica cuál se devolvió.
+    """
+    result = await event_service.search_events(
         query=query,
         categories=categories,
         min_price=min_price,
@@ -60,9 +104,32 @@ async def search_and_list_events(
         location=location,
         venue=venue,
         status_filter=status,
+        near=near,
+        radius_km=radius_km,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        sort=sort,
+        cursor=cursor,
+        count_mode=count
     )
+    return trusted_response(result, EventSearchResponse)
+
+
+@router.get("/autocomplete", response_model=List[EventAutocompleteItem])
+async def autocomplete_events(
+    q: str = Query(..., min_length=2, max_length=100, description="Texto tecleado hasta ahora"),
+    limit: int = Query(
+        settings.AUTOCOMPLETE_DEFAULT_LIMIT, ge=1, le=settings.AUTOCOMPLETE_MAX_LIMIT,
+        description="Cantidad de sugerencias"
+    ),
+    event_service: AsyncEventService = Depends(get_async_event_service)
+):
+    """
+    Sugerencias mientras el usuario escribe: solo id, título, fecha y recinto
+    de los eventos publicados y futuros que mejor coinciden (prefijo del título
+    o similitud por trigramas, tolerante a errores de tipeo).
+    """
+    return await event_service.autocomplete(q, limit=limit)
 
 
 # =========================================================
@@ -70,14 +137,18 @@ async def search_and_list_events(
 # =========================================================
 
 @router.get("/", response_model=List[EventResponse])
-def get_events(
+async def get_events(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     status: Optional[str] = Query(None),
-    event_service: EventService = Depends(get_event_service)
+    event_service: AsyncEventService = Depends(get_async_event_service)
 ):
     """Obtener todos los eventos publicados (paginado simple)."""
-    return event_service.get_all_events(skip=skip, limit=limit, status_filter=status)
+    return await response_cache.serve(
+        "events:list", dict(skip=skip, limit=limit, status=status), List[EventResponse],
+        lambda: event_service.get_all_events(skip=skip, limit=limit, status_filter=status),
+        tags=event_list_tags,
+    )
 
 
 @router.get("/active", response_model=List[EventResponse])
@@ -88,17 +159,39 @@ def get_active_events(
     event_service: EventService = Depends(get_event_service)
 ):
     """Obtener eventos activos (con fecha futura y no vencidos)."""
-    events = event_service.get_active_events(skip=skip, limit=limit, status_filter=status)
-    return events
+    return response_cache.serve_sync(
+        "events:active", dict(skip=skip, limit=limit, status=status), List[EventResponse],
+        lambda: event_service.get_active_events(skip=skip, limit=limit, status_filter=status),
+        tags=event_list_tags,
+    )
 
 
 @router.get("/featured", response_model=List[EventResponse])
-def get_featured_events(
+async def get_featured_events(
     limit: int = Query(6, ge=1, le=20, description="Número de eventos destacados"),
-    event_service: EventService = Depends(get_event_service)
+    event_service: AsyncEventService = Depends(get_async_event_service)
 ):
     """Obtener eventos destacados (próximos eventos publicados)."""
-    return event_service.get_featured_events(limit=limit)
+    return await response_cache.serve(
+        "events:featured", dict(limit=limit), List[EventResponse],
+        lambda: event_service.get_featured_events(limit=limit),
+        tags=event_list_tags,
+    )
+
+
+@router.get("/for-you", response_model=List[EventResponse])
+async def get_for_you_events(
+    limit: int = Query(20, ge=1, le=50, description="Número de eventos del feed"),
+    current_user: User = Depends(get_current_active_user_async),
+    event_service: AsyncEventService = Depends(get_async_event_service)
+):
+    """
+    Feed personalizado: próximos eventos según las categorías preferidas del
+    usuario, sus compras anteriores y la popularidad. Usuarios sin historial
+    reciben los destacados. X-Feed-Source: personalized, padded o featured.
+    """
+    events, source = await event_service.get_for_you_events(current_user.id, limit)
+    return trusted_response(events, List[EventResponse], headers={"X-Feed-Source": source})
 
 # =========================================================
 # 🔹 Obtener eventos del organizador autenticado
@@ -117,18 +210,15 @@ async def get_my_events(
     # Convertir Event → OrganizerEventResponse
     organizer_events = []
     for ev in events:
-        # Calcular tickets vendidos sumando sold_quantity de todos los ticket_types
-        sold_tickets = sum(tt.sold_quantity or 0 for tt in (ev.ticket_types or []))
-        
         organizer_events.append(OrganizerEventResponse(
             id=str(ev.id),
             title=ev.title,
             date=ev.startDate.isoformat(),
             location=ev.venue,
             totalTickets=ev.totalCapacity,
-            soldTickets=sold_tickets,
+            soldTickets=ev.total_sold or 0,
             status=ev.status.value if hasattr(ev.status, "value") else ev.status,
-            imageUrl=f"/api/events/{ev.id}/photo" if ev.photo else None
+            imageUrl=ev.photo_path
         ))
 
     return organizer_events
@@ -166,10 +256,28 @@ async def create_event(
 # 🔹 Obtener detalle de evento
 # =========================================================
 @router.get("/{event_id}", response_model=EventDetailResponse)
-def get_event(event_id: UUID, db: Session = Depends(get_db)):
-    """Obtener detalle completo del evento por ID (con ticket_types)."""
-    event_service = EventService(db)
-    return event_service.get_event_by_id(event_id)
+async def get_event(
+    event_id: UUID,
+    request: Request,
+    response: Response,
+    event_service: AsyncEventService = Depends(get_async_event_service)
+):
+    """
+    Obtener detalle completo del evento por ID (con ticket_types).
+    Con If-None-Match / If-Modified-Since vigentes responde 304 tras una
+    consulta de timestamps, sin cargar relaciones ni serializar.
+    """
+    validators = await event_service.get_event_validators(event_id)
+    if validators is None:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    result = await response_cache.serve(
+        "events:detail", dict(id=event_id), EventDetailResponse,
+        lambda: event_service.get_event_by_id(event_id),
+        tags=[event_tag(event_id)],
+    )
+    return with_validators(result, response, validators)
 
 
 # =========================================================
@@ -269,19 +377,61 @@ async def delete_event_post(
 @router.get("/{event_id}/photo")
 async def get_event_photo(
     event_id: UUID,
-    db: Session = Depends(get_db)
+    request: Request,
+    v: Optional[str] = Query(None, description="Versión (prefijo del hash) incluida en photoUrl"),
+    size: Optional[Literal["thumb", "card", "hero"]] = Query(None, description="Variante; sin size se sirve el original"),
+    format: Optional[Literal["webp", "jpeg"]] = Query(None, description="Por defecto se negocia con Accept"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Devuelve la foto del evento como imagen binaria.
-    Se usa la URL construida en Event.to_dict(): /events/{id}/photo
+    Devuelve la foto del evento (o una variante) en streaming desde disco.
+    Se usa la URL construida en Event.to_dict(): /events/{id}/photo?v=<hash>&size=card
     """
-    event = db.query(Event).filter(Event.id == event_id).first()
+    # Solo las columnas de la foto, nunca la fila completa
+    result = await db.execute(
+        select(Event.photo_hash, Event.photo_mime, Event.photo_size).where(Event.id == event_id)
+    )
+    row = result.first()
 
-    if not event or not event.photo:
+    if not row or not row.photo_hash:
         raise HTTPException(status_code=404, detail="Foto no encontrada")
 
-    # Asumimos JPEG; cambia a image/png si guardas PNG, etc.
-    return Response(content=event.photo, media_type="image/jpeg")
+    if v == photo_version(row.photo_hash):
+        # URL versionada (la exacta de photo_url_for): el contenido no cambia nunca
+        cache_control = f"public, max-age={settings.PHOTO_CACHE_MAX_AGE}, immutable"
+    else:
+        cache_control = "public, max-age=300, must-revalidate"
+
+    # ETag = hash del contenido (más variante y formato): el 304 no toca el disco
+    fmt = pick_format(request.headers.get("accept"), format) if size else None
+    etag = f'"{row.photo_hash}-{VARIANT_VERSION}-{size}.{fmt}"' if size else f'"{row.photo_hash}"'
+    validators = Validators(etag=etag)
+    if is_not_modified(request, validators):
+        response = not_modified(validators, cache_control)
+        if size:
+            response.headers["Vary"] = "Accept"
+        return response
+
+    store = get_blob_store()
+    if not store.exists(row.photo_hash):
+        raise HTTPException(status_code=404, detail="Foto no encontrada")
+
+    if size:
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept"}
+        if not await ensure_derivative(row.photo_hash, size, fmt, lambda: store.read(row.photo_hash)):
+            raise HTTPException(status_code=404, detail="Foto no encontrada")
+        return StreamingResponse(
+            derivative_cache.iter_chunks(row.photo_hash, size, fmt),
+            media_type=VARIANT_FORMATS[fmt],
+            headers=headers,
+        )
+
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Content-Length": str(row.photo_size)}
+    return StreamingResponse(
+        store.iter_chunks(row.photo_hash),
+        media_type=row.photo_mime or "application/octet-stream",
+        headers=headers,
+    )
 
 @router.post("/{event_id}/upload-photo", response_model=EventResponse)
 async def upload_event_photo(
@@ -294,10 +444,11 @@ async def upload_event_photo(
     # Leer bytes del archivo
     photo_bytes = await photo.read()
 
-    # Guardar la foto en la DB
+    # Guardar la foto en el blob store y generar sus variantes (pool de procesos)
     updated_event = event_service.update_event_photo(event_id, photo_bytes)
+    await generate_derivatives(updated_event.photo_hash, photo_bytes)
 
-    return updated_event
+    return event_service._event_to_response(updated_event)
 
 @router.get("/{event_id}/panel", response_model=EventDetailResponse)
 async def get_event_panel(
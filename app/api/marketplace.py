@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status, Request
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select, func, or_
-from typing import List, Optional
+from typing import List, Optional, Literal
 from uuid import UUID
-from datetime import timedelta, datetime, timezone
+from datetime import timedelta, timezone
 from fastapi.responses import JSONResponse
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_read_db
 from app.core.dependencies import get_current_active_user, get_attendee_user
 from app.models.user import User
 from app.models.marketplace_listing import MarketplaceListing, ListingStatus
-from app.models.event import Event
 from app.models.ticket import Ticket, TicketStatus
 from app.models.payment import Payment, PaymentMethod, PaymentStatus 
 from app.services.marketplace_service import MarketplaceService 
+from app.repositories.marketplace_repository import AsyncMarketplaceRepository
 from app.services.payment_service import PaymentService
 from app.core.config import settings
+from app.core.metrics import WEBHOOK_NOTIFICATIONS
+from app.core.json_responses import trusted_response
 from app.utils.image_utils import process_nested_user_photo
 from app.schemas.marketplace import (
     ListingResponse, 
@@ -40,65 +42,36 @@ router = APIRouter(prefix="/marketplace", tags=["Marketplace"])
 
 @router.get("/listings", response_model=PaginatedMarketplaceListings)
 async def get_active_listings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(12, ge=1, le=100),
     search: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
     order_by: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="nextCursor de la respuesta anterior (reemplaza a page)"),
+    count: Literal["auto", "exact", "estimated"] = Query("auto", description="Cómo calcular total"),
 ):
     """
     Obtener todos los listados de reventa ACTIVOS y paginados.
+
+    Con `cursor` se pagina por keyset (sin total); cada respuesta trae `nextCursor`.
+    `totalIsExact` es False cuando total es la estimación del planner (`count`).
     """
     try:
-        query = (
-            select(MarketplaceListing)
-            .join(Event, MarketplaceListing.event_id == Event.id)
-            .options(
-                joinedload(MarketplaceListing.seller),
-                joinedload(MarketplaceListing.event),
-                joinedload(MarketplaceListing.ticket).joinedload(Ticket.ticket_type)
-            )
-            .where(
-                MarketplaceListing.status == ListingStatus.ACTIVE,
-                MarketplaceListing.expires_at > datetime.utcnow(),
-                Event.startDate >= datetime.utcnow()  # Filtrar eventos que ya empezaron
-            )
+        listings, count_result, next_cursor = await AsyncMarketplaceRepository(db).get_active_listings(
+            page=page,
+            page_size=page_size,
+            search=search,
+            min_price=min_price,
+            max_price=max_price,
+            order_by=order_by,
+            cursor=cursor,
+            count_mode=count
         )
-        
-        if search:
-            search_term = f"%{search.lower()}%"
-            query = query.filter(
-                or_(
-                    func.lower(MarketplaceListing.title).like(search_term),
-                    func.lower(Event.title).like(search_term)
-                )
-            )
-        
-        if min_price is not None:
-            query = query.where(MarketplaceListing.price >= min_price)
-        
-        if max_price is not None:
-            query = query.where(MarketplaceListing.price <= max_price)
-
-        total_query = select(func.count()).select_from(query.subquery())
-        total = db.execute(total_query).scalar() 
-        
-        if total is None:
-            total = 0
 
-        total_pages = math.ceil(total / page_size)
-        offset = (page - 1) * page_size
-        
-        if order_by == "price_asc":
-            query = query.order_by(MarketplaceListing.price.asc())
-        elif order_by == "price_desc":
-            query = query.order_by(MarketplaceListing.price.desc())
-        else:
-            query = query.order_by(MarketplaceListing.created_at.desc())
-        
-        listings = db.scalars(query.offset(offset).limit(page_size)).unique().all()
+        total = count_result.total if count_result else None
+        total_pages = math.ceil(total / page_size) if total is not None else None
         
         # --- CORRECCIÓN AQUÍ ---
         # Antes tenías settings.BACKEND_URL, lo cambiamos a "seller" para indicar
@@ -110,13 +83,17 @@ async def get_active_listings(
         response_data = PaginatedMarketplaceListings(
             items=[ListingResponse.model_validate(listing) for listing in listings],
             total=total,
+            totalIsExact=count_result.exact if count_result else True,
             page=page,
             pageSize=page_size,
-            totalPages=total_pages
+            totalPages=total_pages,
+            nextCursor=next_cursor
         )
 
-        return response_data
-        
+        return trusted_response(response_data, PaginatedMarketplaceListings)
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al obtener listados del marketplace: {e}", exc_info=True)
         traceback.print_exc() 
@@ -306,6 +283,7 @@ async def marketplace_webhook(
             payment_id = body.get("data", {}).get("id")
             if not payment_id:
                 logger.warning("⚠️ Webhook sin payment_id")
+                WEBHOOK_NOTIFICATIONS.labels("marketplace", "ignored").inc()
                 return {"status": "ok"}
 
             try:
@@ -323,6 +301,7 @@ async def marketplace_webhook(
 
                 if not external_reference:
                     logger.warning(f"⚠️ Pago {payment_id} sin external_reference")
+                    WEBHOOK_NOTIFICATIONS.labels("marketplace", "ignored").inc()
                     return {"status": "ok"}
 
                 # Parsear el external_reference
@@ -330,6 +309,7 @@ async def marketplace_webhook(
                 parts = external_reference.split("_")
                 if len(parts) != 4 or parts[0] != "LISTING" or parts[2] != "BUYER":
                     logger.error(f"❌ Formato de external_reference inválido: {external_reference}")
+                    WEBHOOK_NOTIFICATIONS.labels("marketplace", "error").inc()
                     return {"status": "error", "message": "Formato de external_reference inválido"}
                 
                 listing_id = parts[1]
@@ -394,10 +374,15 @@ async def marketplace_webhook(
                 logger.error(f"❌ Error procesando webhook de marketplace: {str(e)}")
                 raise HTTPException(status_code=500, detail="Error al procesar webhook")
 
+            WEBHOOK_NOTIFICATIONS.labels("marketplace", "processed").inc()
+        else:
+            WEBHOOK_NOTIFICATIONS.labels("marketplace", "ignored").inc()
+
         return {"status": "ok"}
 
     except Exception as e:
         logger.error(f"❌ Error general en webhook marketplace: {str(e)}")
+        WEBHOOK_NOTIFICATIONS.labels("marketplace", "error").inc()
         return {"status": "error", "message": str(e)}
 
 
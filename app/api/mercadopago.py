@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Request
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
@@ -263,8 +265,9 @@ async def mercadopago_webhook(
                     "amount": payment_data["transaction_amount"]
                 }
                 
-                # Llamar a nuestro servicio para finalizar la compra
-                PurchaseService.finalize_purchase_transaction(
+                # Llamar a nuestro servicio para finalizar la compra (bloquea: en un hilo)
+                await asyncio.to_thread(
+                    PurchaseService.finalize_purchase_transaction,
                     db=db,
                     purchase=purchase,
                     payment_info=payment_info_dict
@@ -279,7 +282,8 @@ async def mercadopago_webhook(
                         if not purchase:
                             raise Exception(f"Compra {purchase_id_str} no encontrada")
 
-                        PurchaseService.finalize_purchase_transaction(
+                        await asyncio.to_thread(
+                            PurchaseService.finalize_purchase_transaction,
                             db=db,
                             purchase=purchase,
                             payment_info=payment_info_dict
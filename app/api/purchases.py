@@ -4,8 +4,10 @@ API Endpoint para compras directas de tickets (no marketplace)
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from uuid import UUID
+from typing import Optional
 from datetime import datetime, timezone
 from decimal import Decimal
+import asyncio
 import logging
 import json
 
@@ -25,7 +27,10 @@ from app.schemas.purchase import (
 )
 from app.services.payment_service import PaymentService
 from app.services.purchase_service import PurchaseService
+from app.services.inventory_service import InventoryService
+from app.services.waiting_room import waiting_room
 from app.core.config import settings
+from app.core.metrics import WEBHOOK_NOTIFICATIONS
 import mercadopago
 
 logger = logging.getLogger(__name__)
@@ -42,8 +47,13 @@ async def create_purchase_preference(
     """
     Crea una preferencia de pago en Mercado Pago y una orden de compra PENDING.
     """
+    # 0. Sala de espera: sin turno admitido no se toca la base de datos ni MercadoPago.
+    #    El turno queda reclamado: otra compra simultánea con el mismo token recibe 403
+    queue_turn = waiting_room.admit(db, request.eventId, current_user.id, request.queueToken)
+
+    purchase = None
     try:
-        # 1. Llamar al servicio para crear la compra en BD
+        # 1. Llamar al servicio para crear la compra en BD (reserva el stock)
         purchase, mp_items = PurchaseService.create_pending_purchase(
             db=db,
             user_id=current_user.id,
@@ -67,14 +77,28 @@ async def create_purchase_preference(
             buyer_email=current_user.email
         )
         print("preference response:", preference_response)
+        if queue_turn:
+            waiting_room.consume(request.eventId, current_user.id, queue_turn)
         return CreatePreferenceResponse(
             purchaseId=str(purchase.id),
             initPoint=preference_response["init_point"], # URL para redirigir
             preferenceId=preference_response["id"]
         )
 
+    except HTTPException:
+        if queue_turn:
+            waiting_room.release(request.eventId, current_user.id, queue_turn)
+        raise  # sin stock, evento o tipo inexistente: el detalle llega tal cual
     except Exception as e:
         logger.error(f"Error creando preferencia: {str(e)}")
+        if queue_turn:
+            waiting_room.release(request.eventId, current_user.id, queue_turn)
+        if purchase is not None:
+            # Sin preferencia no hay checkout: se devuelve el stock ya
+            db.rollback()
+            InventoryService.release(db, purchase)
+            purchase.status = PurchaseStatus.CANCELLED
+            db.commit()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al procesar la solicitud de pago: {str(e)}"
@@ -108,6 +132,7 @@ async def mercadopago_webhook(
             if not payment_id:
                 logger.warning("⚠️ Webhook sin payment_id en data.id")
                 logger.warning(f"🔍 Body keys: {list(body.keys())}")
+                WEBHOOK_NOTIFICATIONS.labels("purchases", "ignored").inc()
                 return {"status": "ok"}
 
             try:
@@ -125,6 +150,7 @@ async def mercadopago_webhook(
 
                 if not external_reference:
                     logger.warning(f"⚠️ Pago {payment_id} sin external_reference")
+                    WEBHOOK_NOTIFICATIONS.labels("purchases", "ignored").inc()
                     return {"status": "ok"}
 
                 # Buscar la compra en nuestra BBDD
@@ -146,19 +172,24 @@ async def mercadopago_webhook(
                         "payment_type_id": payment_info.get("payment_type_id")
                     }
                     
-                    # Llamar a nuestro servicio para finalizar la compra
-                    PurchaseService.finalize_purchase_transaction(
+                    # Llamar a nuestro servicio para finalizar la compra. Bloquea (base): en un
+                    # hilo, fuera del event loop. El email sale en su propio hilo tras el commit
+                    # Sin stock queda FAILED pendiente de reembolso (ya confirmada): respondemos 200
+                    purchase = await asyncio.to_thread(
+                        PurchaseService.finalize_purchase_transaction,
                         db=db,
                         purchase=purchase,
                         payment_info=payment_info_dict
                     )
                     
                     db.commit()
-                    logger.info(f"✅ Compra {purchase.id} finalizada exitosamente")
+                    if purchase.status == PurchaseStatus.COMPLETED:
+                        logger.info(f"✅ Compra {purchase.id} finalizada exitosamente")
                 
                 # Manejar otros estados
                 elif status_detail == "rejected":
                     purchase.status = PurchaseStatus.REJECTED
+                    InventoryService.release(db, purchase)
                     db.commit()
                     logger.info(f"⚠️ Pago rechazado para compra {purchase.id}")
                 
@@ -170,10 +201,15 @@ async def mercadopago_webhook(
                 logger.error(f"❌ Error procesando webhook de MP: {str(e)}")
                 raise HTTPException(status_code=500, detail="Error al procesar webhook")
 
+            WEBHOOK_NOTIFICATIONS.labels("purchases", "processed").inc()
+        else:
+            WEBHOOK_NOTIFICATIONS.labels("purchases", "ignored").inc()
+
         return {"status": "ok"}
 
     except Exception as e:
         logger.error(f"❌ Error general en webhook: {str(e)}")
+        WEBHOOK_NOTIFICATIONS.labels("purchases", "error").inc()
         return {"status": "error", "message": str(e)}
 
 
@@ -181,17 +217,20 @@ async def mercadopago_webhook(
 async def get_my_purchases(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_attendee_user),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene las compras del usuario actual con paginación.
+    Con `cursor` (nextCursor de la respuesta anterior) se pagina por keyset, sin total.
     """
-    purchases, total = PurchaseService.get_user_purchases(
+    purchases, total, next_cursor = PurchaseService.get_user_purchases(
         db=db,
         user_id=current_user.id,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        cursor=cursor
     )
     
     return {
@@ -199,7 +238,8 @@ async def get_my_purchases(
         "total": total,
         "page": page,
         "pageSize": page_size,
-        "totalPages": (total + page_size - 1) // page_size
+        "totalPages": (total + page_size - 1) // page_size if total is not None else None,
+        "nextCursor": next_cursor
     }
 
 
@@ -1,18 +1,20 @@
 # ticket_types.py (API Layer)
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
 from app.core.database import get_db
 from app.services.ticket_type_service import TicketTypeService
+from app.utils.http_cache import is_not_modified, not_modified, with_validators
 from app.schemas.ticket_type import (
     TicketTypeResponse,
     TicketTypeCreate,
     TicketTypeUpdate,
     TicketTypeBatchCreate,
-    TicketTypeBatchUpdate
+    TicketTypeBatchUpdate,
+    TicketTypeAvailability
 )
 
 router = APIRouter(prefix="/ticket-types", tags=["Ticket Types"])
@@ -30,6 +32,8 @@ def get_ticket_type_service(db: Session = Depends(get_db)) -> TicketTypeService:
 @router.get("/event/{event_id}", response_model=List[TicketTypeResponse])
 def get_ticket_types_by_event(
     event_id: UUID,
+    request: Request,
+    response: Response,
     active_only: bool = Query(False, description="Mostrar solo tipos de entrada activos"),
     ticket_type_service: TicketTypeService = Depends(get_ticket_type_service)
 ):
@@ -38,8 +42,27 @@ def get_ticket_types_by_event(
     
     - **event_id**: ID del evento
     - **active_only**: Si es True, solo devuelve tipos de entrada activos
+
+    Soporta GET condicional (If-None-Match / If-Modified-Since → 304).
+    """
+    validators = ticket_type_service.get_ticket_types_validators(event_id, active_only)
+    if validators and is_not_modified(request, validators):
+        return not_modified(validators)
+    result = ticket_type_service.get_ticket_types_by_event(event_id, active_only)
+    return with_validators(result, response, validators) if validators else result
+
+
+@router.get("/event/{event_id}/availability", response_model=List[TicketTypeAvailability])
+def get_ticket_types_availability(
+    event_id: UUID,
+    ticket_type_service: TicketTypeService = Depends(get_ticket_type_service)
+):
+    """
+    Entradas que quedan a la venta por tipo (sin vendidas ni reservadas), para
+    consultar seguido durante una salida a la venta. Con contadores de stock
+    se responde desde Redis sin consultar la base.
     """
-    return ticket_type_service.get_ticket_types_by_event(event_id, active_only)
+    return ticket_type_service.get_availability(event_id)
 
 
 @router.get("/{ticket_type_id}", response_model=TicketTypeResponse)
@@ -1,60 +1,54 @@
+import asyncio
 import base64
-from fastapi import APIRouter, Depends, HTTPException, status, Query # 👈 Asegúrate de importar Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select, func, exists
-from typing import List, Any, Dict # 👈 Añade Any y Dict
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response # 👈 Asegúrate de importar Query
+from sqlalchemy import select, exists
+from typing import List, Any, Dict, Literal, Optional # 👈 Añade Any y Dict
+from uuid import UUID
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_active_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_read_db
+from app.core.json_responses import trusted_response
+from app.core.dependencies import get_current_active_user_async
+from app.repositories.ticket_repository import AsyncTicketRepository
+from app.utils.blob_store import get_blob_store
+from app.utils.http_cache import Validators, is_not_modified, not_modified
+from app.utils.image_derivatives import derivative_cache, ensure_derivative
+from app.utils.qr_generator import QR_FORMATS, qr_cache, qr_hash, qr_version, ticket_qr_payload
 from app.models.user import User
 from app.models.ticket import Ticket, TicketStatus
-from app.models.marketplace_listing import MarketplaceListing, ListingStatus
 # (No necesitas app.schemas.ticket.MyTicketResponse para esta respuesta)
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
+
+def _read_blob_or_none(key: str):
+    try:
+        return get_blob_store().read(key)
+    except FileNotFoundError:
+        return None
+
 @router.get("/my-tickets")
 async def get_my_tickets(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_active_user_async),
     page: int = Query(1, ge=1), # 👈 RE-INTRODUCIR PAGINACIÓN
-    page_size: int = Query(20, ge=1, le=100) # 👈 RE-INTRODUCIR PAGINACIÓN
+    page_size: int = Query(20, ge=1, le=100), # 👈 RE-INTRODUCIR PAGINACIÓN
+    cursor: Optional[str] = Query(None, description="next_cursor de la respuesta anterior (reemplaza a page)")
 ):
     """
     Obtiene todos los tickets (paginados) que posee el usuario actual,
     indicando si están activamente listados en el marketplace.
+    Con `cursor` se pagina por keyset (sin total).
     """
     
-    # --- INICIO DE LA CORRECCIÓN (v2 - Eficiente y Paginada) ---
-
-    # 1. Consulta base: Unir Ticket con un listing ACTIVO (si existe)
-    # Usamos outerjoin para asegurar que obtenemos tickets INCLUSO SI NO tienen listing
-    query = db.query(Ticket, MarketplaceListing).outerjoin(
-        MarketplaceListing,
-        (MarketplaceListing.ticket_id == Ticket.id) &
-        (MarketplaceListing.status == ListingStatus.ACTIVE)
-    ).filter(
-        Ticket.user_id == current_user.id
-    ).options(
-        # Cargar relaciones del Ticket para evitar más queries
-        joinedload(Ticket.event),
-        joinedload(Ticket.ticket_type)
+    # 1-3. Ticket + listing ACTIVO (outerjoin), total y paginación en AsyncSession
+    results, total, next_cursor = await AsyncTicketRepository(db).get_user_tickets(
+        user_id=current_user.id,
+        page=page,
+        page_size=page_size,
+        cursor=cursor
     )
-
-    # 2. Contar el total de tickets del usuario ANTES de paginar
-    # (Necesitamos una subquery para contar solo los tickets del usuario)
-    total_query = db.query(func.count(Ticket.id)).filter(Ticket.user_id == current_user.id)
-    total = total_query.scalar() or 0
-    
-    # 3. Aplicar paginación y orden
-    offset = (page - 1) * page_size
-    results = query.order_by(
-        Ticket.purchaseDate.desc() # Ordenar por fecha de compra
-    ).offset(
-        offset
-    ).limit(
-        page_size
-    ).all()
     
     # 4. Procesar los resultados (que son tuplas de (Ticket, MarketplaceListing | None))
     items: List[Dict[str, Any]] = []
@@ -64,9 +58,13 @@ async def get_my_tickets(
         listing_id = str(active_listing.id) if active_listing else None
         
         # Obtener portada (similar a la lógica anterior)
+        # Portada: solo la variante "thumb" en JPEG (unos KB), nunca el original
         cover = None
-        if ticket.event.photo:
-            cover = base64.b64encode(ticket.event.photo).decode("utf-8")
+        photo_hash = ticket.event.photo_hash
+        if photo_hash and await ensure_derivative(
+            photo_hash, "thumb", "jpeg", lambda: _read_blob_or_none(photo_hash)
+        ):
+            cover = base64.b64encode(derivative_cache.read(photo_hash, "thumb", "jpeg")).decode("utf-8")
        
 
         # Construir el diccionario de respuesta
@@ -76,8 +74,10 @@ async def get_my_tickets(
             'purchaseDate': ticket.purchaseDate.isoformat() if ticket.purchaseDate else None,
             'status': ticket.status.value,
             'isValid': ticket.isValid,
-            'qrCode': ticket.qrCode if ticket.qrCode else None,
-            'code': ticket.qrCode if ticket.qrCode else None, # Añado 'code' por si el frontend lo usa
+            'qrCode': ticket.qrCode if ticket.qrCode else None, # Contenido del QR
+            # URLs de la imagen (se genera al pedirla), no la imagen en base64
+            'qrUrl': ticket.qr_url(),
+            'qrSvgUrl': ticket.qr_url("svg"),
             'event': {
                 'id': str(ticket.event.id),
                 'title': ticket.event.title,
@@ -97,9 +97,50 @@ async def get_my_tickets(
         items.append(ticket_dict)
 
     # 5. Devolver la respuesta paginada que el frontend espera
-    return {
+    return trusted_response({
         "items": items,
         "total": total,
         "page": page,
-        "page_size": page_size
-    }
\ No newline at end of file
+        "page_size": page_size,
+        "next_cursor": next_cursor
+    })
+
+@router.get("/{ticket_id}/qr.{fmt}")
+async def get_ticket_qr(
+    ticket_id: UUID,
+    fmt: Literal["png", "svg"],
+    request: Request,
+    v: Optional[str] = Query(None, description="Versión (prefijo del hash) incluida en qrUrl de my-tickets"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Imagen del QR del ticket, generada al pedirla y cacheada (memoria y disco).
+    Sin autenticación, como la foto del evento: la URL lleva el id del ticket,
+    que es justamente lo que codifica el QR, así que no expone nada más.
+    """
+    row = (await db.execute(
+        select(Ticket.event_id, Ticket.qrCode).where(Ticket.id == ticket_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Ticket no encontrado")
+
+    payload = ticket_qr_payload(ticket_id, row.event_id, row.qrCode)
+    digest = qr_hash(payload, fmt)
+    if v == qr_version(payload, fmt):
+        # URL versionada (la exacta de qr_url): cambia si el QR cambia (p. ej. una transferencia)
+        cache_control = f"private, max-age={settings.QR_CACHE_MAX_AGE}, immutable"
+    else:
+        cache_control = "private, max-age=300, must-revalidate"
+
+    # ETag = hash de la imagen: el 304 no genera ni lee nada
+    validators = Validators(etag=f'"{digest}"')
+    if is_not_modified(request, validators):
+        return not_modified(validators, cache_control)
+
+    # Generar el PNG es CPU (unos ms): fuera del event loop si no está en memoria
+    image = qr_cache.cached(payload, fmt) or await asyncio.to_thread(qr_cache.get, payload, fmt)
+    return Response(
+        content=image,
+        media_type=QR_FORMATS[fmt],
+        headers={"ETag": validators.etag, "Cache-Control": cache_control},
+    )
@@ -0,0 +1,56 @@
+"""
+API de la sala de espera de salidas a la venta (app/services/waiting_room.py)
+"""
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app.core.database import get_db
+from app.core.dependencies import get_token_user_id
+from app.schemas.purchase import QueueTurnResponse
+from app.services.waiting_room import Turn, poll_after, waiting_room
+
+router = APIRouter(prefix="/events", tags=["Waiting Room"])
+
+
+def _turn_response(turn: Turn, response: Response) -> QueueTurnResponse:
+    wait = poll_after(turn) if turn.position else 0
+    if wait:
+        response.headers["Retry-After"] = str(wait)
+    return QueueTurnResponse(
+        token=turn.token,
+        admitted=not turn.position,
+        position=turn.position,
+        etaSeconds=round(turn.eta_seconds, 1),
+        pollAfterSeconds=wait
+    )
+
+
+@router.post("/{event_id}/queue", response_model=QueueTurnResponse)
+def join_queue(
+    event_id: UUID,
+    response: Response,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_token_user_id)
+):
+    """
+    Formarse en la sala de espera del evento. Devuelve el token del turno, que
+    se envía como queueToken a /purchases/create-preference una vez admitido.
+    Si el evento no tiene sala, responde admitido y sin token.
+
+    Autentica solo con el JWT: durante el pico, formarse no consulta la base
+    de datos (salvo la tasa del evento, en caché unos segundos por worker).
+    """
+    turn = waiting_room.join(db, event_id, user_id)
+    if turn is None:
+        return QueueTurnResponse(token=None, admitted=True, position=0, etaSeconds=0, pollAfterSeconds=0)
+    return _turn_response(turn, response)
+
+
+@router.get("/{event_id}/queue/{token}", response_model=QueueTurnResponse)
+def get_queue_turn(event_id: UUID, token: str, response: Response):
+    """
+    Posición y tiempo estimado del turno. Sin autenticación ni base de datos:
+    el token es secreto y solo sirve para comprar con la cuenta que lo pidió.
+    """
+    return _turn_response(waiting_room.status(event_id, token), response)
@@ -11,10 +11,12 @@ import logging
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.metrics import WEBHOOK_NOTIFICATIONS
 from app.models.purchase import Purchase, PurchaseStatus
 from app.models.payment import Payment, PaymentStatus
 from app.models.user import User
 from app.services.billing_service import BillingService
+from app.services.inventory_service import InventoryService
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +116,7 @@ async def mercadopago_webhook(
         
         if not topic or not data_id:
             logger.warning("Webhook inválido: falta topic o data_id")
+            WEBHOOK_NOTIFICATIONS.labels("webhooks", "ignored").inc()
             return {"status": "ignored", "reason": "missing_data"}
         
         # Verificar firma (si está configurado)
@@ -140,18 +143,23 @@ async def mercadopago_webhook(
         # Procesar según el tipo
         if topic == 'payment':
             await process_payment_notification(data_id, db)
+            WEBHOOK_NOTIFICATIONS.labels("webhooks", "processed").inc()
         elif topic == 'merchant_order':
             logger.info(f"Merchant order notification: {data_id} (no procesado)")
+            WEBHOOK_NOTIFICATIONS.labels("webhooks", "ignored").inc()
         else:
             logger.info(f"Tipo de notificación no soportado: {topic}")
+            WEBHOOK_NOTIFICATIONS.labels("webhooks", "ignored").inc()
         
         # Retornar 200 OK para confirmar recepción
         return {"status": "success"}
         
     except HTTPException:
+        WEBHOOK_NOTIFICATIONS.labels("webhooks", "error").inc()
         raise
     except Exception as e:
         logger.error(f"Error procesando webhook: {str(e)}")
+        WEBHOOK_NOTIFICATIONS.labels("webhooks", "error").inc()
         # Retornar 200 para evitar reintentos innecesarios
         return {"status": "error", "message": str(e)}
 
@@ -207,6 +215,10 @@ async def process_payment_notification(payment_id: str, db: Session):
             if purchase.payment:
                 purchase.payment.status = map_mercadopago_payment_status(payment_data.get('status'))
             
+            # Pago rechazado o cancelado: devolver el stock reservado
+            if new_status in (PurchaseStatus.REJECTED, PurchaseStatus.CANCELLED):
+                InventoryService.release(db, purchase)
+
             # Actualizar fecha de pago si fue aprobado
             if new_status == PurchaseStatus.COMPLETED and payment_data.get('date_approved'):
                 from datetime import datetime
@@ -25,6 +25,24 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # Si no se define, se deriva de DATABASE_URL (asyncpg)
+    READ_DATABASE_URL: Optional[str] = None  # Réplica de solo lectura (opcional)
+    READ_YOUR_WRITES_WINDOW_SECONDS: int = 10  # Lecturas al primario tras una escritura del usuario
+    SQL_ECHO: bool = False  # Log de cada sentencia (solo para depuración local)
+
+    # Connection pool (se aplica a primario, réplica y engines async)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+
+    # SQL instrumentation (Server-Timing + detector N+1)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_INSTRUMENTATION_SAMPLE_RATE: float = 1.0  # 0.0 - 1.0
+    SQL_SLOW_QUERY_MS: float = 100.0
+    SQL_SLOWEST_STATEMENTS: int = 3
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
 
     # Security
     SECRET_KEY: str
@@ -70,6 +88,79 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "uploads"
     ALLOWED_FILE_TYPES: List[str] = ["image/jpeg", "image/png", "image/webp"]
 
+    # Blob store (fotos de eventos fuera de la base de datos)
+    BLOB_STORE_BACKEND: str = "local"
+    BLOB_STORE_DIR: str = "storage/blobs"  # fuera de /uploads: no se sirve como estático
+    PHOTO_CACHE_MAX_AGE: int = 31536000  # URLs versionadas (?v=hash) son inmutables
+
+    # Derivados de imágenes (thumb/card/hero en WebP y JPEG)
+    IMAGE_DERIVATIVES_DIR: str = "storage/derivatives"
+    IMAGE_PROCESS_WORKERS: int = 2
+
+    # QR de los tickets: se guarda el contenido y la imagen se genera al pedirla
+    QR_CACHE_DIR: str = "storage/qr"
+    QR_MEMORY_CACHE_SIZE: int = 2048  # imágenes en la LRU de cada proceso
+    QR_CACHE_MAX_AGE: int = 31536000  # URLs versionadas (?v=hash) son inmutables
+    QR_PROCESS_WORKERS: int = 2  # pool de render en lote
+    QR_POOL_MIN_BATCH: int = 16  # lotes más chicos se generan en el proceso
+
+    # Autocompletado de eventos (pg_trgm + caché de prefijos en memoria)
+    AUTOCOMPLETE_DEFAULT_LIMIT: int = 8
+    AUTOCOMPLETE_MAX_LIMIT: int = 20
+    AUTOCOMPLETE_SIMILARITY_THRESHOLD: float = 0.4  # pg_trgm.word_similarity_threshold
+    AUTOCOMPLETE_CACHE_SIZE: int = 1024  # prefijos distintos por proceso
+    AUTOCOMPLETE_CACHE_TTL_SECONDS: int = 30
+
+    # Totales de listados paginados (app/utils/counts.py)
+    COUNT_CACHE_SIZE: int = 2048  # conjuntos de filtros distintos por proceso
+    COUNT_CACHE_TTL_SECONDS: int = 15
+    COUNT_ESTIMATE_THRESHOLD: int = 10000  # en modo auto, estimar a partir de estas filas
+
+    # Caché de respuestas públicas del catálogo (app/core/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "auto"  # auto | redis | memory
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MEMORY_SIZE: int = 2048  # respuestas por proceso (backend memory)
+    RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS: float = 0.25
+
+    # Serialización JSON (app/core/json_responses.py)
+    TRUSTED_OUTPUT: bool = True  # endpoints calientes vuelcan sus modelos sin revalidar
+
+    # Búsqueda geográfica (app/utils/geo.py, app/utils/geocoding.py)
+    GEOCODER_BACKEND: str = "offline"  # offline (tabla local de ciudades) | none
+    GEO_DEFAULT_RADIUS_KM: float = 10.0
+    GEO_MAX_RADIUS_KM: float = 500.0
+
+    # Read model del catálogo en memoria (app/services/catalog_read_model.py)
+    CATALOG_READ_MODEL_ENABLED: bool = True
+    CATALOG_POLL_SECONDS: float = 5.0  # sondeo de updatedAt (cambios de otros workers)
+    CATALOG_FULL_RELOAD_SECONDS: int = 300  # recarga completa (borrados, categorías)
+
+    # Feed personalizado /events/for-you (app/services/event_feed.py)
+    FEED_ENABLED: bool = True
+    FEED_REFRESH_SECONDS: int = 900  # recálculo de candidatos de todos los usuarios
+    FEED_TTL_SECONDS: int = 3600  # vida de las listas en la caché (mayor que el recálculo)
+    FEED_CANDIDATES: int = 200  # candidatos guardados por usuario
+    FEED_PURCHASE_LOOKBACK_DAYS: int = 365  # compras que cuentan como señal
+
+    # Reservas de stock mientras el checkout de MercadoPago está abierto
+    PURCHASE_HOLD_MINUTES: int = 15
+    PURCHASE_HOLD_SWEEP_SECONDS: float = 30.0  # cada cuánto se liberan las vencidas
+    PURCHASE_HOLD_SWEEP_BATCH: int = 200
+    EVENT_AGGREGATES_REFRESH_SECONDS: float = 2.0  # available_tickets tras reservar o liberar (sin contadores)
+
+    # Sala de espera de salidas a la venta (app/services/waiting_room.py)
+    WAITING_ROOM_BACKEND: str = "redis"  # redis | memory (solo desarrollo con un worker)
+    WAITING_ROOM_BURST_SECONDS: float = 1.0  # capacidad del token bucket, en segundos de tasa
+    WAITING_ROOM_TOKEN_TTL_SECONDS: int = 7200  # vida del turno (fila + compra)
+    WAITING_ROOM_CONFIG_TTL_SECONDS: float = 5.0  # caché por proceso de la tasa del evento
+    WAITING_ROOM_MAX_POLL_SECONDS: float = 30.0
+
+    # Contadores de stock en Redis (app/services/stock_counters.py)
+    STOCK_COUNTERS_BACKEND: str = "auto"  # auto | redis | memory | off
+    STOCK_COUNTERS_FLUSH_SECONDS: float = 1.0  # cada cuánto se vuelcan los deltas a ticket_types
+    STOCK_COUNTERS_DRIFT_CHECK_SECONDS: int = 300  # revisión de deriva de todos los contadores
+
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
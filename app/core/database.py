@@ -1,18 +1,94 @@
+import asyncio
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
 from app.core.config import settings
+from app.core.read_routing import should_read_from_primary
+from app.core.sql_instrumentation import instrument_engine
+from app.core.pool_metrics import TimedQueuePool, TimedAsyncQueuePool, register_pool
+
+
+def pool_options(is_async: bool = False) -> dict:
+    """Configuración del pool compartida por todos los engines (ver Settings.DB_POOL_*)"""
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=True
+    echo=settings.SQL_ECHO,
+    **pool_options()
 )
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_url(url: str) -> str:
+    """Convierte una URL postgresql:// (psycopg2) a su variante asyncpg"""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgres", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async engine (asyncpg) para los endpoints de lectura más concurridos.
+# Scripts y seeds siguen usando el engine síncrono de arriba.
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL),
+    **pool_options(is_async=True)
+)
+
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Réplica de lectura opcional (READ_DATABASE_URL). Sin réplica, las lecturas van al primario.
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(settings.READ_DATABASE_URL, **pool_options())
+    async_read_engine = create_async_engine(
+        to_async_url(settings.READ_DATABASE_URL),
+        **pool_options(is_async=True)
+    )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+# Instrumentación SQL por request (ver app/core/sql_instrumentation.py)
+for _engine in (engine, read_engine):
+    instrument_engine(_engine)
+for _engine in (async_engine, async_read_engine):
+    instrument_engine(_engine.sync_engine)
+
+# Métricas del pool (GET /api/admin/metrics/db-pool)
+register_pool("primary", engine)
+register_pool("async_primary", async_engine.sync_engine)
+if settings.READ_DATABASE_URL:
+    register_pool("replica", read_engine)
+    register_pool("async_replica", async_read_engine.sync_engine)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base model
 Base = declarative_base()
 
@@ -26,3 +102,41 @@ def get_db():
         raise e
     finally:
         db.close()
+
+
+# Dependency to get async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+
+# Dependency for read-only endpoints: replica unless the user wrote recently
+# (without a replica there is nothing to route, so the sticky check is skipped)
+def get_read_db(request: Request):
+    primary = read_engine is engine or should_read_from_primary(request)
+    factory = SessionLocal if primary else ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+# Async dependency for read-only endpoints
+async def get_async_read_db(request: Request):
+    # The sticky check may hit Redis (blocking): off the event loop
+    primary = async_read_engine is async_engine or await asyncio.to_thread(should_read_from_primary, request)
+    factory = AsyncSessionLocal if primary else AsyncReadSessionLocal
+    async with factory() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            raise e
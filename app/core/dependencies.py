@@ -1,12 +1,15 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+import uuid
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
+from app.repositories.user_repository import AsyncUserRepository
 from app.services.auth_service import AuthService
 from app.models.user import User, UserRole
-from app.utils.security import CREDENTIALS_EXCEPTION
+from app.utils.security import CREDENTIALS_EXCEPTION, INACTIVE_USER_EXCEPTION
 
 # Security scheme
 security = HTTPBearer()
@@ -42,6 +45,61 @@ def get_current_active_user(
         )
     return current_user
 
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user without blocking the event loop"""
+    from app.utils.security import verify_token
+
+    try:
+        payload = verify_token(credentials.credentials, "access")
+        user_id = payload.get("user_id")
+        if not user_id:
+            raise CREDENTIALS_EXCEPTION
+        user = await AsyncUserRepository(db).get_by_id(uuid.UUID(user_id))
+    except HTTPException:
+        raise
+    except Exception:
+        raise CREDENTIALS_EXCEPTION
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado"
+        )
+    if not user.isActive:
+        raise INACTIVE_USER_EXCEPTION
+    return user
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    """Get current active user (async session)"""
+    if not current_user.isActive:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuario inactivo"
+        )
+    return current_user
+
+def get_token_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> uuid.UUID:
+    """
+    user_id del access token, sin consultar la base de datos. Solo para
+    endpoints de alto tráfico que no usan el usuario (sala de espera): el paso
+    siguiente (la compra) vuelve a validar usuario activo y rol.
+    """
+    from app.utils.security import verify_token
+
+    try:
+        return uuid.UUID(verify_token(credentials.credentials, "access")["user_id"])
+    except HTTPException:
+        raise
+    except Exception:
+        raise CREDENTIALS_EXCEPTION
+
 def require_role(allowed_roles: list[UserRole]):
     """Decorator to require specific user roles"""
     def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
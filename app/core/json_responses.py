@@ -0,0 +1,68 @@
+"""
+Serialización JSON de las respuestas.
+
+Camino por defecto de FastAPI para un endpoint con response_model: validar de
+nuevo lo que devuelve el servicio, convertirlo a dict "modo JSON" y volcarlo
+con json de la stdlib. Aquí:
+
+- ORJSONResponse es la response_class por defecto de la app (orjson vuelca el
+  dict bastante más rápido que json);
+- trusted_response() es la salida "de confianza" de los endpoints calientes: el
+  servicio ya construyó modelos Pydantic validados (o dicts con tipos JSON
+  nativos), así que se vuelcan a bytes una sola vez, sin revalidar ni pasar por
+  jsonable_encoder. TRUSTED_OUTPUT=False vuelve al camino de FastAPI.
+
+El response_model del decorador se mantiene para OpenAPI.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _is_validated(content: Any) -> bool:
+    if isinstance(content, BaseModel):
+        return True
+    return isinstance(content, (list, tuple)) and all(isinstance(item, BaseModel) for item in content)
+
+
+def dump_json(response_model: Any, content: Any) -> bytes:
+    """
+    Bytes JSON de content según response_model (alias incluidos, como FastAPI).
+    Solo valida si content aún no son modelos (dicts, filas ORM).
+    """
+    adapter = type_adapter(response_model)
+    if not (settings.TRUSTED_OUTPUT and _is_validated(content)):
+        content = adapter.validate_python(content, from_attributes=True)
+    return adapter.dump_json(content, by_alias=True)
+
+
+def trusted_response(
+    content: Any,
+    response_model: Any = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+):
+    """
+    Con response_model: content son modelos ya validados del servicio.
+    Sin response_model: dicts/listas con tipos JSON nativos (str, int, float,
+    bool, None) armados por el endpoint, que orjson vuelca directamente.
+    """
+    if not settings.TRUSTED_OUTPUT:
+        return content
+    if response_model is not None:
+        body = dump_json(response_model, content)
+    else:
+        body = orjson.dumps(content)
+    return Response(content=body, status_code=status_code, media_type=JSON_MEDIA_TYPE, headers=headers)
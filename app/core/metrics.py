@@ -0,0 +1,245 @@
+"""
+Métricas Prometheus de la API (expuestas en GET /metrics).
+
+- Por ruta (path plantilla, p. ej. /api/events/{event_id}, nunca la URL cruda):
+  histograma de latencia, contador por código de estado y tamaño de
+  request/response en bytes; más un gauge de requests en curso por método.
+- Contadores de negocio para los caminos calientes: preferencias de pago,
+  compras finalizadas, tickets emitidos, webhooks procesados y emails.
+- Estado de los pools de conexión (reutiliza app/core/pool_metrics.py).
+
+Con varios workers de uvicorn cada proceso expone sus propias series; Prometheus
+las distingue por instancia.
+"""
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.pool_metrics import CHECKOUT_WAIT_BUCKETS_MS, pool_snapshot
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# ============= HTTP =============
+
+HTTP_REQUEST_DURATION = Histogram(
+    "ticketify_http_request_duration_seconds",
+    "Latencia de los requests HTTP",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "ticketify_http_requests_total",
+    "Requests HTTP por código de estado",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "ticketify_http_requests_in_progress",
+    "Requests HTTP en curso",
+    ["method"],  # la ruta aún no está resuelta cuando el request entra
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "ticketify_http_request_size_bytes",
+    "Tamaño del cuerpo de los requests",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "ticketify_http_response_size_bytes",
+    "Tamaño del cuerpo de las respuestas",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+
+# ============= NEGOCIO =============
+
+PAYMENT_PREFERENCES_CREATED = Counter(
+    "ticketify_payment_preferences_created_total",
+    "Preferencias de pago creadas en MercadoPago",
+    ["kind"],  # event | marketplace
+)
+PURCHASES_FINALIZED = Counter(
+    "ticketify_purchases_finalized_total",
+    "Compras finalizadas tras un pago aprobado",
+    ["result"],  # success | failed | refund_pending
+)
+STOCK_HOLDS = Counter(
+    "ticketify_stock_holds_total",
+    "Reservas de stock de compras por resultado",
+    ["outcome"],  # held | sold_out | converted | released | expired | late_sale | late_sold_out
+)
+WAITING_ROOM = Counter(
+    "ticketify_waiting_room_total",
+    "Sala de espera de salidas a la venta por resultado",
+    ["outcome"],  # joined | admitted | not_admitted | consumed | released
+)
+STOCK_COUNTER_FLUSHES = Counter(
+    "ticketify_stock_counter_flushes_total",
+    "Volcados de los contadores de stock a la base",
+    ["result"],  # success | failed
+)
+STOCK_COUNTER_DRIFT = Counter(
+    "ticketify_stock_counter_drift_total",
+    "Tipos de ticket cuyo contador difería de la base (corregidos)",
+)
+TICKETS_ISSUED = Counter(
+    "ticketify_tickets_issued_total",
+    "Tickets emitidos",
+    ["source"],  # purchase | marketplace
+)
+WEBHOOK_NOTIFICATIONS = Counter(
+    "ticketify_webhook_notifications_total",
+    "Notificaciones de webhook de MercadoPago procesadas",
+    ["source", "outcome"],  # outcome: processed | ignored | error
+)
+EMAILS = Counter(
+    "ticketify_emails_total",
+    "Emails enviados por SMTP",
+    ["result"],  # sent | failed
+)
+
+# ============= CACHÉ DE RESPUESTAS =============
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "ticketify_response_cache_requests_total",
+    "Consultas a la caché de respuestas públicas",
+    ["scope", "result"],  # result: hit | miss
+)
+RESPONSE_CACHE_INVALIDATIONS = Counter(
+    "ticketify_response_cache_invalidations_total",
+    "Etiquetas invalidadas en la caché de respuestas",
+    ["tag"],  # event | events | categories
+)
+
+# ============= READ MODEL DEL CATÁLOGO =============
+
+CATALOG_EVENTS = Gauge(
+    "ticketify_catalog_events",
+    "Eventos publicados y próximos en el read model en memoria",
+)
+CATALOG_MEMORY_BYTES = Gauge(
+    "ticketify_catalog_memory_bytes",
+    "Memoria estimada del read model del catálogo (última recarga completa)",
+)
+CATALOG_QUERIES = Counter(
+    "ticketify_catalog_queries_total",
+    "Consultas al catálogo",
+    ["query", "source"],  # source: memory | database
+)
+
+# ============= FEED PERSONALIZADO =============
+
+FEED_REQUESTS = Counter(
+    "ticketify_feed_requests_total",
+    "Requests a /events/for-you según de dónde salió la lista",
+    ["source"],  # personalized | padded | featured
+)
+FEED_USERS_PRECOMPUTED = Counter(
+    "ticketify_feed_users_precomputed_total",
+    "Listas de candidatos calculadas por el job del feed",
+)
+
+
+# ============= POOL DE CONEXIONES =============
+
+class PoolCollector:
+    """Publica el snapshot de pool_metrics en cada scrape (sin duplicar contadores)"""
+
+    def collect(self):
+        checked_out = GaugeMetricFamily(
+            "ticketify_db_pool_checked_out", "Conexiones en uso", labels=["pool"])
+        overflow = GaugeMetricFamily(
+            "ticketify_db_pool_overflow_in_use", "Conexiones de overflow en uso", labels=["pool"])
+        size = GaugeMetricFamily(
+            "ticketify_db_pool_size", "Tamaño configurado del pool", labels=["pool"])
+        timeouts = CounterMetricFamily(
+            "ticketify_db_pool_checkout_timeouts", "Checkouts que agotaron pool_timeout", labels=["pool"])
+        invalidations = CounterMetricFamily(
+            "ticketify_db_pool_invalidations", "Conexiones invalidadas", labels=["pool"])
+        wait = HistogramMetricFamily(
+            "ticketify_db_pool_checkout_wait_seconds", "Espera por una conexión libre", labels=["pool"])
+
+        for name, snap in pool_snapshot().items():
+            checked_out.add_metric([name], snap["checkedOut"] or 0)
+            overflow.add_metric([name], snap["overflowInUse"] or 0)
+            size.add_metric([name], snap["poolSize"] or 0)
+            timeouts.add_metric([name], snap["checkoutTimeouts"])
+            invalidations.add_metric([name], snap["invalidations"])
+            buckets = [
+                (str(bound / 1000) if bound != "+Inf" else "+Inf", count)
+                for bound, count in zip(CHECKOUT_WAIT_BUCKETS_MS + ["+Inf"], snap["checkoutWaitMs"]["buckets"].values())
+            ]
+            wait.add_metric([name], buckets, snap["checkoutWaitMs"]["sum"] / 1000)
+
+        yield from (checked_out, overflow, size, timeouts, invalidations, wait)
+
+
+REGISTRY.register(PoolCollector())
+
+
+# ============= MIDDLEWARE =============
+
+def route_template(scope) -> str:
+    """Path plantilla de la ruta resuelta por el router (evita cardinalidad por IDs)"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return scope.get("root_path", "") + path
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI puro: a diferencia de BaseHTTPMiddleware puede contar los
+    bytes reales de respuestas en streaming (fotos, descargas).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_bytes, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_SIZE.labels(method, route).observe(request_bytes)
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(response_bytes)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,154 @@
+"""
+Métricas del pool de conexiones.
+
+Los engines se crean con TimedQueuePool / TimedAsyncQueuePool, que miden cuánto
+espera cada checkout por una conexión libre. Junto con los eventos del pool
+(checkout, checkin, invalidate) esto permite ver el agotamiento del pool en
+una venta masiva antes de que se convierta en errores 500.
+"""
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Límites superiores (ms) del histograma de espera por checkout
+CHECKOUT_WAIT_BUCKETS_MS: List[float] = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class PoolStats:
+    """Contadores acumulados de un pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.connects = 0
+        self.wait_bucket_counts = [0] * (len(CHECKOUT_WAIT_BUCKETS_MS) + 1)  # último = +Inf
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def observe_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            self.wait_sum_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            for i, bound in enumerate(CHECKOUT_WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.wait_bucket_counts[i] += 1
+                    break
+            else:
+                self.wait_bucket_counts[-1] += 1
+
+    def incr(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def histogram(self) -> Dict[str, int]:
+        """Histograma acumulado (estilo Prometheus: cada bucket incluye los anteriores)"""
+        result = {}
+        running = 0
+        with self._lock:
+            counts = list(self.wait_bucket_counts)
+        for bound, count in zip(CHECKOUT_WAIT_BUCKETS_MS + ["+Inf"], counts):
+            running += count
+            result[str(bound)] = running
+        return result
+
+
+_registry: Dict[str, "PoolStats"] = {}
+_engines: Dict[str, object] = {}
+
+
+class _TimedPoolMixin:
+    """Mide la espera de _do_get(), el punto donde el pool bloquea si está agotado"""
+
+    stats: PoolStats = PoolStats("unregistered")
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.observe_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.stats.observe_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: conservar los contadores acumulados
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def register_pool(name: str, sync_engine) -> None:
+    """Asocia estadísticas y listeners al pool de un Engine (para AsyncEngine usar .sync_engine)"""
+    pool = sync_engine.pool
+    stats = _registry.setdefault(name, PoolStats(name))
+    pool.stats = stats
+    already_registered = name in _engines
+    _engines[name] = sync_engine
+    if already_registered:
+        return
+
+    # Los listeners viajan con el pool cuando engine.dispose() lo recrea
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.incr("checkouts")
+
+    def on_connect(dbapi_connection, connection_record):
+        stats.incr("connects")
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.incr("invalidations")
+
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        stats.incr("soft_invalidations")
+
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "connect", on_connect)
+    event.listen(pool, "invalidate", on_invalidate)
+    event.listen(pool, "soft_invalidate", on_soft_invalidate)
+
+
+def pool_snapshot() -> Dict[str, dict]:
+    """Estado actual de cada pool registrado"""
+    snapshot = {}
+    for name, sync_engine in _engines.items():
+        pool = sync_engine.pool
+        stats = pool.stats
+        size = pool.size() if hasattr(pool, "size") else None
+        overflow = pool.overflow() if hasattr(pool, "overflow") else None
+        snapshot[name] = {
+            "poolSize": size,
+            "maxOverflow": getattr(pool, "_max_overflow", None),
+            "timeoutSeconds": pool.timeout() if hasattr(pool, "timeout") else None,
+            "checkedOut": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "checkedIn": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            # overflow() es negativo mientras el pool base no se ha llenado
+            "overflowInUse": max(overflow, 0) if overflow is not None else None,
+            "checkouts": stats.checkouts,
+            "checkoutTimeouts": stats.checkout_timeouts,
+            "connects": stats.connects,
+            "invalidations": stats.invalidations,
+            "softInvalidations": stats.soft_invalidations,
+            "checkoutWaitMs": {
+                "sum": round(stats.wait_sum_ms, 3),
+                "max": round(stats.wait_max_ms, 3),
+                "buckets": stats.histogram(),
+            },
+        }
+    return snapshot
@@ -0,0 +1,105 @@
+"""
+Enrutamiento de lecturas a la réplica con "read-your-writes".
+
+Después de que un usuario escribe (POST/PUT/PATCH/DELETE exitoso), sus lecturas
+se envían al primario durante READ_YOUR_WRITES_WINDOW_SECONDS para que, por
+ejemplo, el panel del organizador no muestre datos atrasados por el lag de la réplica.
+
+La marca tiene que verla el worker que atienda la lectura siguiente, que casi
+nunca es el que atendió la escritura: vive en Redis (ticketify:ryw:<user_id>
+con la ventana como TTL) cuando la caché de respuestas usa Redis. Con el
+backend en memoria la marca es del proceso y solo sirve con un único worker.
+Si Redis no responde la lectura va al primario, que siempre es válida. Sin
+réplica (READ_DATABASE_URL vacío) no se marca ni se consulta nada.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+
+from jose import JWTError, jwt
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ticketify:ryw:"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+_sticky_until: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def user_id_from_request(request: Request) -> Optional[str]:
+    """Extrae el user_id del Bearer token sin tocar la base de datos"""
+    auth = request.headers.get("authorization")
+    if not auth or not auth.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(auth[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("user_id")
+    return str(user_id) if user_id else None
+
+
+def _redis_client() -> Optional[redis.Redis]:
+    """Cliente de la caché de respuestas si usa Redis (importada acá: database depende de este módulo)"""
+    from app.core.response_cache import RedisBackend, response_cache
+
+    backend = response_cache.backend
+    return backend.client if isinstance(backend, RedisBackend) else None
+
+
+def mark_user_write(user_id: str) -> None:
+    """Fija las lecturas del usuario al primario durante la ventana configurada"""
+    client = _redis_client()
+    if client is not None:
+        try:
+            client.set(KEY_PREFIX + user_id, 1, px=int(settings.READ_YOUR_WRITES_WINDOW_SECONDS * 1000))
+            return
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Read-your-writes: no se pudo marcar al usuario en Redis ({e})")
+    deadline = time.monotonic() + settings.READ_YOUR_WRITES_WINDOW_SECONDS
+    with _lock:
+        _sticky_until[user_id] = deadline
+        # Limpieza oportunista para que el diccionario no crezca sin límite
+        if len(_sticky_until) > 10_000:
+            now = time.monotonic()
+            for key in [k for k, v in _sticky_until.items() if v <= now]:
+                del _sticky_until[key]
+
+
+def is_user_sticky(user_id: Optional[str]) -> bool:
+    if not user_id:
+        return False
+    client = _redis_client()
+    if client is not None:
+        try:
+            return bool(client.exists(KEY_PREFIX + user_id))
+        except redis.RedisError:
+            return True
+    with _lock:
+        deadline = _sticky_until.get(user_id)
+    return deadline is not None and deadline > time.monotonic()
+
+
+def should_read_from_primary(request: Request) -> bool:
+    return is_user_sticky(user_id_from_request(request))
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Marca al usuario como "sticky" al primario tras cada escritura exitosa"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if settings.READ_DATABASE_URL and request.method in WRITE_METHODS and response.status_code < 400:
+            user_id = user_id_from_request(request)
+            if user_id:
+                await asyncio.to_thread(mark_user_write, user_id)  # SET en Redis: fuera del event loop
+        return response
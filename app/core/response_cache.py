@@ -0,0 +1,371 @@
+"""
+Caché compartida de respuestas para los endpoints públicos del catálogo
+(/events/, /events/active, /events/featured, /events/{id}, /categories...).
+
+Se guarda el JSON ya serializado, así que un acierto no toca la base de datos
+ni vuelve a validar el response_model. La clave es la ruta + los parámetros ya
+parseados por FastAPI (ordenados, sin vacíos), no la query string cruda.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- "redis": compartido entre workers, usa REDIS_URL;
+- "memory": LRU por proceso (TTLCache), solo para un único worker (desarrollo):
+  la invalidación alcanza únicamente al worker que hizo la escritura y los
+  demás sirven lo viejo hasta RESPONSE_CACHE_TTL_SECONDS;
+- "auto": Redis si responde al arrancar, si no memoria. Con varios workers
+  hay que usar "redis".
+
+Invalidación por etiquetas: cada respuesta se guarda con las etiquetas de lo que
+contiene ("event:<id>" por cada evento, "events" para los listados,
+"categories"). Las escrituras llaman a invalidate_on_commit(db, ...) y las
+etiquetas se borran recién cuando la sesión hace commit, para que nadie vuelva
+a llenar la caché con datos previos a la transacción. Durante
+READ_YOUR_WRITES_WINDOW_SECONDS después de invalidar, las respuestas con esas
+etiquetas se sirven sin guardarse (X-Cache: BYPASS): las lecturas van a la
+réplica, que puede no tener aún la escritura. RESPONSE_CACHE_TTL_SECONDS acota
+el atraso en lo demás (eventos que dejan de estar activos).
+"""
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+from uuid import UUID
+
+import redis
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.json_responses import JSON_MEDIA_TYPE, dump_json
+from app.core.metrics import RESPONSE_CACHE_INVALIDATIONS, RESPONSE_CACHE_REQUESTS
+from app.core.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ticketify:rc:"
+EVENT_LISTS = "events"  # /events/, /events/active, /events/featured
+CATEGORIES = "categories"  # /categories (incluye eventCount)
+FEED_TAG_PREFIX = "feed:"  # feed:<user_id>, recalcula /events/for-you (app/services/event_feed.py)
+
+Tags = Union[Iterable[str], Callable[[Any], Iterable[str]]]
+
+
+def event_tag(event_id: Union[UUID, str]) -> str:
+    return f"event:{event_id}"
+
+
+def user_feed_tag(user_id: Union[UUID, str]) -> str:
+    return f"{FEED_TAG_PREFIX}{user_id}"
+
+
+def event_list_tags(events: Iterable[Any]) -> List[str]:
+    """Etiquetas de un listado: se invalida si cambia cualquiera de sus eventos"""
+    return [EVENT_LISTS] + [event_tag(e.id) for e in events]
+
+
+def cache_key(scope: str, params: Dict[str, Any]) -> str:
+    """"events:list?limit=20&skip=0": parámetros ordenados, sin None ni espacios sobrantes"""
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is not None:
+            parts.append(f"{name}={getattr(value, 'value', value)}")
+    return f"{scope}?{'&'.join(parts)}"
+
+
+# ============= BACKENDS =============
+
+# KEYS: cuerpo, n SETs de etiqueta, n marcas de invalidación reciente. ARGV: cuerpo, ttl, clave, n
+SET_SCRIPT = """
+local n = tonumber(ARGV[4])
+for i = 1, n do
+  if redis.call('EXISTS', KEYS[1 + n + i]) == 1 then return 0 end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+  redis.call('SADD', KEYS[1 + i], ARGV[3])
+  redis.call('EXPIRE', KEYS[1 + i], ARGV[2])
+end
+return 1
+"""
+
+
+class MemoryBackend:
+    """LRU por proceso: la invalidación solo alcanza al worker que hizo la escritura"""
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.tags: Dict[str, Set[str]] = {}
+        self.recent: Dict[str, float] = {}  # etiqueta -> hasta cuándo no se guarda (monotonic)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], ttl_seconds: int) -> bool:
+        tags = list(tags)
+        now = time.monotonic()
+        with self._lock:
+            if any(self.recent.get(tag, 0) > now for tag in tags):
+                return False
+        self.entries.set(key, body, ttl_seconds)
+        with self._lock:
+            for tag in tags:
+                keys = self.tags.setdefault(tag, set())
+                keys.add(key)
+                # Las claves desalojadas por la LRU no avisan: se podan al crecer
+                if len(keys) > self.entries.maxsize:
+                    self.tags[tag] = {k for k in keys if k in self.entries}
+        return True
+
+    def invalidate(self, tags: Iterable[str], hold_seconds: float = 0) -> None:
+        tags = list(tags)
+        now = time.monotonic()
+        with self._lock:
+            keys = set().union(*(self.tags.pop(tag, set()) for tag in tags))
+            if hold_seconds:
+                self.recent = {tag: until for tag, until in self.recent.items() if until > now}
+                self.recent.update((tag, now + hold_seconds) for tag in tags)
+        for key in keys:
+            self.entries.delete(key)
+
+
+class RedisBackend:
+    """
+    Cuerpos en ticketify:rc:<clave> y, por etiqueta, un SET con las claves que
+    la contienen (ticketify:rc:tag:<etiqueta>), con el mismo TTL. Al invalidar,
+    ticketify:rc:recent:<etiqueta> frena las escrituras con esa etiqueta.
+    """
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=settings.RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS,
+        )
+        self._set = self.client.register_script(SET_SCRIPT)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"{KEY_PREFIX}tag:{tag}"
+
+    @staticmethod
+    def _recent_key(tag: str) -> str:
+        return f"{KEY_PREFIX}recent:{tag}"
+
+    def ping(self) -> None:
+        self.client.ping()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(KEY_PREFIX + key)
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], ttl_seconds: int) -> bool:
+        tags = list(tags)
+        keys = [KEY_PREFIX + key] + [self._tag_key(tag) for tag in tags] + [self._recent_key(tag) for tag in tags]
+        return bool(self._set(keys=keys, args=[body, ttl_seconds, key, len(tags)]))
+
+    def invalidate(self, tags: Iterable[str], hold_seconds: float = 0) -> None:
+        tags = list(tags)
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return
+        pipe = self.client.pipeline(transaction=True)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        pipe.delete(*tag_keys)
+        if hold_seconds:
+            for tag in tags:
+                pipe.set(self._recent_key(tag), 1, px=int(hold_seconds * 1000))
+        members = pipe.execute()[:len(tag_keys)]
+        keys = {KEY_PREFIX + key.decode() for group in members for key in group}
+        if keys:
+            self.client.delete(*keys)
+
+
+# ============= CACHÉ =============
+
+def _json_response(body: bytes, cache_status: str) -> Response:
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"X-Cache": cache_status})
+
+
+class ResponseCache:
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._create_backend()
+        return self._backend
+
+    @staticmethod
+    def _create_backend():
+        kind = settings.RESPONSE_CACHE_BACKEND
+        memory = lambda: MemoryBackend(settings.RESPONSE_CACHE_MEMORY_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+        if kind == "memory":
+            return memory()
+        if kind not in ("redis", "auto"):
+            raise ValueError(f"RESPONSE_CACHE_BACKEND desconocido: {kind}")
+        backend = RedisBackend(settings.REDIS_URL)
+        if kind == "redis":
+            return backend
+        try:
+            backend.ping()
+            return backend
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Redis no disponible para la caché de respuestas ({e}); usando memoria local")
+            return memory()
+
+    # Un Redis caído degrada a "sin caché", nunca a un error 500
+
+    def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.backend.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Caché de respuestas: lectura fallida ({e})")
+            return None
+
+    def _set(self, key: str, body: bytes, tags: Iterable[str]) -> bool:
+        """False si no se guardó: alguna etiqueta se invalidó hace menos de la ventana de la réplica"""
+        try:
+            return self.backend.set(key, body, list(tags), settings.RESPONSE_CACHE_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Caché de respuestas: escritura fallida ({e})")
+            return False
+
+    def invalidate(self, *tags: str) -> None:
+        if not tags:
+            return
+        try:
+            # La réplica puede tardar en ver la escritura: lo que se lea de ella no se guarda por un rato
+            self.backend.invalidate(tags, settings.READ_YOUR_WRITES_WINDOW_SECONDS)
+        except redis.RedisError as e:
+            logger.error(f"❌ Caché de respuestas: invalidación fallida para {tags} ({e})")
+            return
+        for tag in tags:
+            RESPONSE_CACHE_INVALIDATIONS.labels(tag.split(":", 1)[0]).inc()
+
+    def clear(self) -> None:
+        """Solo para el backend en memoria (tests, scripts)"""
+        if isinstance(self.backend, MemoryBackend):
+            self.backend.invalidate(list(self.backend.tags))
+
+    def _lookup(self, scope: str, key: str) -> Optional[Response]:
+        body = self._get(key)
+        if body is None:
+            self.misses += 1
+            RESPONSE_CACHE_REQUESTS.labels(scope, "miss").inc()
+            return None
+        self.hits += 1
+        RESPONSE_CACHE_REQUESTS.labels(scope, "hit").inc()
+        return _json_response(body, "HIT")
+
+    def _store(self, key: str, response_model: Any, result: Any, tags: Tags) -> Response:
+        body = dump_json(response_model, result)
+        stored = self._set(key, body, tags(result) if callable(tags) else tags)
+        return _json_response(body, "MISS" if stored else "BYPASS")
+
+    async def serve(
+        self,
+        scope: str,
+        params: Dict[str, Any],
+        response_model: Any,
+        build: Callable[[], Any],
+        tags: Tags,
+    ):
+        """
+        Devuelve la respuesta cacheada o ejecuta build() (sync o async), la
+        serializa con response_model y la guarda con sus etiquetas. Las
+        excepciones de build() (404, 400...) se propagan sin cachear.
+        """
+        if not settings.RESPONSE_CACHE_ENABLED:
+            result = build()
+            return await result if inspect.isawaitable(result) else result
+
+        # redis-py bloquea (hasta el timeout del socket): en un hilo, fuera del event loop
+        offload = not isinstance(self.backend, MemoryBackend)
+        key = cache_key(scope, params)
+        cached = await asyncio.to_thread(self._lookup, scope, key) if offload else self._lookup(scope, key)
+        if cached is not None:
+            return cached
+        result = build()
+        if inspect.isawaitable(result):
+            result = await result
+        if offload:
+            return await asyncio.to_thread(self._store, key, response_model, result, tags)
+        return self._store(key, response_model, result, tags)
+
+    def serve_sync(
+        self,
+        scope: str,
+        params: Dict[str, Any],
+        response_model: Any,
+        build: Callable[[], Any],
+        tags: Tags,
+    ):
+        """Igual que serve() para endpoints síncronos (corren en el threadpool)"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return build()
+
+        key = cache_key(scope, params)
+        cached = self._lookup(scope, key)
+        if cached is not None:
+            return cached
+        return self._store(key, response_model, build(), tags)
+
+
+response_cache = ResponseCache()
+
+
+# ============= INVALIDACIÓN AL HACER COMMIT =============
+
+_PENDING_TAGS = "response_cache_pending_tags"
+
+
+def invalidate_on_commit(db: Session, *tags: str) -> None:
+    """Programa la invalidación para cuando la sesión confirme la transacción"""
+    db.info.setdefault(_PENDING_TAGS, set()).update(tags)
+
+
+def invalidate_event_on_commit(db: Session, event_id: Union[UUID, str], listing: bool = False) -> None:
+    """
+    Cambios del evento (datos, precios, stock): su detalle y los listados que lo
+    incluyen. listing=True cuando puede entrar o salir de los listados (alta,
+    baja, estado, fechas, categoría), lo que afecta a todos y a eventCount.
+    """
+    tags = [event_tag(event_id)]
+    if listing:
+        tags += [EVENT_LISTS, CATEGORIES]
+    invalidate_on_commit(db, *tags)
+
+
+_commit_listeners: List[Callable[[Set[str]], None]] = []
+
+
+def on_commit_invalidation(listener: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+    """Registra un listener que recibe las etiquetas confirmadas (p. ej. el read model del catálogo)"""
+    _commit_listeners.append(listener)
+    return listener
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_pending(session: Session) -> None:
+    tags = session.info.pop(_PENDING_TAGS, None)
+    if tags:
+        response_cache.invalidate(*tags)
+        for listener in _commit_listeners:
+            listener(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS, None)
@@ -0,0 +1,136 @@
+"""
+Instrumentación SQL por request (reemplaza echo=True).
+
+Cuenta las consultas de cada request, suma el tiempo en base de datos, guarda
+las sentencias más lentas y detecta patrones N+1 (la misma "forma" de sentencia
+repetida más de SQL_N_PLUS_ONE_THRESHOLD veces en un mismo request).
+El resultado sale como cabecera `Server-Timing` y como una línea de log JSON.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_LIST_RE = re.compile(r"\?(\s*,\s*\?)+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normaliza una sentencia: sin parámetros, literales numéricos ni listas IN variables"""
+    shape = _PARAM_RE.sub("?", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _LIST_RE.sub("?...", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+class RequestQueryStats:
+    """Acumulador de métricas SQL de un request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.shapes[statement_shape(statement)] += 1
+
+        self.slowest.append((duration_ms, statement))
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[settings.SQL_SLOWEST_STATEMENTS:]
+
+    def n_plus_one(self) -> List[Tuple[str, int]]:
+        threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    stats.record(statement, duration_ms)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Engancha los listeners a un Engine síncrono (para AsyncEngine usar .sync_engine)"""
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _server_timing(stats: RequestQueryStats) -> str:
+    return f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"'
+
+
+class SQLInstrumentationMiddleware(BaseHTTPMiddleware):
+    """Activa el acumulador por request (según la tasa de muestreo) y publica el resumen"""
+
+    async def dispatch(self, request: Request, call_next):
+        if not settings.SQL_INSTRUMENTATION_ENABLED or random.random() >= settings.SQL_INSTRUMENTATION_SAMPLE_RATE:
+            return await call_next(request)
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            _current_stats.reset(token)
+
+        if stats.count:
+            timing = _server_timing(stats)
+            existing = response.headers.get("server-timing")
+            response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+        suspects = stats.n_plus_one()
+        log_line = {
+            "event": "sql_request_summary",
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "query_count": stats.count,
+            "db_time_ms": round(stats.total_ms, 2),
+            "slowest": [
+                {"ms": round(ms, 2), "sql": statement_shape(sql)[:300]}
+                for ms, sql in stats.slowest
+                if ms >= settings.SQL_SLOW_QUERY_MS
+            ],
+            "n_plus_one": [{"count": n, "sql": shape[:300]} for shape, n in suspects],
+        }
+        if suspects:
+            logger.warning(json.dumps(log_line, ensure_ascii=False))
+        elif stats.count:
+            logger.info(json.dumps(log_line, ensure_ascii=False))
+
+        return response
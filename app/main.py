@@ -5,9 +5,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent   # .../Ticketify-Backend/app
 DOTENV_PATH = BASE_DIR / ".env"
 load_dotenv(DOTENV_PATH, override=True)
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
@@ -15,6 +17,13 @@ from pathlib import Path
 from app.core.config import settings
 from app.api import api_router
 from app.core.database import Base, engine
+from app.core.read_routing import ReadYourWritesMiddleware
+from app.core.sql_instrumentation import SQLInstrumentationMiddleware
+from app.core.metrics import PrometheusMiddleware, metrics_endpoint
+from app.services.catalog_read_model import catalog_read_model
+from app.services.event_feed import event_feed
+from app.services.inventory_service import hold_sweeper
+from app.services.stock_counters import stock_reconciler
 
 import mercadopago
 
@@ -23,13 +32,33 @@ sdk = mercadopago.SDK("APP_USR-4797791383667392-112319-b33761f3108e016aa8ea25a9e
 # Crear tablas si no existen
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Read model del catálogo: carga en segundo plano y se mantiene al día solo
+    catalog_read_model.start()
+    # Feed personalizado: precalcula los candidatos de cada usuario
+    event_feed.start()
+    # Libera las reservas de stock de checkouts vencidos
+    hold_sweeper.start()
+    # Vuelca los contadores de stock de Redis a ticket_types (si están activos)
+    stock_reconciler.start()
+    yield
+    hold_sweeper.stop()
+    stock_reconciler.stop()
+    event_feed.stop()
+    catalog_read_model.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Ticketify API",
     description="API para sistema de venta y reventa de tickets",
     version="1.0.0",
     docs_url="/docs" if settings.ENVIRONMENT == "development" else None,
-    redoc_url="/redoc" if settings.ENVIRONMENT == "development" else None
+    redoc_url="/redoc" if settings.ENVIRONMENT == "development" else None,
+    default_response_class=ORJSONResponse,  # orjson en lugar de json de la stdlib
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -43,6 +72,15 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Read-your-writes: tras una escritura, las lecturas del usuario van al primario
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Métricas SQL por request: cabecera Server-Timing, log estructurado y detector N+1
+app.add_middleware(SQLInstrumentationMiddleware)
+
+# Métricas Prometheus (latencia por ruta, códigos de estado, bytes); se expone en /metrics
+app.add_middleware(PrometheusMiddleware)
+
 # Mount static files for uploads
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
@@ -64,6 +102,9 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+# APIRoute (no add_route): deja scope["route"] y el scrape se cuenta como /metrics, no como <unmatched>
+app.get("/metrics", include_in_schema=False)(metrics_endpoint)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
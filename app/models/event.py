@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Integer, Text, ForeignKey, ARRAY, LargeBinary
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Float, Integer, Numeric, Text, ForeignKey, ARRAY, Computed, DDL, Index, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 import uuid
+from typing import Optional
 import enum
 from app.core.database import Base
 
@@ -17,6 +18,44 @@ class EventStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
 
 
+# =========================================================
+# 🔎 Búsqueda de texto completo
+# =========================================================
+# Configuración "spanish" + unaccent: "concierto" encuentra "Conciertos" y
+# "musica" encuentra "Música". Se crea en la migración event_search_vector
+# (y en create_all vía el listener de abajo).
+SEARCH_CONFIG = "spanish_unaccent"
+
+SEARCH_CONFIG_SQL = f"""
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}') THEN
+        CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+"""
+
+# Título pesa más que el recinto, y este más que la descripción (ts_rank)
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(venue, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'C')"
+)
+
+# Autocompletado: índices de trigramas (pg_trgm) sobre título y recinto. Sirven
+# tanto para ILIKE 'prefijo%' como para similitud con errores de tipeo.
+TRIGRAM_EXTENSION_SQL = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+
+
+def photo_version(photo_hash: str) -> str:
+    """Valor de ?v= en la URL de la foto: prefijo del hash del contenido"""
+    return photo_hash[:16]
+
+
 # =========================================================
 # 🧾 Modelo de Evento
 # =========================================================
@@ -34,14 +73,38 @@ class Event(Base):
     # Ubicación y capacidad
     venue = Column(String(200), nullable=False)
     totalCapacity = Column(Integer, nullable=False)
+    # Coordenadas del recinto (geocodificadas al crear/editar si no se envían)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
 
     # Estado
     status = Column(Enum(EventStatus), default=EventStatus.DRAFT, nullable=False)
 
+    # Sala de espera de la salida a la venta: compradores admitidos por segundo
+    # a la compra (app/services/waiting_room.py); NULL = sin sala
+    waiting_room_rate = Column(Integer, nullable=True)
+
     # Multimedia (HEAD)
    # multimedia = Column(ARRAY(String), nullable=True)
-    # Imagen binaria (MAIN)
-    photo = Column(LargeBinary, nullable=True)
+    # Foto en el blob store (app/utils/blob_store.py): aquí solo hash, tipo y tamaño
+    photo_hash = Column(String(64), nullable=True)
+    photo_mime = Column(String(50), nullable=True)
+    photo_size = Column(Integer, nullable=True)
+
+    # Columna generada para búsqueda (GIN); diferida para no viajar en cada SELECT
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    # Agregados de ticket_types desnormalizados: se recalculan al escribir
+    # (refresh_event_aggregates) para filtrar/ordenar por precio en SQL y
+    # listar eventos sin cargar sus ticket_types
+    min_price = Column(Numeric(10, 2), nullable=True)  # tipos activos
+    max_price = Column(Numeric(10, 2), nullable=True)
+    total_sold = Column(Integer, default=0, server_default="0", nullable=False)
+    available_tickets = Column(
+        Integer,
+        default=lambda ctx: ctx.get_current_parameters()["totalCapacity"],
+        nullable=False
+    )
     # Timestamps
     createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -63,6 +126,23 @@ class Event(Base):
     promotions = relationship("Promotion", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
     event_messages = relationship("EventMessage", back_populates="event", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_events_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_events_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_events_venue_trgm", "venue", postgresql_using="gin", postgresql_ops={"venue": "gin_trgm_ops"}),
+        # Listado/búsqueda por fecha con paginación por cursor: (startDate, id) tras filtrar por estado
+        Index("ix_events_status_start_id", "status", "startDate", "id"),
+        # Filtro de rango y orden por precio
+        Index("ix_events_status_min_price", "status", "min_price", "startDate", "id"),
+        # Órdenes "más vendidos" y "más recientes" (keyset descendente)
+        Index("ix_events_status_total_sold_id", "status", "total_sold", "id"),
+        Index("ix_events_status_created_id", "status", "createdAt", "id"),
+        # Eventos vigentes de un organizador
+        Index("ix_events_organizer_start", "organizer_id", "startDate"),
+        # Búsqueda por radio (near=): caja de latitud/longitud tras filtrar por estado
+        Index("ix_events_status_lat_lon", "status", "latitude", "longitude"),
+    )
+
     # =========================================================
     # 🔹 Métodos utilitarios
     # =========================================================
@@ -90,67 +170,70 @@ class Event(Base):
     # =========================================================
     # 🔹 Propiedades Calculadas
     # =========================================================
-    @property
-    def available_tickets(self):
-        """Entradas disponibles totales"""
-        if not self.ticket_types:
-            return self.totalCapacity
-        sold_tickets = sum(tt.sold_quantity or 0 for tt in self.ticket_types)
-        return max(self.totalCapacity - sold_tickets, 0)
-
     @property
     def is_sold_out(self):
         """¿El evento está agotado?"""
-        return self.available_tickets <= 0
-
-    @property
-    def min_price(self):
-        if not self.ticket_types:
+        return (self.available_tickets or 0) <= 0
+    
+    def photo_url_for(self, size: str = None):
+        """Path relativo de la foto (o de una variante), versionado por hash para cachearla como inmutable"""
+        if not self.photo_hash:
             return None
-        return min((float(tt.price) for tt in self.ticket_types if tt.is_active), default=None)
+        path = f"/api/events/{self.id}/photo?v={photo_version(self.photo_hash)}"
+        return f"{path}&size={size}" if size else path
 
     @property
-    def max_price(self):
-        if not self.ticket_types:
-            return None
-        return max((float(tt.price) for tt in self.ticket_types if tt.is_active), default=None)
-    
+    def photo_path(self):
+        """Variante "card": la que usan los listados"""
+        return self.photo_url_for("card")
+
     @property
     def photoUrl(self):
         """URL de la foto del evento para uso en schemas"""
         from app.core.config import settings
-        if self.photo:
-            return f"{settings.BACKEND_URL}/api/events/{self.id}/photo"
+        if self.photo_hash:
+            return f"{settings.BACKEND_URL}{self.photo_path}"
         return None
 
     # =========================================================
     # 🔹 Serialización
     # =========================================================
-    def to_dict(self):
-        """Convierte el evento en un diccionario serializable para la API"""
-        return {
+    def to_dict(self, photo_size: str = "card", include_ticket_types: bool = True, category_dict: Optional[dict] = None):
+        """
+        Convierte el evento en un diccionario serializable para la API.
+        include_ticket_types=False omite los tipos de entrada (precios y
+        disponibilidad igual salen de las columnas agregadas). category_dict
+        reemplaza a self.category.to_dict() (el read model del catálogo comparte
+        uno por categoría).
+        """
+        data = {
             "id": str(self.id),
             "title": self.title,
             "description": self.description,
             "startDate": self.startDate.isoformat() if self.startDate else None,
             "endDate": self.endDate.isoformat() if self.endDate else None,
             "venue": self.venue,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "totalCapacity": self.totalCapacity,
             "status": self.status.value if hasattr(self.status, "value") else self.status,
-            "photoUrl": f"/api/events/{self.id}/photo" if self.photo else None,
+            "photoUrl": self.photo_url_for(photo_size),
             #"multimedia": self.multimedia or [],
             "availableTickets": self.available_tickets,
             "isSoldOut": self.is_sold_out,
             "organizerId": str(self.organizer_id) if self.organizer_id else None,
             "categoryId": str(self.category_id) if self.category_id else None,
-            "category": self.category.to_dict() if hasattr(self.category, "to_dict") else None,
-            "minPrice": self.min_price,
-            "maxPrice": self.max_price,
+            "category": category_dict if category_dict is not None else (
+                self.category.to_dict() if hasattr(self.category, "to_dict") else None
+            ),
+            "minPrice": float(self.min_price) if self.min_price is not None else None,
+            "maxPrice": float(self.max_price) if self.max_price is not None else None,
             "createdAt": self.createdAt.isoformat() if self.createdAt else None,
             "updatedAt": self.updatedAt.isoformat() if self.updatedAt else None,
-
+        }
+        if include_ticket_types:
             # 🎟️ Incluye los tipos de ticket
-            "ticket_types": [
+            data["ticket_types"] = [
                 {
                     "id": str(tt.id),
                     "name": tt.name,
@@ -172,5 +255,17 @@ class Event(Base):
                     ),
                 }
                 for tt in self.ticket_types if tt is not None
-            ],
-        }
+            ]
+        return data
+
+
+event.listen(
+    Event.__table__,
+    "before_create",
+    DDL(SEARCH_CONFIG_SQL).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Event.__table__,
+    "before_create",
+    DDL(TRIGRAM_EXTENSION_SQL).execute_if(dialect="postgresql"),
+)
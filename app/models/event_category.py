@@ -3,6 +3,7 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import uuid
+from typing import Optional
 from app.core.database import Base
 
 class EventCategory(Base):
@@ -50,7 +51,8 @@ class EventCategory(Base):
         """Get number of events in this category"""
         return len(self.events)
     
-    def to_dict(self):
+    def to_dict(self, event_count: Optional[int] = None):
+        """event_count: conteo ya calculado (evita cargar self.events)"""
         return {
             "id": str(self.id),
             "name": self.name,
@@ -66,7 +68,7 @@ class EventCategory(Base):
             "level": self.level,
             "isActive": self.is_active,
             "isFeatured": self.is_featured,
-            "eventCount": self.event_count,
+            "eventCount": self.event_count if event_count is None else event_count,
             "createdAt": self.created_at.isoformat() if self.created_at else None,
             "updatedAt": self.updated_at.isoformat() if self.updated_at else None
         }
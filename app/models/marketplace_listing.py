@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Numeric, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Numeric, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -58,6 +58,12 @@ class MarketplaceListing(Base):
     buyer = relationship("User", foreign_keys=[buyer_id])
     ticket = relationship("Ticket", back_populates="marketplace_listing")
     event = relationship("Event", back_populates="marketplace_listings")
+
+    # Paginación por cursor de /marketplace/listings según el orden elegido
+    __table_args__ = (
+        Index("ix_marketplace_listings_status_price_id", "status", "price", "id"),
+        Index("ix_marketplace_listings_status_created_id", "status", "created_at", "id"),
+    )
     
     def __repr__(self):
         return f"<MarketplaceListing(title='{self.title}', price='{self.price}', status='{self.status}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Integer, Numeric, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Integer, Numeric, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -62,6 +62,12 @@ class Purchase(Base):
     purchase_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     payment_date = Column(DateTime(timezone=True), nullable=True)
     confirmation_date = Column(DateTime(timezone=True), nullable=True)
+    # Vencimiento de la reserva de stock mientras el checkout está abierto;
+    # NULL cuando no hay reserva activa (convertida en venta o liberada)
+    hold_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # Cómo terminó la reserva: converted | released | expired | refund_pending
+    # (pagada sin stock, requiere reembolso); NULL mientras está activa
+    hold_outcome = Column(String(20), nullable=True)
     
     # Additional information
     notes = Column(Text, nullable=True)
@@ -85,6 +91,16 @@ class Purchase(Base):
     promotion = relationship("Promotion", back_populates="purchases")
     tickets = relationship("Ticket", back_populates="purchase", cascade="all, delete-orphan")
     payment = relationship("Payment")
+
+    # Paginación por cursor de "mis compras": (user_id, created_at, id)
+    __table_args__ = (
+        Index("ix_purchases_user_created_id", "user_id", "created_at", "id"),
+        # Barrido de reservas vencidas: solo las filas con reserva activa
+        Index(
+            "ix_purchases_hold_expires_at", "hold_expires_at",
+            postgresql_where=hold_expires_at.isnot(None)
+        ),
+    )
     
     def __repr__(self):
         return f"<Purchase(id='{self.id}', status='{self.status}', total='{self.total_amount}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Numeric, ForeignKey, LargeBinary
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Numeric, ForeignKey, LargeBinary, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -21,7 +21,7 @@ class Ticket(Base):
     
     # Ticket details (según diagrama - SIMPLIFICADO)
     price = Column(Numeric(10, 2), nullable=False)
-    qrCode = Column(String, nullable=True)
+    qrCode = Column(String, nullable=True)  # contenido del QR; la imagen se genera en /tickets/{id}/qr.png
     purchaseDate = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     status = Column(Enum(TicketStatus), default=TicketStatus.ACTIVE, nullable=False)
     isValid = Column(Boolean, default=True, nullable=False)
@@ -47,23 +47,33 @@ class Ticket(Base):
     validations = relationship("Validation", back_populates="ticket")
     transfers = relationship("TicketTransfer", foreign_keys="TicketTransfer.ticket_id", back_populates="ticket")
     disputes = relationship("Dispute", back_populates="ticket")
+
+    # Paginación por cursor de "mis tickets": (user_id, purchaseDate, id)
+    __table_args__ = (
+        Index("ix_tickets_user_purchase_date_id", "user_id", "purchaseDate", "id"),
+    )
     
     def __repr__(self):
         return f"<Ticket(id='{self.id}', status='{self.status}')>"
     
     def generate_qr(self):
-        """Generate QR code image for ticket"""
-        from app.utils.qr_generator import generate_qr_image, generate_ticket_qr_data
+        """Genera el contenido del QR del ticket (la imagen se genera al pedirla)"""
+        from app.utils.qr_generator import generate_ticket_qr_data
         
-        # Generar el contenido del QR (JSON con info del ticket)
-        qr_data = generate_ticket_qr_data(
+        # Contenido del QR (JSON con info del ticket)
+        self.qrCode = generate_ticket_qr_data(
             ticket_id=str(self.id),
             event_id=str(self.event_id)
         )
-        
-        # Generar la imagen del QR en base64
-        self.qrCode = generate_qr_image(qr_data)
         return self.qrCode
+
+    def qr_url(self, fmt: str = "png"):
+        """URL absoluta de la imagen del QR, versionada por su contenido (cacheable como inmutable)"""
+        from app.core.config import settings
+        from app.utils.qr_generator import qr_version, ticket_qr_payload
+
+        payload = ticket_qr_payload(self.id, self.event_id, self.qrCode)
+        return f"{settings.BACKEND_URL}/api/tickets/{self.id}/qr.{fmt}?v={qr_version(payload, fmt)}"
     
     def invalidate_qr(self):
         """Invalidate QR code"""
@@ -82,6 +92,8 @@ class Ticket(Base):
             "id": str(self.id),
             "price": float(self.price) if self.price else None,
             "qrCode": self.qrCode,
+            "qrUrl": self.qr_url(),
+            "qrSvgUrl": self.qr_url("svg"),
             "purchaseDate": self.purchaseDate.isoformat() if self.purchaseDate else None,
             "status": self.status.value,
             "isValid": self.isValid,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Numeric, Text, ForeignKey
+from sqlalchemy import CheckConstraint, Column, String, Boolean, DateTime, Integer, Numeric, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -22,6 +22,8 @@ class TicketType(Base):
     # Availability
     quantity_available = Column(Integer, nullable=False)
     sold_quantity = Column(Integer, default=0, nullable=False)
+    # Reservado por checkouts abiertos (ver app/services/inventory_service.py)
+    held_quantity = Column(Integer, default=0, server_default="0", nullable=False)
     min_purchase = Column(Integer, default=1, nullable=False)
     max_purchase = Column(Integer, default=10, nullable=False)
     
@@ -46,14 +48,22 @@ class TicketType(Base):
     # Relationships
     event = relationship("Event", back_populates="ticket_types")
     tickets = relationship("Ticket", back_populates="ticket_type")
+
+    # Nunca se vende ni se reserva más de lo que hay
+    __table_args__ = (
+        CheckConstraint(
+            "held_quantity >= 0 AND sold_quantity + held_quantity <= quantity_available",
+            name="ck_ticket_types_stock"
+        ),
+    )
     
     def __repr__(self):
         return f"<TicketType(name='{self.name}', price='{self.price}')>"
     
     @property
     def remaining_quantity(self):
-        """Calculate remaining tickets"""
-        return max(0, self.quantity_available - self.sold_quantity)
+        """Calculate remaining tickets (sin contar las reservas de checkouts abiertos)"""
+        return max(0, self.quantity_available - self.sold_quantity - (self.held_quantity or 0))
     
     @property
     def is_sold_out(self):
@@ -93,6 +103,7 @@ class TicketType(Base):
             "originalPrice": float(self.original_price) if self.original_price else None,
             "quantityAvailable": self.quantity_available,
             "soldQuantity": self.sold_quantity,
+            "heldQuantity": self.held_quantity,
             "remainingQuantity": self.remaining_quantity,
             "minPurchase": self.min_purchase,
             "maxPurchase": self.max_purchase,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Table, ForeignKey, LargeBinary, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Table, ForeignKey, LargeBinary, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -99,6 +99,11 @@ class User(Base):
     category_preferences = relationship("UserCategoryPreference", back_populates="user", cascade="all, delete-orphan")
     sent_messages = relationship("EventMessage", back_populates="organizer")
 
+    # Paginación por cursor del listado de usuarios (admin): (createdAt, id)
+    __table_args__ = (
+        Index("ix_users_created_id", "createdAt", "id"),
+    )
+
     def __repr__(self):
         return f"<User(email='{self.email}')>"
     
@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func, select
 from typing import List, Optional
 from uuid import UUID
 
+from app.models.event import Event
 from app.models.event_category import EventCategory
 
 
@@ -20,6 +22,20 @@ class EventCategoryRepository:
         
         return query.order_by(EventCategory.sort_order.asc()).all()
     
+    def get_list_version(self, active_only: bool = True) -> tuple:
+        """
+        (último updated_at y nº de categorías, último updatedAt y nº de eventos):
+        todo lo que cambia el listado, incluido eventCount, en una sola consulta
+        de agregados sin GROUP BY. Un evento que entra, sale o cambia de
+        categoría mueve el max(updatedAt) o el conteo de eventos.
+        """
+        categories = select(func.max(EventCategory.updated_at), func.count(EventCategory.id))
+        if active_only:
+            categories = categories.where(EventCategory.is_active == True)
+        categories = categories.subquery()
+        events = select(func.max(Event.updatedAt), func.count(Event.id)).subquery()
+        return tuple(self.db.execute(select(categories, events)).one())
+
     def get_featured_categories(self) -> List[EventCategory]:
         """Get featured categories"""
         return self.db.query(EventCategory).filter(
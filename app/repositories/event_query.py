@@ -0,0 +1,269 @@
+# app/repositories/event_query.py
+"""
+EventQuery: filtros y orden de cualquier listado de eventos, compilados a un
+único SELECT (nada se filtra en Python después de paginar, así que las
+páginas nunca vuelven cortas).
+
+    EventQuery(sort="popularity").with_status().not_ended().in_categories(ids)
+
+Lo usan todos los listados: /events, /events/active, /events/search,
+/events/featured y /events/by-organizer, en el repositorio síncrono y en el
+async. Cada orden tiene su índice:
+
+    date        (status, startDate, id)          ix_events_status_start_id
+    price_*     (status, min_price, startDate)   ix_events_status_min_price
+    popularity  (status, total_sold, id)         ix_events_status_total_sold_id
+    newest      (status, createdAt, id)          ix_events_status_created_id
+    organizador (organizer_id, startDate)        ix_events_organizer_start
+    near=       (status, latitude, longitude)    ix_events_status_lat_lon
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status as http_status
+from sqlalchemy import and_, exists, func, literal_column, select
+
+from app.models.event import Event, EventStatus, SEARCH_CONFIG
+from app.models.ticket_type import TicketType
+from app.utils.counts import count_cache_key
+from app.utils.geo import EARTH_RADIUS_KM, bounding_box
+from app.utils.pagination import Keyset
+
+EVENT_SORTS = ("date", "relevance", "price_asc", "price_desc", "popularity", "newest", "distance")
+
+# Órdenes con paginación por cursor (la última columna es única)
+EVENT_KEYSETS = {
+    "date": Keyset("date", [Event.startDate, Event.id]),
+    "newest": Keyset("newest", [Event.createdAt, Event.id], descending=True),
+    "popularity": Keyset("popularity", [Event.total_sold, Event.id], descending=True),
+}
+
+
+def search_tsquery(query: str):
+    """websearch_to_tsquery acepta la sintaxis de un buscador: "frase exacta", -excluir, OR"""
+    # regconfig como literal: con asyncpg un parámetro llegaría tipado como varchar
+    return func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query)
+
+
+def distance_km(lat: float, lon: float):
+    """Distancia haversine en SQL desde (lat, lon) hasta el recinto del evento"""
+    dlat = func.radians(Event.latitude - lat)
+    dlon = func.radians(Event.longitude - lon)
+    a = (
+        func.power(func.sin(dlat / 2), 2)
+        + func.cos(func.radians(lat)) * func.cos(func.radians(Event.latitude)) * func.power(func.sin(dlon / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+
+
+def keyset_for(query: Optional[str], sort: str) -> Optional[Keyset]:
+    """Relevancia sin texto es orden por fecha; relevancia y precio se paginan con page"""
+    if sort == "relevance" and not query:
+        sort = "date"
+    return EVENT_KEYSETS.get(sort)
+
+
+def supports_cursor(query: Optional[str] = None, sort: str = "date") -> bool:
+    return keyset_for(query, sort) is not None
+
+
+def escape_like(value: str) -> str:
+    """Escapa los comodines de LIKE para buscar el texto tal cual"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class EventQuery:
+    """
+    Constructor encadenable. Cada filtro añade una condición SQL y queda
+    registrado (normalizado) para la clave de la caché de conteos.
+    """
+
+    def __init__(self, sort: str = "date"):
+        if sort not in EVENT_SORTS:
+            raise ValueError(f"Orden de eventos desconocido: {sort}")
+        self.sort = sort
+        self.text: Optional[str] = None
+        self.origin: Optional[Tuple[float, float]] = None
+        self.conditions: list = []
+        self.filters: Dict[str, Any] = {}
+        self._after: Optional[list] = None
+
+    def _add(self, condition, **filters) -> "EventQuery":
+        self.conditions.append(condition)
+        self.filters.update(filters)
+        return self
+
+    # ============= FILTROS =============
+
+    def with_status(self, status: Optional[EventStatus] = None) -> "EventQuery":
+        """Por defecto solo publicados"""
+        status = status or EventStatus.PUBLISHED
+        return self._add(Event.status == status, status=status)
+
+    def excluding_status(self, status: EventStatus) -> "EventQuery":
+        return self._add(Event.status != status, excluding_status=status)
+
+    def upcoming(self, now: Optional[datetime] = None) -> "EventQuery":
+        """Aún no empezaron (startDate >= ahora)"""
+        return self._add(Event.startDate >= (now or datetime.utcnow()), upcoming=True)
+
+    def not_ended(self, now: Optional[datetime] = None) -> "EventQuery":
+        """Próximos o en curso (endDate > ahora)"""
+        return self._add(Event.endDate > (now or datetime.utcnow()), not_ended=True)
+
+    def starting_from(self, start_date: Optional[datetime]) -> "EventQuery":
+        if start_date is None:
+            return self
+        return self._add(Event.startDate >= start_date, start_date=start_date)
+
+    def ending_by(self, end_date: Optional[datetime]) -> "EventQuery":
+        """Terminan a más tardar el día end_date (inclusive)"""
+        if end_date is None:
+            return self
+        end_of_day = end_date.replace(hour=23, minute=59, second=59)
+        return self._add(Event.endDate <= end_of_day, end_date=end_of_day)
+
+    def matching(self, query: Optional[str]) -> "EventQuery":
+        """Texto completo sobre título, recinto y descripción (índice GIN ix_events_search_vector)"""
+        if not query:
+            return self
+        self.text = query
+        return self._add(Event.search_vector.op("@@")(search_tsquery(query)), query=query)
+
+    def in_categories(self, category_ids: Optional[List[UUID]]) -> "EventQuery":
+        if not category_ids:
+            return self
+        return self._add(Event.category_id.in_(category_ids), category_ids=category_ids)
+
+    def price_between(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> "EventQuery":
+        """
+        Algún tipo activo con precio dentro de [min_price, max_price]. Con una
+        sola cota alcanza con las columnas agregadas; con las dos, el
+        solapamiento de rangos solo preselecciona (un evento de 10 y 100 no
+        entra en 40-60) y decide el EXISTS sobre ticket_types.
+        """
+        if min_price is not None:
+            self._add(Event.max_price >= min_price, min_price=min_price)
+        if max_price is not None:
+            self._add(Event.min_price <= max_price, max_price=max_price)
+        if min_price is not None and max_price is not None:
+            self._add(exists().where(
+                TicketType.event_id == Event.id,
+                TicketType.is_active.is_(True),
+                TicketType.price.between(min_price, max_price),
+            ))
+        return self
+
+    def at_venue(self, text: Optional[str], name: str = "venue") -> "EventQuery":
+        if not text:
+            return self
+        return self._add(Event.venue.ilike(f"%{escape_like(text)}%", escape="\\"), **{name: text})
+
+    def near(self, origin: Optional[Tuple[float, float]], radius_km: float) -> "EventQuery":
+        """
+        Recintos a radius_km o menos de origin (lat, lon): la caja de
+        latitud/longitud usa el índice y haversine descarta las esquinas
+        """
+        if origin is None:
+            return self
+        lat, lon = origin
+        self.origin = origin
+        box = bounding_box(lat, lon, radius_km)
+        self._add(Event.latitude.between(box.min_lat, box.max_lat), near=f"{lat},{lon}", radius_km=radius_km)
+        if box.min_lon is not None:
+            self._add(Event.longitude.between(box.min_lon, box.max_lon))
+        return self._add(distance_km(lat, lon) <= radius_km)
+
+    def with_ids(self, event_ids: List[UUID]) -> "EventQuery":
+        return self._add(Event.id.in_(event_ids), event_ids=event_ids)
+
+    def by_organizer(self, organizer_id: UUID) -> "EventQuery":
+        return self._add(Event.organizer_id == organizer_id, organizer_id=organizer_id)
+
+    def after(self, cursor: Optional[str]) -> "EventQuery":
+        """Continúa desde un next_cursor (solo órdenes con keyset)"""
+        if not cursor:
+            return self
+        keyset = self.keyset
+        if keyset is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail="La paginación por cursor solo está disponible con sort=date, newest o popularity; usa page"
+            )
+        self._after = keyset.decode(cursor)
+        return self
+
+    @classmethod
+    def search(
+        cls,
+        query: Optional[str] = None,
+        category_ids: Optional[List[UUID]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        location: Optional[str] = None,
+        venue: Optional[str] = None,
+        status: Optional[EventStatus] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        sort: str = "date"
+    ) -> "EventQuery":
+        """Filtros de /events/search: solo eventos que no han empezado"""
+        return (
+            cls(sort)
+            .with_status(status)
+            .upcoming()
+            .matching(query)
+            .in_categories(category_ids)
+            .at_venue(location, name="location")
+            .at_venue(venue)
+            .starting_from(start_date)
+            .ending_by(end_date)
+            .price_between(min_price, max_price)
+            .near(near, radius_km)
+        )
+
+    # ============= COMPILACIÓN =============
+
+    @property
+    def keyset(self) -> Optional[Keyset]:
+        return keyset_for(self.text, self.sort)
+
+    def where(self) -> list:
+        conditions = list(self.conditions)
+        if self._after is not None:
+            conditions.append(self.keyset.after(self._after))
+        return conditions
+
+    def order_by(self) -> list:
+        """Orden total (id como desempate) para que las páginas sean estables"""
+        if self.keyset is not None:
+            return self.keyset.order_by()
+        if self.sort == "distance":
+            if self.origin is None:
+                raise ValueError("sort=distance requiere near()")
+            return [distance_km(*self.origin).asc(), Event.startDate.asc(), Event.id.asc()]
+        if self.sort == "relevance":
+            return [func.ts_rank(Event.search_vector, search_tsquery(self.text)).desc(), Event.startDate.asc(), Event.id.asc()]
+        if self.sort == "price_asc":
+            return [Event.min_price.asc().nulls_last(), Event.startDate.asc(), Event.id.asc()]
+        return [Event.min_price.desc().nulls_last(), Event.startDate.asc(), Event.id.asc()]
+
+    def statement(self, *options):
+        """SELECT de la página (sin offset/limit) con las opciones de carga dadas"""
+        return select(Event).options(*options).where(and_(*self.where())).order_by(*self.order_by())
+
+    def ids(self):
+        """SELECT de solo ids para contar (sin joins, orden ni cursor)"""
+        return select(Event.id).where(and_(*self.conditions))
+
+    def count_key(self) -> tuple:
+        return count_cache_key("events", **self.filters)
+
+    def paginate(self, events: List[Event], page_size: int) -> Tuple[List[Event], Optional[str]]:
+        """Recibe hasta page_size + 1 filas; next_cursor solo si el orden tiene keyset"""
+        if self.keyset is None:
+            return events[:page_size], None
+        return self.keyset.paginate(events, page_size)
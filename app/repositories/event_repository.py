@@ -1,15 +1,84 @@
 # app/repositories/event_repository.py
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import String, and_, case, func, literal, or_, select, update
 from typing import Optional, List, Tuple
 from uuid import UUID
 from datetime import datetime
 
+from app.core.response_cache import invalidate_event_on_commit
 from app.models.event import Event, EventStatus
 from app.models.event_category import EventCategory
 from app.models.ticket_type import TicketType
+from app.repositories.event_query import EventQuery, escape_like, search_tsquery
 from app.schemas.event import EventCreate, EventUpdate
+from app.utils.counts import CountResult, count_rows, count_rows_async
+from app.utils.geocoding import get_geocoder
+
+# Campos que deciden si (y dónde) un evento aparece en los listados públicos
+LISTING_FIELDS = {"status", "startDate", "endDate", "category_id"}
+
+
+def list_load_options() -> tuple:
+    """
+    Relaciones de los listados y la búsqueda: todos devuelven ticket_types,
+    una consulta extra por página (selectinload)
+    """
+    return joinedload(Event.organizer), joinedload(Event.category), selectinload(Event.ticket_types)
+
+
+def geocode_event(event: Event, update_data: Optional[dict] = None) -> None:
+    """
+    Completa latitude/longitude desde el recinto: al crear si no vinieron en el
+    payload, al editar si cambió el venue sin coordenadas nuevas. Un lugar no
+    reconocido deja el evento sin coordenadas (no aparece en búsquedas near=).
+    """
+    if update_data is None:
+        if event.latitude is not None and event.longitude is not None:
+            return
+    elif "venue" not in update_data or {"latitude", "longitude"} & update_data.keys():
+        return
+    event.latitude, event.longitude = get_geocoder().geocode(event.venue) or (None, None)
+
+
+def refresh_event_aggregates(db: Session, event_id: UUID) -> None:
+    """
+    Recalcula min_price/max_price (tipos activos), total_sold y available_tickets
+    del evento desde sus ticket_types, en un único UPDATE. available_tickets
+    descuenta lo vendido y lo reservado, igual que remaining_quantity de los
+    tipos. No hace commit: queda en la transacción del llamador (crear/editar
+    tipos, finalizar una compra, el recálculo en lote de HoldSweeper).
+
+    Primero bloquea la fila del evento y recién después suma, en otra
+    sentencia: en READ COMMITTED un UPDATE que espera el lock se reaplica con
+    la foto de cuando empezó y perdería lo que confirmó quien lo tenía.
+    """
+    db.execute(select(Event.id).where(Event.id == event_id).with_for_update())
+    active = and_(TicketType.event_id == Event.id, TicketType.is_active == True)
+    sold = (
+        select(func.coalesce(func.sum(TicketType.sold_quantity), 0))
+        .where(TicketType.event_id == Event.id)
+        .scalar_subquery()
+    )
+    held = (
+        select(func.coalesce(func.sum(TicketType.held_quantity), 0))
+        .where(TicketType.event_id == Event.id)
+        .scalar_subquery()
+    )
+    remaining = Event.totalCapacity - sold - held
+    db.execute(
+        update(Event)
+        .where(Event.id == event_id)
+        .values(
+            min_price=select(func.min(TicketType.price)).where(active).scalar_subquery(),
+            max_price=select(func.max(TicketType.price)).where(active).scalar_subquery(),
+            total_sold=sold,
+            available_tickets=case((remaining > 0, remaining), else_=0)
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+    invalidate_event_on_commit(db, event_id)
 
 
 class EventRepository:
@@ -27,7 +96,10 @@ class EventRepository:
             organizer_id=organizer_id,
             status=EventStatus.DRAFT
         )
+        geocode_event(db_event)
         self.db.add(db_event)
+        self.db.flush()
+        invalidate_event_on_commit(self.db, db_event.id, listing=True)
         self.db.commit()
         self.db.refresh(db_event)
         return db_event
@@ -65,9 +137,12 @@ class EventRepository:
         for field, value in update_data.items():
             if hasattr(event, field):
                 setattr(event, field, value)
-        
+        geocode_event(event, update_data)
 
         event.updatedAt = func.now()
+        if "totalCapacity" in update_data:
+            refresh_event_aggregates(self.db, event_id)
+        invalidate_event_on_commit(self.db, event_id, listing=bool(LISTING_FIELDS & update_data.keys()))
         self.db.commit()
         self.db.refresh(event)
         return event
@@ -81,44 +156,29 @@ class EventRepository:
             raise ValueError("Event not found")
 
         self.db.delete(event)
+        invalidate_event_on_commit(self.db, event_id, listing=True)
         self.db.commit()
         return True
 
     # =========================================================
-    # 🔹 Listar eventos (paginado)
+    # 🔹 Listados (filtros y orden en SQL vía EventQuery)
     # =========================================================
-    def get_all(self, skip: int = 0, limit: int = 20, status: Optional[EventStatus] = None) -> List[Event]:
-        query = (
-            self.db.query(Event)
-            .options(
-                joinedload(Event.organizer),
-                joinedload(Event.category),
-                joinedload(Event.ticket_types)
-            )
-        )
-
-        if status:
-            query = query.filter(Event.status == status)
-        else:
-            query = query.filter(Event.status == EventStatus.PUBLISHED)
-        
-        # Solo mostrar eventos que NO han vencido
-        query = query.filter(Event.startDate >= datetime.utcnow())
+    def _list(self, event_query: EventQuery, skip: int = 0, limit: Optional[int] = None) -> List[Event]:
+        stmt = event_query.statement(*list_load_options()).offset(skip).limit(limit)
+        return list(self.db.execute(stmt).unique().scalars().all())
 
-        return (
-            query.order_by(Event.startDate.asc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+    def get_all(self, skip: int = 0, limit: int = 20, status: Optional[EventStatus] = None) -> List[Event]:
+        """Publicados (o del estado dado) que aún no empiezan"""
+        return self._list(EventQuery().with_status(status).upcoming(), skip, limit)
 
-    def get_events_by_organizer_id(self, organizer_id: UUID):
-        return (
-            self.db.query(Event)
-            .filter(Event.organizer_id == organizer_id)
-            .all()
-        )
+    def get_active(self, skip: int = 0, limit: int = 20, status: Optional[EventStatus] = None) -> List[Event]:
+        """Publicados (o del estado dado) que no han terminado: próximos y en curso"""
+        return self._list(EventQuery().with_status(status).not_ended(), skip, limit)
 
+    def get_vigentes_by_organizer(self, organizer_id: UUID) -> List[Event]:
+        """No cancelados y sin terminar (índice ix_events_organizer_start)"""
+        event_query = EventQuery().by_organizer(organizer_id).excluding_status(EventStatus.CANCELLED).not_ended()
+        return self._list(event_query)
 
     # =========================================================
     # 🔹 Búsqueda avanzada (filtros, precio, fechas, etc.)
@@ -135,76 +195,56 @@ class EventRepository:
         end_date: Optional[datetime] = None,
         location: Optional[str] = None,
         venue: Optional[str] = None,
-        status: Optional[EventStatus] = None
-    ) -> Tuple[List[Event], int]:
-        # Solo mostrar eventos que NO han vencido (startDate >= now)
-        filters = [
-            Event.status == (status or EventStatus.PUBLISHED),
-            Event.startDate >= datetime.utcnow()  # Filtrar eventos vencidos
-        ]
-
-        if query:
-            filters.append(or_(
-                Event.title.ilike(f"%{query}%"),
-                Event.description.ilike(f"%{query}%")
-            ))
-        if category_ids:
-            filters.append(Event.category_id.in_(category_ids))
-        if location:
-            filters.append(Event.venue.ilike(f"%{location}%"))
-        if venue:
-            filters.append(Event.venue.ilike(f"%{venue}%"))
-        if start_date:
-            filters.append(Event.startDate >= start_date)
-        if end_date:
-            filters.append(Event.endDate <= end_date.replace(hour=23, minute=59, second=59))
-
-        events_query = (
-            self.db.query(Event)
-            .options(
-                joinedload(Event.organizer),
-                joinedload(Event.category),
-                joinedload(Event.ticket_types)
-            )
-            .filter(and_(*filters))
-        )
+        status: Optional[EventStatus] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        sort: str = "date",
+        cursor: Optional[str] = None,
+        count_mode: str = "auto"
+    ) -> Tuple[List[Event], Optional[CountResult], Optional[str]]:
+        """
+        Devuelve (eventos, total, next_cursor). El total es un CountResult
+        (exacto o estimado según count_mode); con cursor (órdenes con keyset)
+        no se cuenta: total es None.
+        """
+        event_query = EventQuery.search(
+            query=query,
+            category_ids=category_ids,
+            min_price=min_price,
+            max_price=max_price,
+            start_date=start_date,
+            end_date=end_date,
+            location=location,
+            venue=venue,
+            status=status,
+            near=near,
+            radius_km=radius_km,
+            sort=sort
+        ).after(cursor)
+
+        if cursor:
+            total, offset = None, 0
+        else:
+            # COUNT sobre solo ids: sin los joinedload de la página
+            total = count_rows(self.db, event_query.ids(), event_query.count_key(), count_mode)
+            offset = (page - 1) * page_size
 
-        # Filtrar por rango de precios
-        if min_price is not None or max_price is not None:
-            ticket_sub = self.db.query(TicketType.event_id).distinct()
-            if min_price is not None:
-                ticket_sub = ticket_sub.filter(TicketType.price >= min_price)
-            if max_price is not None:
-                ticket_sub = ticket_sub.filter(TicketType.price <= max_price)
-            events_query = events_query.filter(Event.id.in_(ticket_sub))
-
-        total = events_query.count()
-        events = (
-            events_query
-            .order_by(Event.startDate.asc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-            .all()
-        )
-        return events, total
+        events = self._list(event_query, offset, page_size + 1)
+        events, next_cursor = event_query.paginate(events, page_size)
+        return events, total, next_cursor
 
     # =========================================================
     # 🔹 Búsqueda simple (para autocomplete o API ligera)
     # =========================================================
     def search_events(self, search_term: str, skip: int = 0, limit: int = 10) -> Tuple[List[Event], int]:
-        pattern = f"%{search_term}%"
         query = self.db.query(Event).filter(
             and_(
                 Event.status == EventStatus.PUBLISHED,
-                or_(
-                    Event.title.ilike(pattern),
-                    Event.description.ilike(pattern),
-                    Event.venue.ilike(pattern)
-                )
+                Event.search_vector.op("@@")(search_tsquery(search_term))
             )
         )
         total = query.count()
-        events = query.order_by(Event.startDate.asc()).offset(skip).limit(limit).all()
+        events = query.order_by(*EventQuery("relevance").matching(search_term).order_by()).offset(skip).limit(limit).all()
         return events, total
 
     # =========================================================
@@ -231,6 +271,7 @@ class EventRepository:
         if not event:
             return None
         event.status = EventStatus.PUBLISHED
+        invalidate_event_on_commit(self.db, event_id, listing=True)
         self.db.commit()
         self.db.refresh(event)
         return event
@@ -240,6 +281,7 @@ class EventRepository:
         if not event:
             return None
         event.status = EventStatus.CANCELLED
+        invalidate_event_on_commit(self.db, event_id, listing=True)
         self.db.commit()
         self.db.refresh(event)
         return event
@@ -250,6 +292,7 @@ class EventRepository:
             return None
         event.status = EventStatus.DRAFT
         event.updatedAt = func.now()
+        invalidate_event_on_commit(self.db, event_id, listing=True)
         self.db.commit()
         self.db.refresh(event)
         return event
@@ -260,6 +303,7 @@ class EventRepository:
             return None
         event.status = EventStatus.COMPLETED
         event.updatedAt = func.now()
+        invalidate_event_on_commit(self.db, event_id, listing=True)
         self.db.commit()
         self.db.refresh(event)
         return event
@@ -269,21 +313,7 @@ class EventRepository:
     # =========================================================
     def get_featured_events(self, limit: int = 6) -> List[Event]:
         """Publicados y con fecha futura."""
-        return (
-            self.db.query(Event)
-            .options(
-                joinedload(Event.organizer),
-                joinedload(Event.category),
-                joinedload(Event.ticket_types)
-            )
-            .filter(
-                Event.status == EventStatus.PUBLISHED,
-                Event.startDate >= datetime.utcnow()
-            )
-            .order_by(Event.startDate.asc())
-            .limit(limit)
-            .all()
-        )
+        return self._list(EventQuery().with_status().upcoming(), limit=limit)
 
     def get_upcoming_events(self, skip: int = 0, limit: int = 10) -> Tuple[List[Event], int]:
         query = self.db.query(Event).filter(
@@ -306,13 +336,8 @@ class EventRepository:
         return self.db.query(Event).filter(Event.status == status).count()
 
     def get_tickets_sold(self, event_id: UUID) -> int:
-        event = self.get_by_id(event_id)
-        if not event or not getattr(event, "ticket_types", None):
-            return 0
-        return sum(
-            tt.sold_quantity or 0
-            for tt in event.ticket_types
-        )
+        total_sold = self.db.query(Event.total_sold).filter(Event.id == event_id).scalar()
+        return total_sold or 0
     
     # =========================================================
     # 🔹 Cambiar estado del evento
@@ -324,17 +349,148 @@ class EventRepository:
 
         event.status = new_status
         event.updatedAt = func.now()
+        invalidate_event_on_commit(self.db, event_id, listing=True)
 
         self.db.commit()
         self.db.refresh(event)
         return event
 
-    def update_event_photo(self, event_id: UUID, photo_bytes: bytes):
+    def update_event_photo(self, event_id: UUID, photo_hash: str, photo_mime: str, photo_size: int):
         event = self.get_by_id(event_id)
         if not event:
             return None
-        event.photo = photo_bytes
+        event.photo_hash = photo_hash
+        event.photo_mime = photo_mime
+        event.photo_size = photo_size
+        invalidate_event_on_commit(self.db, event_id)
         self.db.commit()
         self.db.refresh(event)
         return event
 
+
+class AsyncEventRepository:
+    """Variante async (AsyncSession + asyncpg) de las lecturas más usadas de EventRepository"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _with_relations(stmt):
+        # En async no hay lazy loading implícito: se cargan las relaciones por adelantado
+        return stmt.options(
+            joinedload(Event.organizer),
+            joinedload(Event.category),
+            selectinload(Event.ticket_types)
+        )
+
+    async def get_detail_version(self, event_id: UUID):
+        """
+        (updatedAt, último updated_at de sus ticket_types, nº de ticket_types) o
+        None si no existe: basta para el ETag del detalle sin cargar relaciones
+        """
+        stmt = (
+            select(Event.updatedAt, func.max(TicketType.updated_at), func.count(TicketType.id))
+            .outerjoin(TicketType, TicketType.event_id == Event.id)
+            .where(Event.id == event_id)
+            .group_by(Event.id, Event.updatedAt)
+        )
+        return (await self.db.execute(stmt)).first()
+
+    async def get_by_id(self, event_id: UUID) -> Optional[Event]:
+        stmt = self._with_relations(select(Event)).where(Event.id == event_id)
+        result = await self.db.execute(stmt)
+        return result.unique().scalar_one_or_none()
+
+    async def _list(self, event_query: EventQuery, skip: int = 0, limit: Optional[int] = None) -> List[Event]:
+        stmt = event_query.statement(*list_load_options()).offset(skip).limit(limit)
+        result = await self.db.execute(stmt)
+        return list(result.unique().scalars().all())
+
+    async def get_all(self, skip: int = 0, limit: int = 20, status: Optional[EventStatus] = None) -> List[Event]:
+        return await self._list(EventQuery().with_status(status).upcoming(), skip, limit)
+
+    async def get_upcoming_by_ids(self, event_ids: List[UUID]) -> List[Event]:
+        """Publicados y próximos entre event_ids (en orden de fecha)"""
+        if not event_ids:
+            return []
+        return await self._list(EventQuery().with_status().upcoming().with_ids(event_ids))
+
+    async def get_events(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        query: Optional[str] = None,
+        category_ids: Optional[List[UUID]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        location: Optional[str] = None,
+        venue: Optional[str] = None,
+        status: Optional[EventStatus] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        sort: str = "date",
+        cursor: Optional[str] = None,
+        count_mode: str = "auto"
+    ) -> Tuple[List[Event], Optional[CountResult], Optional[str]]:
+        event_query = EventQuery.search(
+            query=query,
+            category_ids=category_ids,
+            min_price=min_price,
+            max_price=max_price,
+            start_date=start_date,
+            end_date=end_date,
+            location=location,
+            venue=venue,
+            status=status,
+            near=near,
+            radius_km=radius_km,
+            sort=sort
+        ).after(cursor)
+
+        if cursor:
+            total, offset = None, 0
+        else:
+            total = await count_rows_async(self.db, event_query.ids(), event_query.count_key(), count_mode)
+            offset = (page - 1) * page_size
+
+        events = await self._list(event_query, offset, page_size + 1)
+        events, next_cursor = event_query.paginate(events, page_size)
+        return events, total, next_cursor
+
+    async def autocomplete(self, prefix: str, limit: int = 8, similarity_threshold: float = 0.4) -> list:
+        """
+        Sugerencias para la barra de búsqueda: solo id/título/fecha/recinto.
+
+        Coincide por prefijo del título (ILIKE 'pre%') o por similitud de palabra
+        (pg_trgm, tolera errores de tipeo) en título o recinto; ambos usan los
+        índices GIN de trigramas. Primero los títulos que empiezan con el prefijo.
+        """
+        # Umbral del operador <% solo para esta transacción
+        await self.db.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(similarity_threshold), True))
+        )
+
+        term = literal(prefix, String)
+        title_prefix = Event.title.ilike(f"{escape_like(prefix)}%", escape="\\")
+        score = func.greatest(
+            func.word_similarity(term, Event.title),
+            func.word_similarity(term, Event.venue) * 0.8
+        )
+        stmt = (
+            select(Event.id, Event.title, Event.startDate, Event.venue)
+            .where(
+                Event.status == EventStatus.PUBLISHED,
+                Event.startDate >= datetime.utcnow(),
+                or_(title_prefix, term.op("<%")(Event.title), term.op("<%")(Event.venue))
+            )
+            .order_by(title_prefix.desc(), score.desc(), Event.startDate.asc())
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.all())
+
+    async def get_featured_events(self, limit: int = 6) -> List[Event]:
+        """Publicados y con fecha futura."""
+        return await self._list(EventQuery().with_status().upcoming(), limit=limit)
@@ -0,0 +1,94 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select, func, or_
+from typing import Optional, List, Tuple
+from datetime import datetime
+
+from app.models.marketplace_listing import MarketplaceListing, ListingStatus
+from app.models.event import Event
+from app.models.ticket import Ticket
+from app.utils.counts import CountResult, count_cache_key, count_rows_async
+from app.utils.pagination import Keyset
+
+# Orden de /marketplace/listings → clave de keyset (índices ix_marketplace_listings_status_*)
+LISTING_KEYSETS = {
+    "price_asc": Keyset("price_asc", [MarketplaceListing.price, MarketplaceListing.id]),
+    "price_desc": Keyset("price_desc", [MarketplaceListing.price, MarketplaceListing.id], descending=True),
+    "recent": Keyset("recent", [MarketplaceListing.created_at, MarketplaceListing.id], descending=True),
+}
+
+
+class AsyncMarketplaceRepository:
+    """Consultas de lectura del marketplace sobre AsyncSession"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_active_listings(
+        self,
+        page: int = 1,
+        page_size: int = 12,
+        search: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count_mode: str = "auto"
+    ) -> Tuple[List[MarketplaceListing], Optional[CountResult], Optional[str]]:
+        """
+        Listados ACTIVOS, no expirados y de eventos que aún no empiezan.
+        Devuelve (listados, total, next_cursor); con cursor no se cuenta (total None).
+        """
+        conditions = [
+            MarketplaceListing.status == ListingStatus.ACTIVE,
+            MarketplaceListing.expires_at > datetime.utcnow(),
+            Event.startDate >= datetime.utcnow()
+        ]
+
+        if search:
+            search_term = f"%{search.lower()}%"
+            conditions.append(
+                or_(
+                    func.lower(MarketplaceListing.title).like(search_term),
+                    func.lower(Event.title).like(search_term)
+                )
+            )
+
+        if min_price is not None:
+            conditions.append(MarketplaceListing.price >= min_price)
+
+        if max_price is not None:
+            conditions.append(MarketplaceListing.price <= max_price)
+
+        keyset = LISTING_KEYSETS.get(order_by, LISTING_KEYSETS["recent"])
+        if cursor:
+            total, offset = None, 0
+            conditions.append(keyset.after(keyset.decode(cursor)))
+        else:
+            # COUNT sobre solo ids: sin los joinedload de vendedor/evento/ticket
+            total = await count_rows_async(
+                self.db,
+                select(MarketplaceListing.id)
+                .join(Event, MarketplaceListing.event_id == Event.id)
+                .where(*conditions),
+                count_cache_key("marketplace_listings", search=search, min_price=min_price, max_price=max_price),
+                count_mode
+            )
+            offset = (page - 1) * page_size
+
+        query = (
+            select(MarketplaceListing)
+            .join(Event, MarketplaceListing.event_id == Event.id)
+            .options(
+                joinedload(MarketplaceListing.seller),
+                joinedload(MarketplaceListing.event),
+                joinedload(MarketplaceListing.ticket).joinedload(Ticket.ticket_type)
+            )
+            .where(*conditions)
+            .order_by(*keyset.order_by())
+            .offset(offset)
+            .limit(page_size + 1)
+        )
+        result = await self.db.scalars(query)
+        listings, next_cursor = keyset.paginate(list(result.unique().all()), page_size)
+        return listings, total, next_cursor
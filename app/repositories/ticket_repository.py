@@ -0,0 +1,57 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select, func
+from typing import List, Tuple, Optional
+from uuid import UUID
+
+from app.models.ticket import Ticket
+from app.models.marketplace_listing import MarketplaceListing, ListingStatus
+from app.utils.pagination import Keyset
+
+# "Mis tickets", más recientes primero (índice ix_tickets_user_purchase_date_id)
+TICKET_KEYSET = Keyset("purchase_date", [Ticket.purchaseDate, Ticket.id], descending=True)
+
+
+class AsyncTicketRepository:
+    """Consultas de tickets del usuario sobre AsyncSession"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_tickets(
+        self,
+        user_id: UUID,
+        page: int = 1,
+        page_size: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple[Ticket, Optional[MarketplaceListing]]], Optional[int], Optional[str]]:
+        """
+        Tickets del usuario (paginados) junto a su listing ACTIVO, si existe.
+        Devuelve tuplas (Ticket, MarketplaceListing | None), el total (None con
+        cursor) y el cursor de la página siguiente.
+        """
+        query = (
+            select(Ticket, MarketplaceListing)
+            .outerjoin(
+                MarketplaceListing,
+                (MarketplaceListing.ticket_id == Ticket.id) &
+                (MarketplaceListing.status == ListingStatus.ACTIVE)
+            )
+            .where(Ticket.user_id == user_id)
+            .options(
+                joinedload(Ticket.event),
+                joinedload(Ticket.ticket_type)
+            )
+        )
+        if cursor:
+            total, offset = None, 0
+            query = query.where(TICKET_KEYSET.after(TICKET_KEYSET.decode(cursor)))
+        else:
+            total_query = select(func.count(Ticket.id)).where(Ticket.user_id == user_id)
+            total, offset = (await self.db.execute(total_query)).scalar() or 0, (page - 1) * page_size
+
+        query = query.order_by(*TICKET_KEYSET.order_by()).offset(offset).limit(page_size + 1)
+        result = await self.db.execute(query)
+        rows = [(row[0], row[1]) for row in result.unique().all()]
+        items, next_cursor = TICKET_KEYSET.paginate(rows, page_size, item=lambda row: row[0])
+        return items, total, next_cursor
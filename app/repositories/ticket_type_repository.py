@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
+from app.models.event import Event
 from app.models.ticket_type import TicketType
 from app.schemas.ticket_type import TicketTypeCreate, TicketTypeUpdate
 
@@ -80,6 +81,18 @@ class TicketTypeRepository:
             query = query.filter(TicketType.is_active == True)
         
         return query.order_by(TicketType.sort_order.asc()).all()
+
+    def get_event_version(self, event_id: UUID, active_only: bool = False):
+        """(updatedAt del evento, último updated_at de los tipos, nº de tipos) o None si no existe"""
+        join_on = TicketType.event_id == Event.id
+        if active_only:
+            join_on = and_(join_on, TicketType.is_active == True)
+        return self.db.execute(
+            select(Event.updatedAt, func.max(TicketType.updated_at), func.count(TicketType.id))
+            .outerjoin(TicketType, join_on)
+            .where(Event.id == event_id)
+            .group_by(Event.id, Event.updatedAt)
+        ).first()
     
     def update_ticket_type(
         self, 
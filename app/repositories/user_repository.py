@@ -9,11 +9,17 @@ from fastapi import HTTPException, status
 from app.models.user import User, AdminRole
 from app.schemas.auth import UserUpdate
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from app.models.user import User
 from app.models.role import Role
 from app.schemas.auth import UserRegister, UserUpdate
 from app.utils.security import get_password_hash
+from app.utils.pagination import Keyset
+
+# Listado de usuarios del panel admin, más recientes primero (índice ix_users_created_id)
+USER_KEYSET = Keyset("created_at", [User.createdAt, User.id], descending=True)
 
 
 class UserRepository:
@@ -307,14 +313,19 @@ class UserRepository:
         page: int,
         page_size: int,
         search: Optional[str],
-        is_active: Optional[bool]
-    ) -> Tuple[List[User], int]:
-        """Obtener usuarios paginados que NO son administradores"""
+        is_active: Optional[bool],
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[int], Optional[str]]:
+        """
+        Obtener usuarios paginados que NO son administradores.
+        Devuelve (usuarios, total, next_cursor); con cursor no se cuenta (total None).
+        """
         
         admin_role_names = self._get_admin_role_names()
         
-        # Query base: excluye admins
-        query = self.db.query(User).outerjoin(User.roles).filter(
+        # Query base: excluye admins (any() ya es un EXISTS; un join a roles
+        # duplicaría usuarios con varios roles)
+        query = self.db.query(User).filter(
             ~User.roles.any(Role.name.in_(admin_role_names))
         )
         
@@ -331,16 +342,19 @@ class UserRepository:
         if is_active is not None:
             query = query.filter(User.isActive == is_active)
         
-        # Contar total ANTES de paginar
-        total = query.count()
-        
-        # Calcular paginación
-        offset = (page - 1) * page_size
+        if cursor:
+            # Keyset: continúa desde el último usuario de la página anterior
+            total, offset = None, 0
+            query = query.filter(USER_KEYSET.after(USER_KEYSET.decode(cursor)))
+        else:
+            # Contar total ANTES de paginar
+            total, offset = query.count(), (page - 1) * page_size
         
-        # Obtener usuarios
-        users = query.order_by(User.createdAt.desc()).offset(offset).limit(page_size).all()
+        # Obtener usuarios (uno extra para saber si hay página siguiente)
+        users = query.order_by(*USER_KEYSET.order_by()).offset(offset).limit(page_size + 1).all()
+        users, next_cursor = USER_KEYSET.paginate(users, page_size)
         
-        return users, total
+        return users, total, next_cursor
 
     def get_all_admins(self) -> List[User]:
         """Obtener todos los usuarios que SÍ son administradores"""
@@ -378,4 +392,27 @@ class UserRepository:
         """Contar usuarios registrados desde una fecha específica"""
         return self.db.query(func.count(User.id)).filter(
             User.createdAt >= date
-        ).scalar() or 0
\ No newline at end of file
+        ).scalar() or 0
+
+
+class AsyncUserRepository:
+    """Async (AsyncSession) variant of the read paths used on every authenticated request"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+        """Get user by ID (roles eagerly loaded; async sessions can't lazy load)"""
+        stmt = select(User).options(selectinload(User.roles)).where(User.id == user_id)
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Get user by email"""
+        stmt = select(User).options(selectinload(User.roles)).where(User.email == email.lower())
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_by_id_with_role(self, user_id: uuid.UUID) -> Optional[User]:
+        """Alias kept for parity with UserRepository"""
+        return await self.get_by_id(user_id)
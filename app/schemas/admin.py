@@ -71,10 +71,11 @@ class UserDetailResponse(UserListResponse):
 
 class PaginatedUsersResponse(BaseModel):
     users: List[UserListResponse]
-    total: int
+    total: Optional[int] = None  # None en modo cursor
     page: int
     pageSize: int = Field(..., alias="pageSize")
-    totalPages: int = Field(..., alias="totalPages")
+    totalPages: Optional[int] = Field(None, alias="totalPages")
+    nextCursor: Optional[str] = Field(None, alias="nextCursor")
     
     model_config = ConfigDict(
         populate_by_name = True
@@ -13,6 +13,8 @@ class EventCreate(BaseModel):
     startDate: datetime = Field(..., description="Event start date and time")
     endDate: datetime = Field(..., description="Event end date and time")
     venue: str = Field(..., min_length=3, max_length=200, description="Event venue/location")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Venue latitude (geocoded from venue if omitted)")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Venue longitude (geocoded from venue if omitted)")
     totalCapacity: int = Field(..., gt=0, description="Total capacity of the event")
     #multimedia: Optional[List[str]] = Field(default=[], description="List of image/video URLs")
     category_id: Optional[UUID] = Field(None, description="Event category ID")
@@ -45,9 +47,12 @@ class EventUpdate(BaseModel):
     startDate: Optional[datetime] = None
     endDate: Optional[datetime] = None
     venue: Optional[str] = Field(None, min_length=3, max_length=200)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     totalCapacity: Optional[int] = Field(None, gt=0)
     #multimedia: Optional[List[str]] = None
     category_id: Optional[UUID] = None
+    waiting_room_rate: Optional[int] = Field(None, gt=0, description="Compradores admitidos por segundo (null = sin sala de espera)")
     class Config:
         json_schema_extra = {
             "example": {
@@ -67,6 +72,8 @@ class EventResponse(BaseModel):
     startDate: datetime
     endDate: datetime
     venue: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     totalCapacity: int
     status: str
     photoUrl: Optional[str] = None
@@ -151,6 +158,17 @@ class EventSimpleResponse(BaseModel):
 # =========================================================
 # 🔍 Búsqueda avanzada
 # =========================================================
+class EventAutocompleteItem(BaseModel):
+    """Sugerencia liviana para la barra de búsqueda"""
+    id: UUID
+    title: str
+    startDate: datetime
+    venue: str
+
+    class Config:
+        from_attributes = True
+
+
 class EventSearchFilters(BaseModel):
     query: Optional[str] = Field(None, description="Texto de búsqueda en título y descripción")
     categories: Optional[List[str]] = Field([], description="Lista de slugs de categorías")
@@ -179,10 +197,12 @@ class EventSearchFilters(BaseModel):
 
 class EventSearchResponse(BaseModel):
     events: List[Dict[str, Any]]
-    total: int
+    total: Optional[int] = None  # None en modo cursor (no se cuenta)
+    total_is_exact: bool = True  # False si total es la estimación del planner
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # None en la última página
 
     class Config:
         from_attributes = True
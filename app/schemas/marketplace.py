@@ -37,10 +37,12 @@ class ListingResponse(BaseModel):
 
 class PaginatedMarketplaceListings(BaseModel):
     items: List[ListingResponse] # Ahora coincide
-    total: int
+    total: Optional[int] = None  # None en modo cursor
+    totalIsExact: bool = Field(True, alias="totalIsExact")  # False si es la estimación del planner
     page: int
     pageSize: int = Field(..., alias="pageSize")
-    totalPages: int = Field(..., alias="totalPages")
+    totalPages: Optional[int] = Field(None, alias="totalPages")
+    nextCursor: Optional[str] = Field(None, alias="nextCursor")
 
     # --- SINTAXIS ACTUALIZADA ---
     model_config = ConfigDict(populate_by_name=True)
@@ -14,6 +14,7 @@ class CreatePreferenceRequest(BaseModel):
     eventId: UUID = Field(..., description="ID del evento")
     tickets: List[TicketTypeSelection] = Field(..., description="Tickets a comprar")
     promotionCode: Optional[str] = Field(None, description="Código promocional (opcional)")
+    queueToken: Optional[str] = Field(None, description="Turno admitido de la sala de espera (eventos con sala)")
     
     @validator('tickets')
     def tickets_not_empty(cls, v):
@@ -21,6 +22,14 @@ class CreatePreferenceRequest(BaseModel):
             raise ValueError('Debe seleccionar al menos un ticket')
         return v
 
+class QueueTurnResponse(BaseModel):
+    """Turno en la sala de espera de un evento"""
+    token: Optional[str] = Field(None, description="None si el evento no tiene sala de espera")
+    admitted: bool
+    position: int = Field(..., description="Lugar en la fila (1 = el siguiente, 0 = admitido)")
+    etaSeconds: float
+    pollAfterSeconds: int = Field(..., description="Cuándo volver a consultar el turno")
+
 class CreatePreferenceResponse(BaseModel):
     """Response con el init_point de MercadoPago"""
     purchaseId: UUID
@@ -173,6 +173,12 @@ class TicketTypeResponse(BaseModel):
         }
 
 
+class TicketTypeAvailability(BaseModel):
+    """Lo que queda a la venta de un tipo (sin vendidos ni reservados)"""
+    ticketTypeId: UUID
+    remaining: int
+
+
 class TicketTypeSimple(BaseModel):
     """Schema simplificado para incluir en respuestas de eventos"""
     id: UUID
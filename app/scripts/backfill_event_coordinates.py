@@ -0,0 +1,73 @@
+"""
+Completa latitude/longitude de los eventos que no las tienen, con el
+geocodificador configurado (GEOCODER_BACKEND). Una llamada por recinto
+distinto; los recintos no reconocidos quedan sin coordenadas.
+
+Reemplaza al backfill que hacía la migración event_coordinates: las
+migraciones no dependen del código de la app. Es idempotente: se puede volver
+a correr (p. ej. tras cambiar de geocodificador) y solo toca eventos sin
+coordenadas, salvo --all.
+
+USO:
+    python -m app.scripts.backfill_event_coordinates
+    python -m app.scripts.backfill_event_coordinates --all --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import or_, select, update
+
+from app.core.database import SessionLocal
+from app.models.event import Event
+from app.utils.geocoding import get_geocoder
+
+
+def backfill(all_events: bool = False, dry_run: bool = False) -> int:
+    """Devuelve la cantidad de eventos con coordenadas nuevas"""
+    geocoder = get_geocoder()
+    pending = or_(Event.latitude.is_(None), Event.longitude.is_(None))
+    with SessionLocal() as db:
+        stmt = select(Event.venue).distinct()
+        if not all_events:
+            stmt = stmt.where(pending)
+        venues = db.execute(stmt).scalars().all()
+        print(f"🔍 {len(venues)} recintos por geocodificar")
+
+        updated = 0
+        for venue in venues:
+            coords = geocoder.geocode(venue)
+            if not coords:
+                print(f"   ⚠️ Sin coordenadas: {venue}")
+                continue
+            where = [Event.venue == venue] + ([] if all_events else [pending])
+            result = db.execute(
+                update(Event).where(*where).values(latitude=coords[0], longitude=coords[1])
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+
+        if dry_run:
+            db.rollback()
+            print(f"🧪 Simulación: {updated} eventos tendrían coordenadas nuevas")
+        else:
+            db.commit()
+            print(f"✅ {updated} eventos con coordenadas")
+        return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de coordenadas de eventos")
+    parser.add_argument("--all", action="store_true", help="recalcular también los que ya tienen coordenadas")
+    parser.add_argument("--dry-run", action="store_true", help="no guardar cambios")
+    args = parser.parse_args()
+    backfill(all_events=args.all, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark del read model en memoria del catálogo (CatalogReadModel).
+
+No usa la base de datos: arma N eventos publicados sintéticos (10k por
+defecto) repartidos en varias categorías, los carga en un CatalogReadModel
+como lo haría load() y mide:
+
+- memoria: deep_sizeof del snapshot + categorías (lo que reporta
+  /admin/metrics/catalog) y lo asignado según tracemalloc, por 10k eventos;
+- latencia de las consultas que sirve desde memoria: destacados, próximos,
+  /events/search por categoría, rango de precio y órdenes.
+
+USO:
+    python -m app.scripts.bench_catalog_read_model
+    python -m app.scripts.bench_catalog_read_model --events 50000 --runs 500
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.models.event import Event, EventStatus
+from app.models.event_category import EventCategory
+from app.services.catalog_read_model import EVENTS_PER_REPORT, CatalogReadModel, deep_sizeof
+
+CATEGORIES = ["musica", "teatro", "deportes", "conferencias", "festivales", "comedia", "danza", "familia"]
+
+QUERIES = [
+    ("destacados (6)", lambda m: m.featured(6)),
+    ("próximos (20)", lambda m: m.upcoming(0, 20)),
+    ("próximos pág. 50", lambda m: m.upcoming(1000, 20)),
+    ("categoría", lambda m: m.search(["musica"])),
+    ("categoría pág. 10", lambda m: m.search(["teatro"], page=10)),
+    ("2 categorías", lambda m: m.search(["musica", "teatro"])),
+    ("rango de precio", lambda m: m.search(min_price=50, max_price=120)),
+    ("cat. + precio_asc", lambda m: m.search(["deportes"], max_price=100, sort="price_asc")),
+    ("popularidad", lambda m: m.search(sort="popularity")),
+    ("todo price_desc", lambda m: m.search(sort="price_desc")),
+]
+
+
+def build_model(count: int) -> CatalogReadModel:
+    """Como CatalogReadModel.load(), con eventos en memoria en lugar de la consulta"""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    model = CatalogReadModel()
+
+    categories = [
+        EventCategory(id=uuid.uuid4(), name=slug.title(), slug=slug, is_active=True, is_featured=i < 3)
+        for i, slug in enumerate(CATEGORIES)
+    ]
+    for category in categories:
+        model._categories[category.id] = category.to_dict(event_count=count // len(categories))
+        model._active_slugs[category.slug] = category.id
+
+    entries = {}
+    for i in range(count):
+        category = categories[i % len(categories)]
+        start = now + timedelta(days=1 + rng.random() * 365)
+        min_price = None if i % 50 == 0 else rng.choice([20, 35, 50, 80, 120, 200])
+        event = Event(
+            id=uuid.uuid4(),
+            title=f"Evento {i}",
+            description="Una noche inolvidable con los mejores artistas invitados " * 3,
+            startDate=start,
+            endDate=start + timedelta(hours=4),
+            venue="Estadio Nacional, Lima",
+            totalCapacity=5000,
+            status=EventStatus.PUBLISHED,
+            photo_hash="ab" * 32,
+            organizer_id=uuid.uuid4(),
+            category_id=category.id,
+            min_price=min_price,
+            max_price=None if min_price is None else min_price + 150,
+            total_sold=rng.randint(0, 5000),
+            available_tickets=5000,
+            latitude=-12.0670,
+            longitude=-77.0336,
+            createdAt=now - timedelta(minutes=i),
+            updatedAt=now,
+        )
+        event.category = category
+        entries[event.id] = model._entry(event)
+    model._publish(entries)
+    return model
+
+
+def timed(fn, runs: int) -> list:
+    fn()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label: str, samples: list) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    mark = "✅" if p50 < 1 else "⚠️"
+    return f"{label:<20} p50={p50:7.3f} ms   p95={p95:7.3f} ms {mark}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del read model del catálogo")
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"🏗️  Cargando {args.events:,} eventos sintéticos...")
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = build_model(args.events)
+    load_seconds = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    deep = deep_sizeof(model._snapshot) + deep_sizeof(model._categories)
+    per_report = EVENTS_PER_REPORT / args.events / 1024 / 1024
+    print(f"   carga: {load_seconds:.2f} s")
+    print(f"   deep_sizeof: {deep / 1024 / 1024:.1f} MB ({deep * per_report:.1f} MB por 10k eventos)")
+    print(f"   tracemalloc: {allocated / 1024 / 1024:.1f} MB ({allocated * per_report:.1f} MB por 10k eventos)")
+
+    print(f"\n⏱️  {args.runs} repeticiones por consulta (página de 20 salvo destacados)\n")
+    for label, query in QUERIES:
+        result = query(model)
+        total = result[1] if isinstance(result, tuple) else len(result)
+        samples = timed(lambda: query(model), args.runs)
+        print(f"   {summarize(label, samples)}   ({total:,} resultados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark de /events/autocomplete: prefijos contra índices de trigramas (pg_trgm).
+
+Reutiliza el esquema temporal de bench_event_search (N eventos sintéticos, 100k
+por defecto), le agrega los índices GIN gin_trgm_ops de título y recinto y mide
+la consulta del endpoint para prefijos cortos, largos y con errores de tipeo.
+Objetivo: p95 < 20 ms sin contar la caché de prefijos en memoria.
+
+USO:
+    python -m app.scripts.bench_event_autocomplete
+    python -m app.scripts.bench_event_autocomplete --rows 100000 --runs 50 --keep
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine
+from app.models.event import TRIGRAM_EXTENSION_SQL
+from app.scripts.bench_event_search import SCHEMA, setup, summarize
+
+TARGET_P95_MS = 20.0
+
+# Lo que llega mientras el usuario escribe: prefijos, recintos y typos
+PREFIXES = ["co", "con", "conc", "concierto", "fest", "teatro mun", "jaz", "estadio", "arequipa", "consierto", "festivla"]
+
+AUTOCOMPLETE_SQL = f"""
+    SELECT id, title, "startDate", venue FROM {SCHEMA}.events
+    WHERE status = 'PUBLISHED' AND "startDate" >= now()
+      AND (title ILIKE :pattern OR :term <% title OR :term <% venue)
+    ORDER BY title ILIKE :pattern DESC,
+             greatest(word_similarity(:term, title), word_similarity(:term, venue) * 0.8) DESC,
+             "startDate"
+    LIMIT :limit
+"""
+
+
+def add_trigram_indexes(conn) -> None:
+    print("🏗️  Creando índices de trigramas...")
+    conn.execute(text(TRIGRAM_EXTENSION_SQL))
+    conn.execute(text(f"CREATE INDEX ix_bench_events_title_trgm ON {SCHEMA}.events USING gin (title gin_trgm_ops)"))
+    conn.execute(text(f"CREATE INDEX ix_bench_events_venue_trgm ON {SCHEMA}.events USING gin (venue gin_trgm_ops)"))
+    conn.execute(text(f"ANALYZE {SCHEMA}.events"))
+
+
+def run(conn, params: dict) -> list:
+    # Igual que el repositorio: umbral de <% local a la transacción
+    with conn.begin():
+        conn.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+            {"t": str(settings.AUTOCOMPLETE_SIMILARITY_THRESHOLD)}
+        )
+        return conn.execute(text(AUTOCOMPLETE_SQL), params).fetchall()
+
+
+def timed(conn, params: dict, runs: int) -> list:
+    run(conn, params)  # calentar caché
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run(conn, params)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def uses_trgm(conn, params: dict) -> bool:
+    with conn.begin():
+        conn.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+            {"t": str(settings.AUTOCOMPLETE_SIMILARITY_THRESHOLD)}
+        )
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {AUTOCOMPLETE_SQL}"), params).scalar()
+    return "_trgm" in json.dumps(plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de autocompletado con pg_trgm")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=30, help="repeticiones por prefijo")
+    parser.add_argument("--limit", type=int, default=settings.AUTOCOMPLETE_DEFAULT_LIMIT)
+    parser.add_argument("--keep", action="store_true", help="no borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    with engine.connect() as setup_conn:
+        setup_conn = setup_conn.execution_options(isolation_level="AUTOCOMMIT")
+        setup(setup_conn, args.rows)
+        add_trigram_indexes(setup_conn)
+
+    try:
+        with engine.connect() as conn:
+            all_samples = []
+            print(f"\n⏱️  {args.runs} repeticiones por prefijo (top {args.limit})\n")
+            for prefix in PREFIXES:
+                params = {"term": prefix, "pattern": f"{prefix}%", "limit": args.limit}
+                samples = timed(conn, params, args.runs)
+                all_samples += samples
+                index = "trgm ✅" if uses_trgm(conn, params) else "trgm ❌"
+                print(f"🔎 '{prefix}' ({index})  " + summarize("", samples).strip())
+
+            print("\n📊 Total")
+            print("   " + summarize("autocomplete", all_samples))
+            ordered = sorted(all_samples)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            verdict = "✅" if p95 < TARGET_P95_MS else "❌"
+            print(f"\n{verdict} p95 {p95:.2f} ms (objetivo < {TARGET_P95_MS:.0f} ms)")
+    finally:
+        if not args.keep:
+            with engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").execute(
+                    text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+                )
+            print(f"🧹 Esquema {SCHEMA} eliminado")
+
+
+if __name__ == "__main__":
+    main()
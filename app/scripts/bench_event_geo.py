@@ -0,0 +1,186 @@
+"""
+Benchmark de "eventos cerca de mí": ILIKE sobre el recinto (antes) vs caja de
+latitud/longitud indexada + haversine (ahora).
+
+Crea un esquema temporal `bench_geo` en la base de datos configurada, lo llena
+con N eventos sintéticos (100k por defecto) repartidos alrededor de ciudades
+del Perú (coordenadas con dispersión de unos km) y mide la consulta de
+/events/search: COUNT + página de 20, igual que el endpoint.
+
+- antes: location=<ciudad> → venue ILIKE '%ciudad%' (sin distancia ni radio);
+- haversine: distancia exacta sobre toda la tabla (sin caja, escaneo completo);
+- caja + haversine: el filtro de EventQuery.near(), que usa el índice
+  (status, latitude, longitude), ordenado por fecha y por distancia.
+
+USO:
+    python -m app.scripts.bench_event_geo
+    python -m app.scripts.bench_event_geo --rows 100000 --runs 30 --keep
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import text
+from app.core.database import engine
+from app.utils.geo import EARTH_RADIUS_KM, bounding_box
+from app.utils.geocoding import OFFLINE_PLACES
+
+SCHEMA = "bench_geo"
+INDEX = "ix_bench_geo_status_lat_lon"
+
+CITIES = ["lima", "miraflores", "barranco", "callao", "cusco", "arequipa", "trujillo", "piura", "chiclayo", "iquitos"]
+PLACES = dict(OFFLINE_PLACES)
+
+# (nombre, ciudad del centro, radio en km)
+SEARCHES = [
+    ("Lima centro 5 km", "lima", 5),
+    ("Miraflores 10 km", "miraflores", 10),
+    ("Lima 25 km", "lima", 25),
+    ("Cusco 10 km", "cusco", 10),
+    ("Arequipa 50 km", "arequipa", 50),
+]
+
+HAVERSINE = f"""
+    2 * {EARTH_RADIUS_KM} * asin(sqrt(
+        power(sin(radians(latitude - :lat) / 2), 2)
+        + cos(radians(:lat)) * cos(radians(latitude)) * power(sin(radians(longitude - :lon) / 2), 2)
+    ))
+"""
+BASE_WHERE = """status = 'PUBLISHED' AND "startDate" >= now()"""
+BOX_WHERE = "latitude BETWEEN :min_lat AND :max_lat AND longitude BETWEEN :min_lon AND :max_lon"
+
+OLD_COUNT = f"SELECT count(*) FROM {SCHEMA}.events WHERE {BASE_WHERE} AND venue ILIKE :pattern"
+OLD_PAGE = f"""SELECT id FROM {SCHEMA}.events WHERE {BASE_WHERE} AND venue ILIKE :pattern ORDER BY "startDate" LIMIT 20"""
+SCAN_COUNT = f"SELECT count(*) FROM {SCHEMA}.events WHERE {BASE_WHERE} AND {HAVERSINE} <= :radius"
+SCAN_PAGE = f"""SELECT id FROM {SCHEMA}.events WHERE {BASE_WHERE} AND {HAVERSINE} <= :radius ORDER BY "startDate" LIMIT 20"""
+BOX_COUNT = f"SELECT count(*) FROM {SCHEMA}.events WHERE {BASE_WHERE} AND {BOX_WHERE} AND {HAVERSINE} <= :radius"
+BOX_PAGE = f"""
+    SELECT id FROM {SCHEMA}.events WHERE {BASE_WHERE} AND {BOX_WHERE} AND {HAVERSINE} <= :radius
+    ORDER BY "startDate" LIMIT 20
+"""
+BOX_PAGE_DISTANCE = f"""
+    SELECT id FROM {SCHEMA}.events WHERE {BASE_WHERE} AND {BOX_WHERE} AND {HAVERSINE} <= :radius
+    ORDER BY {HAVERSINE}, "startDate" LIMIT 20
+"""
+
+
+def setup(conn, rows: int) -> None:
+    print(f"🏗️  Creando esquema {SCHEMA} con {rows:,} eventos...")
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.events (
+            id bigserial PRIMARY KEY,
+            title varchar(200) NOT NULL,
+            venue varchar(200) NOT NULL,
+            status varchar(20) NOT NULL,
+            "startDate" timestamptz NOT NULL,
+            latitude double precision,
+            longitude double precision
+        )
+    """))
+
+    names = "ARRAY[" + ", ".join(f"'{c.title()}'" for c in CITIES) + "]"
+    lats = "ARRAY[" + ", ".join(str(PLACES[c][0]) for c in CITIES) + "]::float8[]"
+    lons = "ARRAY[" + ", ".join(str(PLACES[c][1]) for c in CITIES) + "]::float8[]"
+    # ~0.15° de dispersión (≈15 km) alrededor de cada ciudad
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.events (title, venue, status, "startDate", latitude, longitude)
+        SELECT
+            'Evento ' || g,
+            'Recinto ' || (g % 500) || ', ' || ({names})[c],
+            CASE WHEN g % 10 = 0 THEN 'DRAFT' ELSE 'PUBLISHED' END,
+            now() + ((g % 365) || ' days')::interval,
+            ({lats})[c] + (random() - 0.5) * 0.3,
+            ({lons})[c] + (random() - 0.5) * 0.3
+        FROM (SELECT g, 1 + (g % {len(CITIES)}) AS c FROM generate_series(1, :rows) AS g) s
+    """), {"rows": rows})
+    conn.execute(text(f"CREATE INDEX {INDEX} ON {SCHEMA}.events (status, latitude, longitude)"))
+    conn.execute(text(f'CREATE INDEX ix_bench_geo_start ON {SCHEMA}.events ("startDate")'))
+    conn.execute(text(f"ANALYZE {SCHEMA}.events"))
+
+
+def params_for(city: str, radius_km: float) -> dict:
+    lat, lon = PLACES[city]
+    box = bounding_box(lat, lon, radius_km)
+    return {
+        "lat": lat, "lon": lon, "radius": radius_km,
+        "min_lat": box.min_lat, "max_lat": box.max_lat, "min_lon": box.min_lon, "max_lon": box.max_lon,
+        "pattern": f"%{city}%",
+    }
+
+
+def timed(conn, sql: str, params: dict, runs: int) -> list:
+    conn.execute(text(sql), params).fetchall()  # calentar caché
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def count_and_page(conn, count_sql: str, page_sql: str, params: dict, runs: int) -> list:
+    return [c + p for c, p in zip(timed(conn, count_sql, params, runs), timed(conn, page_sql, params, runs))]
+
+
+def uses_index(conn, sql: str, params: dict) -> bool:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    return INDEX in json.dumps(plan)
+
+
+def summarize(label: str, samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{label:<26} p50={statistics.median(samples):8.2f} ms   p95={p95:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda por radio")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20, help="repeticiones por búsqueda")
+    parser.add_argument("--keep", action="store_true", help="no borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        setup(conn, args.rows)
+
+        try:
+            totals = {"ILIKE (antes)": [], "haversine sin caja": [], "caja + haversine": [], "caja + haversine (dist.)": []}
+            print(f"\n⏱️  {args.runs} repeticiones por búsqueda (COUNT + página de 20)\n")
+            for label, city, radius_km in SEARCHES:
+                params = params_for(city, radius_km)
+                results = {
+                    "ILIKE (antes)": count_and_page(conn, OLD_COUNT, OLD_PAGE, params, args.runs),
+                    "haversine sin caja": count_and_page(conn, SCAN_COUNT, SCAN_PAGE, params, args.runs),
+                    "caja + haversine": count_and_page(conn, BOX_COUNT, BOX_PAGE, params, args.runs),
+                    "caja + haversine (dist.)": count_and_page(conn, BOX_COUNT, BOX_PAGE_DISTANCE, params, args.runs),
+                }
+                matches = conn.execute(text(BOX_COUNT), params).scalar()
+                index = "índice ✅" if uses_index(conn, BOX_COUNT, params) else "índice ❌"
+                print(f"📍 {label}: {matches:,} eventos ({index})")
+                for name, samples in results.items():
+                    totals[name] += samples
+                    print("   " + summarize(name, samples))
+
+            print("\n📊 Total")
+            for name, samples in totals.items():
+                print("   " + summarize(name, samples))
+            speedup = statistics.median(totals["haversine sin caja"]) / statistics.median(totals["caja + haversine"])
+            print(f"\n⚡ La caja indexada es {speedup:.1f}x más rápida que haversine sobre toda la tabla (p50)")
+        finally:
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                print(f"🧹 Esquema {SCHEMA} eliminado")
+
+
+if __name__ == "__main__":
+    main()
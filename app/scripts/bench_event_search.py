@@ -0,0 +1,179 @@
+"""
+Benchmark de búsqueda de eventos: ILIKE '%term%' (antes) vs tsvector + GIN (ahora).
+
+Crea un esquema temporal `bench_search` en la base de datos configurada, lo
+llena con N eventos sintéticos (100k por defecto, generados en el servidor con
+generate_series) y mide la consulta de /events/search en sus dos variantes:
+COUNT + página de 20 resultados, igual que el endpoint. No toca la tabla events.
+
+USO:
+    python -m app.scripts.bench_event_search
+    python -m app.scripts.bench_event_search --rows 100000 --runs 30 --keep
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import text
+from app.core.database import engine
+from app.models.event import SEARCH_CONFIG, SEARCH_CONFIG_SQL, SEARCH_VECTOR_SQL
+
+SCHEMA = "bench_search"
+
+# Términos típicos de la barra de búsqueda (con y sin tildes, plural, varias palabras)
+SEARCH_TERMS = ["rock", "musica", "teatro", "festival lima", "conciertos", "stand up", "jazz", "arequipa"]
+
+TITLE_WORDS = [
+    "Concierto", "Festival", "Noche", "Gira", "Show", "Teatro", "Stand Up", "Ópera",
+    "Rock", "Jazz", "Salsa", "Cumbia", "Electrónica", "Música", "Danza", "Comedia",
+]
+VENUES = [
+    "Estadio Nacional, Lima", "Arena Perú, Lima", "Teatro Municipal, Lima", "Centro de Convenciones, Arequipa",
+    "Plaza de Armas, Cusco", "Explanada Costa Verde, Lima", "Coliseo Cerrado, Trujillo", "Teatro Pirandello, Lima",
+]
+DESCRIPTION_WORDS = [
+    "una", "noche", "inolvidable", "con", "los", "mejores", "artistas", "invitados", "sorpresa",
+    "música", "en", "vivo", "experiencia", "única", "para", "toda", "la", "familia", "entradas", "limitadas",
+]
+
+OLD_COUNT = f"""
+    SELECT count(*) FROM {SCHEMA}.events
+    WHERE status = 'PUBLISHED' AND "startDate" >= now()
+      AND (title ILIKE :pattern OR description ILIKE :pattern)
+"""
+OLD_PAGE = f"""
+    SELECT id FROM {SCHEMA}.events
+    WHERE status = 'PUBLISHED' AND "startDate" >= now()
+      AND (title ILIKE :pattern OR description ILIKE :pattern)
+    ORDER BY "startDate" LIMIT 20
+"""
+FTS_WHERE = f"""
+    status = 'PUBLISHED' AND "startDate" >= now()
+      AND search_vector @@ websearch_to_tsquery('{SEARCH_CONFIG}'::regconfig, :term)
+"""
+NEW_COUNT = f"SELECT count(*) FROM {SCHEMA}.events WHERE {FTS_WHERE}"
+NEW_PAGE = f"""SELECT id FROM {SCHEMA}.events WHERE {FTS_WHERE} ORDER BY "startDate" LIMIT 20"""
+NEW_PAGE_RANKED = f"""
+    SELECT id FROM {SCHEMA}.events WHERE {FTS_WHERE}
+    ORDER BY ts_rank(search_vector, websearch_to_tsquery('{SEARCH_CONFIG}'::regconfig, :term)) DESC, "startDate"
+    LIMIT 20
+"""
+
+
+def _pg_array(values):
+    return "ARRAY[" + ", ".join("'" + v.replace("'", "''") + "'" for v in values) + "]"
+
+
+def setup(conn, rows: int) -> None:
+    print(f"🏗️  Creando esquema {SCHEMA} con {rows:,} eventos...")
+    conn.execute(text(SEARCH_CONFIG_SQL))
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.events (
+            id bigserial PRIMARY KEY,
+            title varchar(200) NOT NULL,
+            description text,
+            venue varchar(200) NOT NULL,
+            status varchar(20) NOT NULL,
+            "startDate" timestamptz NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED
+        )
+    """))
+
+    titles, venues, words = _pg_array(TITLE_WORDS), _pg_array(VENUES), _pg_array(DESCRIPTION_WORDS)
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.events (title, description, venue, status, "startDate")
+        SELECT
+            ({titles})[1 + (random() * {len(TITLE_WORDS) - 1})::int] || ' ' ||
+            ({titles})[1 + (random() * {len(TITLE_WORDS) - 1})::int] || ' ' || g,
+            (SELECT string_agg(({words})[1 + (random() * {len(DESCRIPTION_WORDS) - 1})::int], ' ')
+               FROM generate_series(1, 30 + (g % 5))),
+            ({venues})[1 + (random() * {len(VENUES) - 1})::int],
+            CASE WHEN g % 10 = 0 THEN 'DRAFT' ELSE 'PUBLISHED' END,
+            now() + ((g % 365) || ' days')::interval
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    conn.execute(text(f"CREATE INDEX ix_bench_events_search_vector ON {SCHEMA}.events USING gin (search_vector)"))
+    conn.execute(text(f'CREATE INDEX ix_bench_events_start ON {SCHEMA}.events ("startDate")'))
+    conn.execute(text(f"ANALYZE {SCHEMA}.events"))
+
+
+def timed(conn, sql: str, params: dict, runs: int) -> list:
+    conn.execute(text(sql), params).fetchall()  # calentar caché
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def uses_gin(conn, sql: str, params: dict) -> bool:
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    return "ix_bench_events_search_vector" in json.dumps(plan)
+
+
+def summarize(label: str, samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{label:<22} p50={statistics.median(samples):8.2f} ms   p95={p95:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ILIKE vs full-text search")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20, help="repeticiones por término")
+    parser.add_argument("--keep", action="store_true", help="no borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        setup(conn, args.rows)
+
+        try:
+            totals = {"ILIKE": [], "FTS (fecha)": [], "FTS (relevancia)": []}
+            print(f"\n⏱️  {args.runs} repeticiones por término (COUNT + página de 20)\n")
+            for term in SEARCH_TERMS:
+                old = [c + p for c, p in zip(
+                    timed(conn, OLD_COUNT, {"pattern": f"%{term}%"}, args.runs),
+                    timed(conn, OLD_PAGE, {"pattern": f"%{term}%"}, args.runs),
+                )]
+                new = [c + p for c, p in zip(
+                    timed(conn, NEW_COUNT, {"term": term}, args.runs),
+                    timed(conn, NEW_PAGE, {"term": term}, args.runs),
+                )]
+                ranked = [c + p for c, p in zip(
+                    timed(conn, NEW_COUNT, {"term": term}, args.runs),
+                    timed(conn, NEW_PAGE_RANKED, {"term": term}, args.runs),
+                )]
+                totals["ILIKE"] += old
+                totals["FTS (fecha)"] += new
+                totals["FTS (relevancia)"] += ranked
+
+                gin = "GIN ✅" if uses_gin(conn, NEW_COUNT, {"term": term}) else "GIN ❌"
+                print(f"🔎 '{term}' ({gin})")
+                print("   " + summarize("ILIKE", old))
+                print("   " + summarize("FTS (fecha)", new))
+                print("   " + summarize("FTS (relevancia)", ranked))
+
+            print("\n📊 Total")
+            for label, samples in totals.items():
+                print("   " + summarize(label, samples))
+            speedup = statistics.median(totals["ILIKE"]) / statistics.median(totals["FTS (fecha)"])
+            print(f"\n⚡ FTS es {speedup:.1f}x más rápido que ILIKE (p50)")
+        finally:
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                print(f"🧹 Esquema {SCHEMA} eliminado")
+
+
+if __name__ == "__main__":
+    main()
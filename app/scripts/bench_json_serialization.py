@@ -0,0 +1,208 @@
+"""
+Benchmark de serialización de respuestas: camino de FastAPI (antes) vs
+salida de confianza con orjson / pydantic-core (ahora).
+
+No usa la base de datos: arma en memoria páginas de 100 ítems con la misma
+forma que devuelven /events/search, /marketplace/listings y /tickets/my-tickets
+y mide solo el paso de "objeto del servicio → bytes HTTP":
+
+- antes: serialize_response de FastAPI (revalidar + dict modo JSON, o
+  jsonable_encoder sin response_model) + JSONResponse (json de la stdlib);
+- orjson: el mismo camino pero con ORJSONResponse (response_class por defecto);
+- confianza: trusted_response() (un único volcado, sin revalidar).
+
+Verifica además que las tres variantes producen el mismo JSON.
+
+USO:
+    python -m app.scripts.bench_json_serialization
+    python -m app.scripts.bench_json_serialization --items 100 --runs 300
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.json_responses import trusted_response
+from app.models.event import Event, EventStatus
+from app.models.event_category import EventCategory
+from app.schemas.event import EventSearchResponse
+from app.schemas.marketplace import ListingResponse, PaginatedMarketplaceListings
+
+
+# ============= PÁGINAS SINTÉTICAS =============
+
+def search_page(items: int) -> EventSearchResponse:
+    """Como AsyncEventService.search_events: Event.to_dict() → EventSearchResponse"""
+    now = datetime.now(timezone.utc)
+    category = EventCategory(id=uuid.uuid4(), name="Música", slug="musica", is_active=True, is_featured=True)
+    events = []
+    for i in range(items):
+        event = Event(
+            id=uuid.uuid4(),
+            title=f"Concierto de rock {i}",
+            description="Una noche inolvidable con los mejores artistas invitados " * 3,
+            startDate=now + timedelta(days=i),
+            endDate=now + timedelta(days=i, hours=4),
+            venue="Estadio Nacional, Lima",
+            totalCapacity=5000,
+            status=EventStatus.PUBLISHED,
+            photo_hash="ab" * 32,
+            organizer_id=uuid.uuid4(),
+            category_id=category.id,
+            min_price=50 + i,
+            max_price=250 + i,
+            total_sold=i * 10,
+            available_tickets=5000 - i * 10,
+            createdAt=now,
+            updatedAt=now,
+        )
+        event.category = category
+        events.append(event.to_dict(include_ticket_types=False))
+    return EventSearchResponse(events=events, total=10_000, page=1, page_size=items, total_pages=100)
+
+
+def listings_page(items: int) -> PaginatedMarketplaceListings:
+    """Como GET /marketplace/listings: ListingResponse.model_validate por fila"""
+    now = datetime.now(timezone.utc)
+    listings = [
+        ListingResponse.model_validate({
+            "id": uuid.uuid4(),
+            "title": f"Entrada VIP {i}",
+            "description": "Reventa por viaje, entrega inmediata",
+            "price": 180.0 + i,
+            "original_price": 150.0,
+            "is_negotiable": i % 2 == 0,
+            "is_featured": False,
+            "status": "ACTIVE",
+            "seller_notes": None,
+            "transfer_method": "digital",
+            "created_at": now,
+            "expires_at": now + timedelta(days=7),
+            "sold_at": None,
+            "views_count": str(i * 3),
+            "inquiries_count": "0",
+            "event": {
+                "id": uuid.uuid4(), "title": f"Festival {i}", "startDate": now,
+                "venue": "Arena Perú, Lima", "photoUrl": "https://cdn.example/photo.jpg",
+            },
+            "seller": {"id": uuid.uuid4(), "firstName": "Ana", "lastName": "Pérez", "profilePhoto": None},
+            "ticket_id": uuid.uuid4(),
+            "event_id": uuid.uuid4(),
+            "seller_id": uuid.uuid4(),
+            "buyer_id": None,
+            "ticket_type_id": uuid.uuid4(),
+        })
+        for i in range(items)
+    ]
+    return PaginatedMarketplaceListings(items=listings, total=10_000, page=1, pageSize=items, totalPages=100)
+
+
+def my_tickets_page(items: int) -> dict:
+    """Como GET /tickets/my-tickets: dicts armados en el endpoint (sin response_model)"""
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "items": [
+            {
+                "id": str(uuid.uuid4()),
+                "price": 120.0,
+                "purchaseDate": now,
+                "status": "ACTIVE",
+                "isValid": True,
+                "qrCode": "TKT-" + uuid.uuid4().hex,
+                "code": "TKT-" + uuid.uuid4().hex,
+                "event": {
+                    "id": str(uuid.uuid4()),
+                    "title": f"Concierto {i}",
+                    "startDate": now,
+                    "start_date": now,
+                    "venue": "Estadio Nacional, Lima",
+                    "cover_image": "iVBORw0KGgo" * 200,  # miniatura base64 (~2 KB)
+                    "photoUrl": "https://api.example/api/events/x/photo?v=abcd&size=card",
+                },
+                "ticketType": {"id": str(uuid.uuid4()), "name": "General"},
+                "isListed": False,
+                "listingId": None,
+            }
+            for i in range(items)
+        ],
+        "total": 10_000,
+        "page": 1,
+        "page_size": items,
+        "next_cursor": None,
+    }
+
+
+# ============= VARIANTES =============
+
+def fastapi_body(loop, field, content, response_class) -> bytes:
+    """Lo que hace FastAPI con el valor devuelto por el endpoint"""
+    serialized = loop.run_until_complete(serialize_response(field=field, response_content=content))
+    return response_class(serialized).body
+
+
+def timed(fn, runs: int) -> list:
+    fn()  # calentar (TypeAdapter, caches de pydantic)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(label: str, samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{label:<12} p50={statistics.median(samples):7.3f} ms   p95={p95:7.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON de respuestas")
+    parser.add_argument("--items", type=int, default=100, help="ítems por página")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ("/events/search", search_page(args.items), EventSearchResponse),
+        ("/marketplace/listings", listings_page(args.items), PaginatedMarketplaceListings),
+        ("/tickets/my-tickets", my_tickets_page(args.items), None),
+    ]
+
+    print(f"⏱️  {args.runs} repeticiones, páginas de {args.items} ítems\n")
+    loop = asyncio.new_event_loop()
+    for route, content, model in cases:
+        field = create_response_field(name="Response", type_=model) if model else None
+        before_body = fastapi_body(loop, field, content, JSONResponse)
+        trusted_body = trusted_response(content, model).body
+        if json.loads(before_body) != json.loads(trusted_body):
+            print(f"❌ {route}: la salida de confianza no coincide con la de FastAPI")
+            sys.exit(1)
+
+        before = timed(lambda: fastapi_body(loop, field, content, JSONResponse), args.runs)
+        with_orjson = timed(lambda: fastapi_body(loop, field, content, ORJSONResponse), args.runs)
+        trusted = timed(lambda: trusted_response(content, model).body, args.runs)
+
+        speedup = statistics.median(before) / statistics.median(trusted)
+        print(f"📦 {route} ({len(trusted_body) / 1024:.0f} KB)")
+        print("   " + summarize("antes", before))
+        print("   " + summarize("orjson", with_orjson))
+        print("   " + summarize("confianza", trusted))
+        print(f"   ⚡ {speedup:.1f}x más rápido (p50)\n")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Prueba de concurrencia de las reservas de stock: N compras en paralelo (1.000
+por defecto) contra un tipo de ticket con 100 entradas.
+
+Crea un esquema temporal `bench_holds` en la base de datos configurada con las
+tablas de la app (schema_translate_map, no toca las reales) y corre:
+
+- antes: el flujo anterior (leer quantity_available - sold_quantity, validar
+  y sumar sold_quantity en Python al aprobar), sin el CHECK de stock;
+- ahora: PurchaseService.create_pending_purchase (UPDATE condicional de
+  held_quantity) y luego, a la vez, aprobación de la mitad de las compras
+  (InventoryService.convert) y barrido de todas como vencidas
+  (InventoryService.sweep_expired): cada reserva termina vendida o liberada,
+  nunca las dos.
+
+Falla (exit 1) si "ahora" vende o reserva más que el stock o descuadra.
+
+USO:
+    python -m app.scripts.bench_purchase_holds
+    python -m app.scripts.bench_purchase_holds --purchases 1000 --stock 100 --workers 50 --keep
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.event import Event, EventStatus
+from app.models.purchase import Purchase
+from app.models.ticket_type import TicketType
+from app.models.user import User
+from app.services.inventory_service import InventoryService, purchase_quantities
+from app.services.purchase_service import PurchaseService
+
+SCHEMA = "bench_holds"
+
+
+def setup(engine, stock: int):
+    print(f"🏗️  Creando esquema {SCHEMA}...")
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine)
+
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = User(email="bench@ticketify.test", password="x", firstName="Bench", lastName="Holds")
+        db.add(user)
+        db.flush()
+        now = datetime.now(timezone.utc)
+        event = Event(
+            title="Preventa", description="Salida a la venta", venue="Estadio Nacional, Lima",
+            startDate=now + timedelta(days=30), endDate=now + timedelta(days=30, hours=4),
+            totalCapacity=stock, status=EventStatus.PUBLISHED, organizer_id=user.id,
+        )
+        db.add(event)
+        db.flush()
+        ticket_type = TicketType(event_id=event.id, name="General", price=100, quantity_available=stock)
+        db.add(ticket_type)
+        db.commit()
+        return user.id, event.id, ticket_type.id
+
+
+def reset_stock(engine, ticket_type_id, constraint: bool) -> None:
+    # SQL textual: schema_translate_map no aplica, el esquema va explícito
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {SCHEMA}.purchases"))
+        conn.execute(
+            text(f"UPDATE {SCHEMA}.ticket_types SET sold_quantity = 0, held_quantity = 0 WHERE id = :id"),
+            {"id": ticket_type_id}
+        )
+        conn.execute(text(f"ALTER TABLE {SCHEMA}.ticket_types DROP CONSTRAINT IF EXISTS ck_ticket_types_stock"))
+        if constraint:
+            conn.execute(text(
+                f"ALTER TABLE {SCHEMA}.ticket_types ADD CONSTRAINT ck_ticket_types_stock "
+                "CHECK (held_quantity >= 0 AND sold_quantity + held_quantity <= quantity_available)"
+            ))
+
+
+def stock(engine, ticket_type_id):
+    with engine.connect() as conn:
+        return conn.execute(
+            text(f"SELECT sold_quantity, held_quantity FROM {SCHEMA}.ticket_types WHERE id = :id"),
+            {"id": ticket_type_id}
+        ).one()
+
+
+def run_parallel(fn, count: int, workers: int) -> list:
+    # create_pending_purchase imprime el código de promoción: se silencia
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, range(count)))
+
+
+def summarize(label: str, samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{label:<10} p50={statistics.median(samples):7.2f} ms   p95={p95:7.2f} ms"
+
+
+def before(Session, user_id, event_id, ticket_type_id):
+    """Flujo anterior: validar leyendo y sumar sold_quantity al aprobar (lectura-modificación-escritura)"""
+    def buy(_):
+        start = time.perf_counter()
+        with Session() as db:
+            ticket_type = db.get(TicketType, ticket_type_id)
+            if ticket_type.quantity_available - ticket_type.sold_quantity < 1:
+                return False, (time.perf_counter() - start) * 1000
+            db.add(Purchase(
+                user_id=user_id, event_id=event_id, total_amount=100, subtotal=100,
+                quantity=1, unit_price=100, buyer_email="bench@ticketify.test"
+            ))
+            ticket_type.sold_quantity += 1
+            db.commit()
+        return True, (time.perf_counter() - start) * 1000
+    return buy
+
+
+def after(Session, user_id, event_id, ticket_type_id):
+    def buy(_):
+        start = time.perf_counter()
+        with Session() as db:
+            try:
+                purchase, _ = PurchaseService.create_pending_purchase(
+                    db, user_id, event_id, [{"ticketTypeId": ticket_type_id, "quantity": 1}]
+                )
+                return purchase.id, (time.perf_counter() - start) * 1000
+            except HTTPException:
+                return None, (time.perf_counter() - start) * 1000
+    return buy
+
+
+def settle(Session, purchase_ids: list, workers: int):
+    """
+    Aprueba la mitad de las compras mientras barridos intercalados dan todas
+    por vencidas. Una aprobación que llega tarde vende solo si queda stock.
+    """
+    far_future = datetime.now(timezone.utc) + timedelta(days=1)
+    tasks = [("approve", purchase_id) for purchase_id in purchase_ids[::2]]
+    tasks += [("sweep", None)] * (len(purchase_ids) // 10 + 1)
+    random.Random(42).shuffle(tasks)
+
+    def job(i):
+        kind, purchase_id = tasks[i]
+        with Session() as db:
+            if kind == "sweep":
+                released = InventoryService.sweep_expired(db, now=far_future, batch=10)
+                db.commit()
+                return released
+            purchase = db.get(Purchase, purchase_id)
+            try:
+                converted = InventoryService.convert(db, purchase, purchase_quantities(purchase))
+                db.commit()
+                return "converted" if converted else "late_sale"
+            except HTTPException:
+                db.rollback()
+                return "sold_out"
+
+    results = run_parallel(job, len(tasks), workers)
+    # Lo que los barridos concurrentes no alcanzaron (filas bloqueadas por aprobaciones)
+    with Session() as db:
+        while True:
+            released = InventoryService.sweep_expired(db, now=far_future)
+            db.commit()
+            results.append(released)
+            if not released:
+                break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de concurrencia de reservas de stock")
+    parser.add_argument("--purchases", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=50, help="compras simultáneas (conexiones)")
+    parser.add_argument("--keep", action="store_true", help="no borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    engine = create_engine(
+        settings.DATABASE_URL, pool_size=args.workers, max_overflow=0
+    ).execution_options(schema_translate_map={None: SCHEMA})
+    Session = sessionmaker(bind=engine)
+    failed = False
+
+    try:
+        user_id, event_id, ticket_type_id = setup(engine, args.stock)
+        print(f"\n🎟️  {args.purchases:,} compras de 1 entrada, {args.workers} a la vez, stock {args.stock}\n")
+
+        reset_stock(engine, ticket_type_id, constraint=False)
+        results = run_parallel(before(Session, user_id, event_id, ticket_type_id), args.purchases, args.workers)
+        accepted = sum(1 for ok, _ in results if ok)
+        sold, _ = stock(engine, ticket_type_id)
+        print(f"❌ antes: {accepted} compras aceptadas, sold_quantity={sold} (stock {args.stock})")
+        print("   " + summarize("compra", [ms for _, ms in results]))
+
+        reset_stock(engine, ticket_type_id, constraint=True)
+        results = run_parallel(after(Session, user_id, event_id, ticket_type_id), args.purchases, args.workers)
+        purchase_ids = [purchase_id for purchase_id, _ in results if purchase_id is not None]
+        sold, held = stock(engine, ticket_type_id)
+        ok = len(purchase_ids) == args.stock and held == args.stock and sold == 0
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} ahora: {len(purchase_ids)} reservas, {args.purchases - len(purchase_ids)} "
+              f"rechazadas sin stock, held_quantity={held}")
+        print("   " + summarize("reserva", [ms for _, ms in results]))
+
+        outcomes = settle(Session, purchase_ids, args.workers)
+        converted, late = outcomes.count("converted"), outcomes.count("late_sale")
+        released = sum(o for o in outcomes if isinstance(o, int))
+        sold, held = stock(engine, ticket_type_id)
+        ok = held == 0 and sold == converted + late and converted + released == len(purchase_ids)
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} aprobación vs barrido: {converted} reservas vendidas, {released} liberadas, "
+              f"{late} aprobadas tras vencer vendidas con el stock liberado")
+        print(f"   sold_quantity={sold}, held_quantity={held}")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            print(f"🧹 Esquema {SCHEMA} eliminado")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
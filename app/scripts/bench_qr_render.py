@@ -0,0 +1,87 @@
+"""
+Microbenchmark del render de QR: N códigos (1.000 por defecto) uno tras otro
+en el proceso (render_qr) contra render_qr_batch repartido en el pool de
+procesos, en PNG y SVG.
+
+El arranque del pool (spawn) se mide aparte con un lote de calentamiento: en
+la app se paga una sola vez por proceso. Del lote se mide también cuándo llega
+el primer resultado (se devuelven a medida que terminan).
+
+No necesita base de datos ni toca la caché de QR.
+
+USO:
+    python -m app.scripts.bench_qr_render
+    python -m app.scripts.bench_qr_render --codes 1000 --workers 4 --error-correction M --box-size 10
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from app.core.config import settings
+from app.utils import qr_generator
+from app.utils.qr_generator import generate_ticket_qr_data, render_qr, render_qr_batch
+
+
+def payloads(count: int) -> list:
+    event_id = str(uuid.uuid4())
+    return [generate_ticket_qr_data(str(uuid.uuid4()), event_id) for _ in range(count)]
+
+
+def run_single(datas: list, fmt: str, error_correction: str, box_size: int):
+    start = time.perf_counter()
+    total = sum(len(render_qr(data, fmt, error_correction, box_size)) for data in datas)
+    return time.perf_counter() - start, None, total
+
+
+def run_pool(datas: list, fmt: str, error_correction: str, box_size: int):
+    start = time.perf_counter()
+    first, total, count = None, 0, 0
+    for _, image in render_qr_batch(datas, fmt, error_correction, box_size):
+        if first is None:
+            first = time.perf_counter() - start
+        total += len(image)
+        count += 1
+    assert count == len(datas)
+    return time.perf_counter() - start, first, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark del render de QR")
+    parser.add_argument("--codes", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="procesos del pool")
+    parser.add_argument("--error-correction", choices=["L", "M", "Q", "H"], default="M")
+    parser.add_argument("--box-size", type=int, default=10)
+    parser.add_argument("--formats", nargs="+", choices=["png", "svg"], default=["png", "svg"])
+    args = parser.parse_args()
+
+    settings.QR_PROCESS_WORKERS = args.workers
+    settings.QR_POOL_MIN_BATCH = 1
+    datas = payloads(args.codes)
+
+    start = time.perf_counter()
+    list(render_qr_batch(datas[:args.workers], "png"))
+    print(f"\n🔳 {args.codes:,} QR, corrección {args.error_correction}, box {args.box_size}, "
+          f"pool de {args.workers} procesos (arranque {time.perf_counter() - start:.2f} s)\n")
+
+    print(f"{'formato':<8} {'modo':<8} {'total s':>8} {'QR/s':>8} {'primero ms':>11} {'KB prom.':>9}")
+    for fmt in args.formats:
+        single = run_single(datas, fmt, args.error_correction, args.box_size)
+        pooled = run_pool(datas, fmt, args.error_correction, args.box_size)
+        for label, (elapsed, first, total) in (("1 hilo", single), ("pool", pooled)):
+            first_ms = f"{first * 1000:.1f}" if first is not None else "-"
+            print(f"{fmt:<8} {label:<8} {elapsed:>8.2f} {args.codes / elapsed:>8,.0f} "
+                  f"{first_ms:>11} {total / args.codes / 1024:>9.1f}")
+        print(f"{'':<8} ⚡ x{single[0] / pooled[0]:.1f} con el pool\n")
+
+    qr_generator.get_process_pool().shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark de la emisión de tickets al aprobarse una compra, para pedidos de
+1, 10 y 100 entradas (repartidas entre --types tipos).
+
+Crea un esquema temporal `bench_issuance` en la base de datos configurada con
+las tablas de la app (schema_translate_map, no toca las reales) y compara:
+
+- antes: un Ticket por vez con db.add + db.flush (para tener el id del QR),
+  la imagen del QR en base64 guardada en el ticket y una consulta del tipo de
+  ticket por cada tipo del pedido;
+- ahora: PurchaseService._build_ticket_rows (ids generados en Python, tipos en
+  una consulta, solo el contenido del QR) y un solo INSERT de todas las filas.
+
+Por pedido cuenta las sentencias enviadas a la base (idas y vueltas), el
+tiempo dentro de la base y el total.
+
+USO:
+    python -m app.scripts.bench_ticket_issuance
+    python -m app.scripts.bench_ticket_issuance --sizes 1 10 100 --runs 20 --types 2 --keep
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.event import Event, EventStatus
+from app.models.payment import Payment, PaymentMethod, PaymentStatus
+from app.models.purchase import Purchase, PurchaseStatus
+from app.models.ticket import Ticket, TicketStatus
+from app.models.ticket_type import TicketType
+from app.models.user import User
+from app.services.purchase_service import PurchaseService
+from app.utils.qr_generator import generate_qr_image, generate_ticket_qr_data
+
+SCHEMA = "bench_issuance"
+
+
+class StatementCounter:
+    """Sentencias y tiempo en base de datos del engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        self.db_ms = 0.0
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["bench_start"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.db_ms += (time.perf_counter() - conn.info.pop("bench_start")) * 1000
+
+    def reset(self):
+        self.count, self.db_ms = 0, 0.0
+
+
+def setup(engine, types: int):
+    print(f"🏗️  Creando esquema {SCHEMA}...")
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    Base.metadata.create_all(engine)
+
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = User(email="bench@ticketify.test", password="x", firstName="Bench", lastName="Issuance")
+        db.add(user)
+        db.flush()
+        now = datetime.now(timezone.utc)
+        event_row = Event(
+            title="Emisión", description="Pedidos grandes", venue="Estadio Nacional, Lima",
+            startDate=now + timedelta(days=30), endDate=now + timedelta(days=30, hours=4),
+            totalCapacity=1_000_000, status=EventStatus.PUBLISHED, organizer_id=user.id,
+        )
+        db.add(event_row)
+        db.flush()
+        ticket_types = [
+            TicketType(event_id=event_row.id, name=f"Zona {i + 1}", price=100 + i, quantity_available=1_000_000)
+            for i in range(types)
+        ]
+        db.add_all(ticket_types)
+        db.commit()
+        return user.id, event_row.id, [ticket_type.id for ticket_type in ticket_types]
+
+
+def new_purchase(db, user_id, event_id, size: int) -> Purchase:
+    payment = Payment(
+        user_id=user_id, amount=size * 100, paymentMethod=PaymentMethod.MERCADOPAGO,
+        status=PaymentStatus.COMPLETED, transactionId="bench", paymentDate=datetime.now(timezone.utc)
+    )
+    db.add(payment)
+    db.flush()
+    purchase = Purchase(
+        user_id=user_id, event_id=event_id, total_amount=size * 100, subtotal=size * 100,
+        quantity=size, unit_price=100, buyer_email="bench@ticketify.test",
+        status=PurchaseStatus.COMPLETED, payment_id=payment.id
+    )
+    db.add(purchase)
+    db.commit()
+    return purchase
+
+
+def split(size: int, ticket_type_ids: list) -> dict:
+    """size entradas repartidas entre los tipos"""
+    quantities = {}
+    for i in range(size):
+        ticket_type_id = ticket_type_ids[i % len(ticket_type_ids)]
+        quantities[ticket_type_id] = quantities.get(ticket_type_id, 0) + 1
+    return quantities
+
+
+def issue_before(db, purchase: Purchase, quantities: dict) -> int:
+    """Flujo anterior de finalize_purchase_transaction (paso 4)"""
+    created = 0
+    for ticket_type_id, quantity in quantities.items():
+        ticket_type = db.query(TicketType).filter(TicketType.id == ticket_type_id).first()
+        for _ in range(quantity):
+            ticket = Ticket(
+                event_id=purchase.event_id, user_id=purchase.user_id, purchase_id=purchase.id,
+                status=TicketStatus.ACTIVE, ticket_type_id=ticket_type_id, price=ticket_type.price,
+                isValid=True, payment_id=purchase.payment_id
+            )
+            db.add(ticket)
+            db.flush()
+            ticket.qrCode = generate_qr_image(generate_ticket_qr_data(str(ticket.id), str(purchase.event_id)))
+            created += 1
+    db.flush()
+    return created
+
+
+def issue_after(db, purchase: Purchase, quantities: dict) -> int:
+    rows = PurchaseService._build_ticket_rows(db, purchase, quantities)
+    db.execute(insert(Ticket), rows)
+    return len(rows)
+
+
+def measure(Session, counter, issue, user_id, event_id, ticket_type_ids, size: int, runs: int):
+    statements, db_ms, total_ms = [], [], []
+    for _ in range(runs):
+        with Session() as db:
+            purchase = new_purchase(db, user_id, event_id, size)
+            quantities = split(size, ticket_type_ids)
+            counter.reset()
+            start = time.perf_counter()
+            created = issue(db, purchase, quantities)
+            db.commit()
+            total_ms.append((time.perf_counter() - start) * 1000)
+            statements.append(counter.count)
+            db_ms.append(counter.db_ms)
+            assert created == size
+    return statistics.median(statements), statistics.median(db_ms), statistics.median(total_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de emisión de tickets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="entradas por pedido")
+    parser.add_argument("--runs", type=int, default=20, help="pedidos por tamaño")
+    parser.add_argument("--types", type=int, default=2, help="tipos de ticket por pedido")
+    parser.add_argument("--keep", action="store_true", help="no borrar el esquema al terminar")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL).execution_options(schema_translate_map={None: SCHEMA})
+    Session = sessionmaker(bind=engine)
+    counter = StatementCounter(engine)
+
+    try:
+        user_id, event_id, ticket_type_ids = setup(engine, args.types)
+        print(f"\n🎫 Emisión de tickets, mediana de {args.runs} pedidos por tamaño ({args.types} tipos)\n")
+        print(f"{'entradas':>8} │ {'sentencias':>10} {'ms base':>8} {'ms total':>9} (antes) │ "
+              f"{'sentencias':>10} {'ms base':>8} {'ms total':>9} (ahora)")
+        for size in args.sizes:
+            before = measure(Session, counter, issue_before, user_id, event_id, ticket_type_ids, size, args.runs)
+            after = measure(Session, counter, issue_after, user_id, event_id, ticket_type_ids, size, args.runs)
+            print(f"{size:>8} │ {before[0]:>10.0f} {before[1]:>8.2f} {before[2]:>9.2f}         │ "
+                  f"{after[0]:>10.0f} {after[1]:>8.2f} {after[2]:>9.2f}")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            print(f"\n🧹 Esquema {SCHEMA} eliminado")
+
+
+if __name__ == "__main__":
+    main()
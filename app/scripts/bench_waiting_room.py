@@ -0,0 +1,143 @@
+"""
+Prueba de carga de la sala de espera: un pico de llegadas a una salida a la
+venta, sin sala (antes) y con sala (ahora), en reloj simulado.
+
+Cada comprador llega, se forma (MemoryRoomStore o, con --redis, el script Lua
+de RedisRoomStore contra REDIS_URL), consulta su turno cada pollAfterSeconds
+y, al ser admitido, entra al flujo de compra (create-preference: compra,
+reserva de stock y preferencia de MercadoPago). Se cuenta por segundo:
+
+- llegadas;
+- entradas al flujo de compra: sin sala, todas al llegar; con sala, a lo sumo
+  rate (+ el burst);
+- consultas a la base de datos estimadas: entradas × --purchase-queries
+  (formarse autentica solo con el JWT y el estado del turno no consulta).
+
+La tabla agrupa de a --bucket segundos y muestra el máximo por segundo.
+
+Además mide el costo real de una consulta de turno (status) en el almacén.
+
+USO:
+    python -m app.scripts.bench_waiting_room
+    python -m app.scripts.bench_waiting_room --arrivals 5000 --spike-seconds 2 --rate 50 --redis
+"""
+
+import argparse
+import heapq
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+import redis
+
+from app.core.config import settings
+from app.services.waiting_room import MemoryRoomStore, RedisRoomStore, poll_after
+
+TICK = 0.1  # segundos simulados por paso
+
+
+def arrival_times(args) -> list:
+    """Goteo de --baseline por segundo y, a los --lead segundos, --arrivals en --spike-seconds"""
+    times = [i / args.baseline for i in range(int(args.baseline * args.lead))]
+    spike = [args.lead + i * args.spike_seconds / args.arrivals for i in range(args.arrivals)]
+    tail = [args.lead + args.spike_seconds + i / args.baseline for i in range(int(args.baseline * args.lead))]
+    return times + spike + tail
+
+
+def simulate(store, event_id: str, arrivals: list, rate: float, burst: float, t0: float):
+    """Reloj simulado (t0 + segundos); devuelve entradas por segundo, consultas y tiempos de status"""
+    entries, polls, status_ms, waits = Counter(), 0, [], []
+    pending = []  # (próxima consulta, token, llegada)
+    queue = list(arrivals)
+    queue.reverse()
+    now = 0.0
+    while queue or pending:
+        now += TICK
+        while queue and queue[-1] <= now:
+            arrived = queue.pop()
+            turn = store.join(event_id, uuid.uuid4().hex, rate, burst, t0 + now)
+            if turn.position:
+                heapq.heappush(pending, (now + poll_after(turn), turn.token, arrived))
+            else:
+                entries[int(now)] += 1
+                waits.append(now - arrived)
+        while pending and pending[0][0] <= now:
+            _, token, arrived = heapq.heappop(pending)
+            start = time.perf_counter()
+            _, turn = store.status(event_id, token, t0 + now)
+            status_ms.append((time.perf_counter() - start) * 1000)
+            polls += 1
+            if turn.position:
+                heapq.heappush(pending, (now + poll_after(turn), token, arrived))
+            else:
+                entries[int(now)] += 1
+                waits.append(now - arrived)
+    return entries, polls, status_ms, waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la sala de espera")
+    parser.add_argument("--arrivals", type=int, default=5000, help="compradores del pico")
+    parser.add_argument("--spike-seconds", type=float, default=2.0)
+    parser.add_argument("--baseline", type=float, default=5.0, help="llegadas por segundo fuera del pico")
+    parser.add_argument("--lead", type=float, default=5.0, help="segundos de goteo antes y después del pico")
+    parser.add_argument("--rate", type=int, default=50, help="waiting_room_rate del evento")
+    parser.add_argument("--purchase-queries", type=int, default=10,
+                        help="consultas SQL estimadas por create-preference")
+    parser.add_argument("--bucket", type=int, default=5, help="segundos por fila de la tabla")
+    parser.add_argument("--redis", action="store_true", help="usar RedisRoomStore contra REDIS_URL")
+    args = parser.parse_args()
+
+    if args.redis:
+        client = redis.Redis.from_url(settings.REDIS_URL)
+        client.ping()
+        store = RedisRoomStore(client, settings.WAITING_ROOM_TOKEN_TTL_SECONDS)
+    else:
+        store = MemoryRoomStore(settings.WAITING_ROOM_TOKEN_TTL_SECONDS)
+    event_id = f"bench-{uuid.uuid4()}"
+    burst = max(1.0, args.rate * settings.WAITING_ROOM_BURST_SECONDS)
+    arrivals = arrival_times(args)
+
+    print(f"\n🎫 {len(arrivals):,} compradores ({args.arrivals:,} en {args.spike_seconds:g} s), "
+          f"sala a {args.rate}/s, almacén {'Redis' if args.redis else 'memoria'}\n")
+
+    started = time.perf_counter()
+    entries, polls, status_ms, waits = simulate(store, event_id, arrivals, args.rate, burst, time.time())
+    elapsed = time.perf_counter() - started
+
+    arrived = Counter(int(t) for t in arrivals)
+    last = max(max(entries), max(arrived))
+    q = args.purchase_queries
+    print(f"{'segundos':>9} {'llegadas':>9} │ {'compras/s antes':>15} {'SQL/s antes':>11} │ "
+          f"{'compras/s ahora':>15} {'SQL/s ahora':>11}")
+    for start in range(0, last + 1, args.bucket):
+        seconds = range(start, min(start + args.bucket, last + 1))
+        before = max(arrived[s] for s in seconds)
+        after = max(entries[s] for s in seconds)
+        print(f"{start:>4}-{seconds[-1]:<4} {sum(arrived[s] for s in seconds):>9,} │ "
+              f"{before:>15,} {before * q:>11,} │ {after:>15,} {after * q:>11,}")
+
+    steady = max(entries.values())
+    samples = sorted(status_ms)
+    print(f"\n📈 pico de SQL/s: antes {max(arrived.values()) * q:,}, ahora {steady * q:,} "
+          f"(compras/s ≤ {steady} con rate {args.rate} + burst {burst:g})")
+    print(f"⏳ espera: p50 {statistics.median(waits):.1f} s, máx {max(waits):.1f} s")
+    print(f"🔁 {polls:,} consultas de turno ({polls / len(arrivals):.1f} por comprador), "
+          f"status p50={statistics.median(samples) * 1000:.0f} µs "
+          f"p95={samples[int(len(samples) * 0.95)] * 1000:.0f} µs "
+          f"(simulación en {elapsed:.1f} s)")
+
+    ok = sum(entries.values()) == len(arrivals) and steady <= args.rate + burst
+    print(f"{'✅' if ok else '❌'} todos admitidos y nunca más de rate + burst por segundo")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Copia al blob store (BLOB_STORE_BACKEND) las fotos que siguen en la columna
+events.photo y completa photo_hash/photo_mime/photo_size. Una foto por vez
+(sin cargar todas en memoria) y un commit por foto; la columna vieja queda
+en NULL una vez copiada.
+
+Reemplaza a la copia que hacía la migración event_photo_blob_store: las
+migraciones no dependen del código de la app ni de la configuración del blob
+store. Es idempotente: se puede volver a correr y solo toca fotos sin copiar.
+
+Con --restore hace lo inverso (vuelve a escribir events.photo desde el blob
+store); correrlo antes de bajar esa migración.
+
+USO:
+    python -m app.scripts.move_event_photos_to_blob_store
+    python -m app.scripts.move_event_photos_to_blob_store --dry-run
+    python -m app.scripts.move_event_photos_to_blob_store --restore
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+root_dir = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_dir))
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.utils.blob_store import detect_image_mime, get_blob_store
+
+
+def move(dry_run: bool = False) -> int:
+    """Devuelve la cantidad de fotos copiadas al blob store"""
+    store = get_blob_store()
+    with SessionLocal() as db:
+        event_ids = db.execute(text("SELECT id FROM events WHERE photo IS NOT NULL")).scalars().all()
+        print(f"🔍 {len(event_ids)} fotos por copiar")
+
+        moved = 0
+        for event_id in event_ids:
+            photo = db.execute(text("SELECT photo FROM events WHERE id = :id"), {"id": event_id}).scalar()
+            if not photo:
+                continue
+            data = bytes(photo)
+            if not dry_run:
+                db.execute(
+                    text(
+                        "UPDATE events SET photo_hash = :hash, photo_mime = :mime, photo_size = :size, "
+                        "photo = NULL WHERE id = :id"
+                    ),
+                    {
+                        "hash": store.put(data),
+                        "mime": detect_image_mime(data) or "image/jpeg",  # antes se servían siempre como JPEG
+                        "size": len(data),
+                        "id": event_id,
+                    },
+                )
+                db.commit()
+            moved += 1
+
+        if dry_run:
+            print(f"🧪 Simulación: {moved} fotos se copiarían")
+        else:
+            print(f"✅ {moved} fotos copiadas al blob store")
+        return moved
+
+
+def restore(dry_run: bool = False) -> int:
+    """Devuelve la cantidad de fotos escritas de nuevo en events.photo"""
+    store = get_blob_store()
+    with SessionLocal() as db:
+        rows = db.execute(
+            text("SELECT id, photo_hash FROM events WHERE photo_hash IS NOT NULL AND photo IS NULL")
+        ).fetchall()
+        print(f"🔍 {len(rows)} fotos por restaurar")
+
+        restored = 0
+        for row in rows:
+            if not store.exists(row.photo_hash):
+                print(f"   ⚠️ Blob inexistente para el evento {row.id}: {row.photo_hash}")
+                continue
+            if not dry_run:
+                db.execute(
+                    text("UPDATE events SET photo = :photo WHERE id = :id"),
+                    {"photo": store.read(row.photo_hash), "id": row.id},
+                )
+                db.commit()
+            restored += 1
+
+        if dry_run:
+            print(f"🧪 Simulación: {restored} fotos se restaurarían")
+        else:
+            print(f"✅ {restored} fotos restauradas en events.photo")
+        return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copia de las fotos de eventos al blob store")
+    parser.add_argument("--restore", action="store_true", help="copiar del blob store a events.photo")
+    parser.add_argument("--dry-run", action="store_true", help="no guardar cambios")
+    args = parser.parse_args()
+    if args.restore:
+        restore(dry_run=args.dry_run)
+    else:
+        move(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine
+from app.repositories.event_repository import geocode_event, refresh_event_aggregates
 from app.models import (
     User, Event, EventCategory, TicketType, EventStatus,
     Role, Permission, DocumentType, Gender
@@ -300,6 +301,7 @@ def create_events(db: Session, organizer: User, categories: list):
             category_id=event_data["category"].id,
             createdAt=datetime.utcnow()
         )
+        geocode_event(event)
         db.add(event)
         created_events.append(event)
         print(f"   ✅ {event_data['title']}")
@@ -348,6 +350,9 @@ def create_ticket_types(db: Session, events: list):
             )
             db.add(ticket_type)
             ticket_count += 1
+
+        db.flush()
+        refresh_event_aggregates(db, event.id)
     
     db.commit()
     print(f"   ✨ {ticket_count} tipos de tickets creados")
@@ -37,19 +37,21 @@ class AdminService:
         page: int = 1,
         page_size: int = 8,
         search: Optional[str] = None,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None
     ) -> PaginatedUsersResponse:
         """Obtener usuarios paginados (excluyendo admins)"""
         
         # Delegamos la lógica de consulta al repositorio
-        users, total = self.user_repo.get_non_admin_users_paginated(
+        users, total, next_cursor = self.user_repo.get_non_admin_users_paginated(
             page=page,
             page_size=page_size,
             search=search,
-            is_active=is_active
+            is_active=is_active,
+            cursor=cursor
         )
         
-        total_pages = math.ceil(total / page_size)
+        total_pages = math.ceil(total / page_size) if total is not None else None
         
         # Convertir a response
         user_responses = [
@@ -72,7 +74,8 @@ class AdminService:
             total=total,
             page=page,
             pageSize=page_size,
-            totalPages=total_pages
+            totalPages=total_pages,
+            nextCursor=next_cursor
         )
     
     def get_user_by_id(self, user_id: UUID) -> Optional[UserDetailResponse]:
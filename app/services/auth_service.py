@@ -282,6 +282,17 @@ class AuthService:
             mercadopago=user.get_mercadopago_info()  # Info de MercadoPago
         )
     
+    def upload_profile_photo(self, user_id: uuid.UUID, photo_data: bytes, mime_type: str) -> Optional[User]:
+        """Guarda la foto de perfil (ya procesada) del usuario"""
+        user = self.user_repo.get_by_id(user_id)
+        if not user:
+            return None
+
+        user.upload_photo(photo_data, mime_type)
+        self.db.commit()
+        self.db.refresh(user)
+        return user
+    
     def login_with_google(self, data: GoogleLoginRequest) -> AuthResponse:
         """Login or register user using Google OAuth"""
         # 1. Buscar si el usuario ya existe
@@ -0,0 +1,457 @@
+"""
+Read model en memoria del catálogo público: eventos publicados que aún no
+empiezan, con sus agregados de precio y stock (columnas de Event).
+
+Es una fracción pequeña del histórico pero se consulta todo el tiempo, así que
+cada worker guarda una copia y responde desde memoria:
+
+- destacados / próximos (/events/featured, /events/);
+- /events/search por categoría, rango de precio y fechas, con los órdenes
+  date, price_asc, price_desc, popularity y newest, paginado con page.
+
+Todo lo demás (texto, ubicación, near=, cursor, otros estados) va a la base de
+datos como siempre; las consultas devuelven None cuando no pueden responder.
+
+Frescura:
+- las escrituras de este proceso llegan por on_commit_invalidation (las mismas
+  etiquetas que invalidan la caché de respuestas) y despiertan al refresco;
+- las de otros workers, sondeando updatedAt por encima de la marca de agua
+  (con solape, por transacciones largas y lag de la réplica) cada
+  CATALOG_POLL_SECONDS;
+- borrados y cambios de categorías de otros workers, con la recarga completa
+  cada CATALOG_FULL_RELOAD_SECONDS.
+
+Los eventos cuya fecha ya pasó se descartan al consultar. Los lectores nunca
+bloquean: el hilo de refresco arma un snapshot nuevo y lo publica de una vez.
+"""
+import bisect
+import logging
+import math
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.core.metrics import CATALOG_EVENTS, CATALOG_MEMORY_BYTES, CATALOG_QUERIES
+from app.core.response_cache import CATEGORIES, on_commit_invalidation
+from app.models.event import Event
+from app.models.event_category import EventCategory
+from app.repositories.event_query import EventQuery, keyset_for
+from app.schemas.event import EventResponse
+
+logger = logging.getLogger(__name__)
+
+# Órdenes de /events/search que se resuelven en memoria
+MEMORY_SORTS = ("date", "relevance", "price_asc", "price_desc", "popularity", "newest")
+
+# Se vuelve a mirar lo modificado en este margen antes de la marca de agua:
+# updatedAt es la hora de inicio de la transacción, que puede confirmar después
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+EVENTS_PER_REPORT = 10_000
+
+
+def epoch_seconds(value: datetime) -> float:
+    """Segundos epoch; las fechas sin zona se toman como UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def deep_sizeof(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Bytes de obj y de todo lo que referencia (cada objeto compartido cuenta una vez)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif isinstance(obj, BaseModel):
+        size += deep_sizeof(obj.__dict__, seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+class CatalogEntry:
+    """
+    Un evento del catálogo. Los nombres startDate/createdAt/total_sold/id
+    coinciden con las columnas para que Keyset.encode() arme el next_cursor.
+    """
+
+    __slots__ = (
+        "id", "order_id", "startDate", "createdAt", "updatedAt", "total_sold",
+        "start_ts", "end_ts", "created_ts", "min_price", "max_price", "prices", "category_id",
+        "response", "item",
+    )
+
+    def __init__(self, event: Event, response: EventResponse, item: dict):
+        self.id = event.id
+        self.order_id = event.id.int  # mismo orden que uuid en PostgreSQL
+        self.startDate = event.startDate
+        self.createdAt = event.createdAt
+        self.updatedAt = event.updatedAt
+        self.total_sold = event.total_sold or 0
+        self.start_ts = epoch_seconds(event.startDate)
+        self.end_ts = epoch_seconds(event.endDate)
+        self.created_ts = epoch_seconds(event.createdAt)
+        # Sin precio (NULL) como ±inf: ningún rango lo incluye y en los órdenes por precio va al final
+        self.min_price = float(event.min_price) if event.min_price is not None else math.inf
+        self.max_price = float(event.max_price) if event.max_price is not None else -math.inf
+        self.prices = tuple(sorted(float(t.price) for t in event.ticket_types if t.is_active))
+        self.category_id = event.category_id
+        self.response = response  # /events/, /events/featured
+        self.item = item  # /events/search (Event.to_dict)
+
+
+def _date_key(entry: CatalogEntry):
+    return entry.start_ts, entry.order_id
+
+
+# Clave y sentido de cada orden, con el mismo desempate que EventQuery.order_by()
+SORT_KEYS = {
+    "date": (_date_key, False),
+    "price_asc": (lambda e: (e.min_price, e.start_ts, e.order_id), False),
+    "price_desc": (lambda e: (e.min_price == math.inf, -e.min_price, e.start_ts, e.order_id), False),
+    "popularity": (lambda e: (e.total_sold, e.order_id), True),
+    "newest": (lambda e: (e.created_ts, e.order_id), True),
+}
+
+
+class CatalogSnapshot:
+    """
+    Vista inmutable: por id, por fecha, por categoría (ordenadas por fecha) y
+    el catálogo completo en cada orden de SORT_KEYS (se ordena al publicar,
+    no en cada consulta)
+    """
+
+    def __init__(self, entries: Dict[UUID, CatalogEntry]):
+        self.by_id = entries
+        self.by_date = sorted(entries.values(), key=_date_key)
+        self.start_keys = [e.start_ts for e in self.by_date]
+        self.by_sort = {
+            sort: self.by_date if sort == "date" else sorted(self.by_date, key=key, reverse=reverse)
+            for sort, (key, reverse) in SORT_KEYS.items()
+        }
+        self.by_category: Dict[Optional[UUID], List[CatalogEntry]] = {}
+        for entry in self.by_date:
+            self.by_category.setdefault(entry.category_id, []).append(entry)
+        self.category_start_keys = {
+            category_id: [e.start_ts for e in entries] for category_id, entries in self.by_category.items()
+        }
+
+    def upcoming(self, since: float) -> List[CatalogEntry]:
+        """Entradas con startDate >= since, por fecha"""
+        return self.by_date[bisect.bisect_left(self.start_keys, since):]
+
+    def upcoming_in(self, category_id: UUID, since: float) -> List[CatalogEntry]:
+        entries = self.by_category.get(category_id)
+        if not entries:
+            return []
+        return entries[bisect.bisect_left(self.category_start_keys[category_id], since):]
+
+
+class CatalogReadModel:
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        # Diccionarios de categoría compartidos por los item de sus eventos:
+        # se actualizan en el lugar (eventCount) sin reconstruir los eventos
+        self._categories: Dict[UUID, dict] = {}
+        self._active_slugs: Dict[str, UUID] = {}
+        self._dirty: Set[UUID] = set()
+        self._categories_dirty = False
+        self._dirty_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.watermark: Optional[datetime] = None
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self.memory_bytes = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    # ============= CICLO DE VIDA =============
+
+    def start(self) -> None:
+        """Arranca el hilo de refresco; la primera carga no bloquea el arranque de la app"""
+        if not settings.CATALOG_READ_MODEL_ENABLED or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-read-model", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.loaded_at is None or time.monotonic() - self.loaded_at >= settings.CATALOG_FULL_RELOAD_SECONDS:
+                    self.load()
+                else:
+                    self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Read model del catálogo: refresco fallido ({e})")
+            self._wake.wait(settings.CATALOG_POLL_SECONDS)
+            self._wake.clear()
+
+    def mark_dirty(self, tags: Iterable[str]) -> None:
+        """Etiquetas confirmadas por una escritura de este proceso (ver response_cache)"""
+        if self._thread is None:
+            return
+        event_ids = set()
+        categories = False
+        for tag in tags:
+            if tag.startswith("event:"):
+                event_ids.add(UUID(tag.split(":", 1)[1]))
+            elif tag == CATEGORIES:
+                categories = True
+        with self._dirty_lock:
+            self._dirty |= event_ids
+            self._categories_dirty |= categories
+        self._wake.set()
+
+    # ============= CARGA Y REFRESCO =============
+
+    @staticmethod
+    def _catalog_query() -> EventQuery:
+        return EventQuery().with_status().upcoming()
+
+    @staticmethod
+    def _load_options() -> tuple:
+        # EventResponse y /events/search llevan los ticket_types: una consulta extra por carga
+        return joinedload(Event.category), noload(Event.organizer), selectinload(Event.ticket_types)
+
+    def _load_categories(self, db: Session) -> None:
+        """Diccionarios de categoría con eventCount en dos consultas (sin cargar category.events)"""
+        counts = dict(db.execute(select(Event.category_id, func.count(Event.id)).group_by(Event.category_id)).all())
+        active_slugs = {}
+        for category in db.execute(select(EventCategory)).scalars():
+            data = category.to_dict(event_count=counts.get(category.id, 0))
+            if category.id in self._categories:
+                self._categories[category.id].update(data)
+            else:
+                self._categories[category.id] = data
+            if category.is_active:
+                active_slugs[category.slug] = category.id
+        self._active_slugs = active_slugs
+
+    def _entry(self, event: Event) -> CatalogEntry:
+        # Import diferido: event_service importa este módulo
+        from app.services.event_service import event_to_response
+
+        category_dict = self._categories.get(event.category_id) if event.category_id else None
+        item = event.to_dict(category_dict=category_dict)
+        return CatalogEntry(event, event_to_response(event), item)
+
+    def _publish(self, entries: Dict[UUID, CatalogEntry]) -> None:
+        self._snapshot = CatalogSnapshot(entries)
+        self.refreshed_at = time.time()
+        CATALOG_EVENTS.set(len(entries))
+
+    def load(self) -> None:
+        """Recarga completa"""
+        with ReadSessionLocal() as db:
+            # Marca de agua antes de leer: lo que cambie durante la carga se vuelve a mirar
+            watermark = db.scalar(select(func.max(Event.updatedAt)))
+            self._load_categories(db)
+            events = db.execute(self._catalog_query().statement(*self._load_options())).unique().scalars().all()
+            entries = {event.id: self._entry(event) for event in events}
+        with self._dirty_lock:
+            self._dirty.clear()
+            self._categories_dirty = False
+        self.watermark = watermark
+        self.loaded_at = time.monotonic()
+        self._publish(entries)
+        self.memory_bytes = deep_sizeof(self._snapshot) + deep_sizeof(self._categories)
+        CATALOG_MEMORY_BYTES.set(self.memory_bytes)
+        logger.info(f"📚 Read model del catálogo: {len(entries)} eventos ({self.memory_bytes / 1024 / 1024:.1f} MB)")
+
+    def refresh(self) -> None:
+        """Aplica las escrituras locales pendientes y lo modificado desde la marca de agua"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.load()
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+            categories_dirty, self._categories_dirty = self._categories_dirty, False
+
+        with ReadSessionLocal() as db:
+            watermark = db.scalar(select(func.max(Event.updatedAt)))
+            if self.watermark is not None:
+                since = self.watermark - WATERMARK_OVERLAP
+                rows = db.execute(select(Event.id, Event.updatedAt).where(Event.updatedAt > since)).all()
+                for event_id, updated_at in rows:
+                    entry = snapshot.by_id.get(event_id)
+                    if entry is None or entry.updatedAt != updated_at:
+                        dirty.add(event_id)
+            fresh = []
+            if dirty:
+                stmt = self._catalog_query().statement(*self._load_options()).where(Event.id.in_(dirty))
+                fresh = db.execute(stmt).unique().scalars().all()
+            if categories_dirty or fresh:
+                self._load_categories(db)
+
+            # Lo modificado que no está ni entra al catálogo (borradores, pasados) no cambia nada
+            entries = dict(snapshot.by_id)
+            removed = [entries.pop(event_id) for event_id in dirty if event_id in entries]
+            for event in fresh:
+                entries[event.id] = self._entry(event)
+
+        self.watermark = watermark or self.watermark
+        if removed or fresh:
+            self._publish(entries)
+
+    # ============= CONSULTAS =============
+
+    def upcoming(self, skip: int = 0, limit: int = 20) -> Optional[List[EventResponse]]:
+        """Publicados que aún no empiezan, por fecha; None si el read model no está listo"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            CATALOG_QUERIES.labels("upcoming", "database").inc()
+            return None
+        CATALOG_QUERIES.labels("upcoming", "memory").inc()
+        entries = snapshot.upcoming(time.time())
+        return [entry.response for entry in entries[skip:skip + limit]]
+
+    def featured(self, limit: int = 6) -> Optional[List[EventResponse]]:
+        return self.upcoming(0, limit)
+
+    def responses(self, event_ids: Iterable[UUID]) -> Optional[Dict[UUID, EventResponse]]:
+        """EventResponse de los ids que están en el catálogo y aún no empiezan (para /events/for-you)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            CATALOG_QUERIES.labels("by_id", "database").inc()
+            return None
+        CATALOG_QUERIES.labels("by_id", "memory").inc()
+        now = time.time()
+        found = {}
+        for event_id in event_ids:
+            entry = snapshot.by_id.get(event_id)
+            if entry is not None and entry.start_ts >= now:
+                found[event_id] = entry.response
+        return found
+
+    def search(
+        self,
+        category_slugs: Optional[List[str]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        sort: str = "date",
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Optional[Tuple[List[dict], int, Optional[str]]]:
+        """
+        (items de la página, total, next_cursor) con la misma semántica que
+        EventQuery.search(); None si el read model no está listo o el orden no
+        se resuelve en memoria.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or sort not in MEMORY_SORTS:
+            CATALOG_QUERIES.labels("search", "database").inc()
+            return None
+        CATALOG_QUERIES.labels("search", "memory").inc()
+        if sort == "relevance":
+            sort = "date"  # relevancia sin texto es orden por fecha
+
+        since = time.time()
+        if start_date is not None:
+            since = max(since, epoch_seconds(start_date))
+        until = math.inf
+        if end_date is not None:
+            until = epoch_seconds(end_date.replace(hour=23, minute=59, second=59))
+        filtered = until != math.inf or min_price is not None or max_price is not None
+
+        if category_slugs is None:
+            if not filtered:
+                return self._page(snapshot, snapshot.by_sort[sort], since, sort, page, page_size)
+            # Catálogo completo ya ordenado: los que empezaron se saltan al filtrar
+            entries = snapshot.upcoming(since) if sort == "date" else snapshot.by_sort[sort]
+            presorted = True
+        else:
+            category_ids = {self._active_slugs[s] for s in category_slugs if s in self._active_slugs}
+            entries = []
+            for category_id in category_ids:
+                entries += snapshot.upcoming_in(category_id, since)
+            presorted = sort == "date" and len(category_ids) <= 1
+
+        if filtered:
+            # Una sola pasada, con la semántica de precio de EventQuery.price_between()
+            low = -math.inf if min_price is None else min_price
+            high = math.inf if max_price is None else max_price
+            both = min_price is not None and max_price is not None
+            entries = [
+                e for e in entries
+                if e.start_ts >= since and e.end_ts <= until and e.max_price >= low and e.min_price <= high
+                and (not both or any(low <= price <= high for price in e.prices))
+            ]
+        if not presorted:
+            key, reverse = SORT_KEYS[sort]
+            entries = sorted(entries, key=key, reverse=reverse)
+
+        offset = (page - 1) * page_size
+        page_entries = entries[offset:offset + page_size]
+        return self._result(page_entries, len(entries), offset, sort, page_size)
+
+    @staticmethod
+    def _page(snapshot: CatalogSnapshot, ordered: List[CatalogEntry], since: float, sort: str, page: int, page_size: int):
+        """Sin más filtros que la fecha: total por bisect y solo se recorre hasta la página pedida"""
+        total = len(snapshot.start_keys) - bisect.bisect_left(snapshot.start_keys, since)
+        offset = (page - 1) * page_size
+        upcoming = (e for e in ordered if e.start_ts >= since)
+        page_entries = list(islice(upcoming, offset, offset + page_size))
+        return CatalogReadModel._result(page_entries, total, offset, sort, page_size)
+
+    @staticmethod
+    def _result(page_entries: List[CatalogEntry], total: int, offset: int, sort: str, page_size: int):
+        next_cursor = None
+        keyset = keyset_for(None, sort)
+        if keyset is not None and total > offset + page_size:
+            next_cursor = keyset.encode(page_entries[-1])
+        return [e.item for e in page_entries], total, next_cursor
+
+    # ============= REPORTE =============
+
+    def report(self) -> dict:
+        snapshot = self._snapshot
+        events = len(snapshot.by_id) if snapshot else 0
+        return {
+            "enabled": settings.CATALOG_READ_MODEL_ENABLED,
+            "ready": snapshot is not None,
+            "events": events,
+            "memoryBytes": self.memory_bytes,
+            "memoryMbPer10kEvents": (
+                round(self.memory_bytes / events * EVENTS_PER_REPORT / 1024 / 1024, 2) if events else None
+            ),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "refreshedAt": (
+                datetime.fromtimestamp(self.refreshed_at, timezone.utc).isoformat() if self.refreshed_at else None
+            ),
+        }
+
+
+catalog_read_model = CatalogReadModel()
+on_commit_invalidation(catalog_read_model.mark_dirty)
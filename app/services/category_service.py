@@ -6,6 +6,7 @@ from uuid import UUID
 from app.repositories.category_repository import EventCategoryRepository
 from app.schemas.category import EventCategoryResponse, EventCategoryListResponse
 from app.models.event_category import EventCategory
+from app.utils.http_cache import Validators, make_etag
 
 
 class EventCategoryService:
@@ -28,6 +29,13 @@ class EventCategoryService:
             total=len(category_responses)
         )
     
+    def get_categories_validators(self, active_only: bool = True) -> Validators:
+        """
+        ETag del listado. Sin Last-Modified: eventCount cambia sin tocar
+        updated_at de la categoría, así que solo el ETag es fiable
+        """
+        return Validators(etag=make_etag("categories", active_only, *self.category_repo.get_list_version(active_only)))
+
     def get_featured_categories(self) -> List[EventCategoryResponse]:
         """Get featured categories"""
         categories = self.category_repo.get_featured_categories()
@@ -0,0 +1,332 @@
+"""
+Feed personalizado de /events/for-you.
+
+Un job en segundo plano precalcula, por usuario, una lista de candidatos
+(eventos publicados que aún no empiezan) y la guarda en el Redis de
+response_cache. El request solo lee esa lista y hace un re-rank corto:
+descarta lo que ya empezó, premia lo próximo y alterna categorías.
+
+Sin Redis no se precalcula: cada worker repetiría el cálculo completo y las
+listas desalojarían del LRU en memoria a las respuestas cacheadas.
+
+Puntaje base de un candidato:
+- afinidad con su categoría: preferencia activa (UserCategoryPreference) y
+  proporción de compras completadas del usuario en esa categoría;
+- popularidad: total_sold normalizado (log) respecto al más vendido.
+Solo entran categorías con afinidad y se excluyen los eventos ya comprados.
+
+Frescura:
+- recálculo completo cada FEED_REFRESH_SECONDS (réplica de lectura), por un
+  solo worker: el que toma la clave ticketify:feed:leader, que vence con el período;
+- al cambiar preferencias o finalizar una compra, la etiqueta feed:<user_id>
+  despierta al job, que recalcula solo a ese usuario (contra el primario).
+
+Sin lista (usuario nuevo, sin señales o aún no calculado) el endpoint degrada a
+los destacados genéricos.
+"""
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+import orjson
+import redis
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal, SessionLocal
+from app.core.metrics import FEED_USERS_PRECOMPUTED
+from app.core.response_cache import (
+    FEED_TAG_PREFIX, RedisBackend, on_commit_invalidation, response_cache, user_feed_tag
+)
+from app.models.event import Event
+from app.models.purchase import Purchase, PurchaseStatus
+from app.models.user_category_preference import UserCategoryPreference
+from app.repositories.event_query import EventQuery
+from app.services.catalog_read_model import epoch_seconds
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "feed:"
+LEADER_KEY = "ticketify:feed:leader"  # quién hace el recálculo completo de este período
+
+# Pesos del puntaje base
+PREFERENCE_WEIGHT = 1.0
+PURCHASE_WEIGHT = 0.6
+POPULARITY_WEIGHT = 0.4
+
+# Re-rank del request
+SOON_WEIGHT = 0.2  # bonus lineal para lo que empieza dentro de SOON_HORIZON
+SOON_HORIZON = timedelta(days=30).total_seconds()
+DIVERSITY_DECAY = 0.8  # cada evento más de la misma categoría multiplica el puntaje
+
+# Candidato guardado: [event_id, category_id, start_ts, base_score]
+Candidate = list
+
+
+def feed_key(user_id) -> str:
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def rerank(candidates: List[Candidate], limit: int, now: Optional[float] = None) -> List[str]:
+    """
+    Ids de los limit mejores candidatos que aún no empiezan. Greedy perezoso:
+    un candidato penalizado vuelve al heap con su puntaje nuevo, así que solo
+    se recalcula lo que llega a la cima (O((limit + reinserciones) log n)).
+    """
+    now = time.time() if now is None else now
+    heap = []
+    for i, (_, category_id, start_ts, base) in enumerate(candidates):
+        if start_ts < now:
+            continue
+        soon = SOON_WEIGHT * max(0.0, 1 - (start_ts - now) / SOON_HORIZON)
+        heap.append((-(base + soon), i, category_id, 0))
+    heapq.heapify(heap)
+
+    seen: Dict[Optional[str], int] = defaultdict(int)
+    ranked = []
+    while heap and len(ranked) < limit:
+        neg_score, i, category_id, penalized_for = heapq.heappop(heap)
+        if penalized_for != seen[category_id]:
+            score = -neg_score * DIVERSITY_DECAY ** (seen[category_id] - penalized_for)
+            heapq.heappush(heap, (-score, i, category_id, seen[category_id]))
+            continue
+        ranked.append(candidates[i][0])
+        seen[category_id] += 1
+    return ranked
+
+
+class EventFeed:
+    def __init__(self):
+        self._dirty: Set[UUID] = set()
+        self._dirty_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshed_at: Optional[float] = None
+
+    # ============= CICLO DE VIDA =============
+
+    def start(self) -> None:
+        if not settings.FEED_ENABLED or self._thread is not None:
+            return
+        if not isinstance(response_cache.backend, RedisBackend):
+            logger.info("🎯 Feed personalizado: sin Redis no se precalcula (/events/for-you muestra destacados)")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= settings.FEED_REFRESH_SECONDS:
+                    if self._lead():
+                        self.refresh_all()
+                    else:
+                        self.refreshed_at = time.monotonic()  # otro worker recalcula este período
+                        self.refresh_dirty()
+                else:
+                    self.refresh_dirty()
+            except Exception as e:
+                logger.warning(f"⚠️ Feed personalizado: recálculo fallido ({e})")
+            self._wake.wait(settings.FEED_REFRESH_SECONDS)
+            self._wake.clear()
+
+    @staticmethod
+    def _lead() -> bool:
+        """Toma el recálculo completo del período si ningún worker lo tomó"""
+        try:
+            return bool(response_cache.backend.client.set(
+                LEADER_KEY, os.getpid(), nx=True, ex=settings.FEED_REFRESH_SECONDS
+            ))
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Feed personalizado: no se pudo tomar el recálculo ({e})")
+            return False
+
+    def mark_dirty(self, tags: Iterable[str]) -> None:
+        """Etiquetas feed:<user_id> confirmadas por una escritura de este proceso"""
+        if self._thread is None:
+            return
+        user_ids = {UUID(tag[len(FEED_TAG_PREFIX):]) for tag in tags if tag.startswith(FEED_TAG_PREFIX)}
+        if not user_ids:
+            return
+        with self._dirty_lock:
+            self._dirty |= user_ids
+        self._wake.set()
+
+    # ============= PRECÁLCULO =============
+
+    def refresh_all(self) -> int:
+        """Recalcula a todos los usuarios con preferencias o compras recientes"""
+        with self._dirty_lock:
+            self._dirty.clear()
+        with ReadSessionLocal() as db:
+            count = self._compute(db)
+        self.refreshed_at = time.monotonic()
+        logger.info(f"🎯 Feed personalizado: {count} usuarios recalculados")
+        return count
+
+    def refresh_dirty(self) -> int:
+        with self._dirty_lock:
+            user_ids, self._dirty = self._dirty, set()
+        if not user_ids:
+            return 0
+        # Contra el primario: la escritura que lo disparó puede no estar aún en la réplica
+        with SessionLocal() as db:
+            return self._compute(db, user_ids)
+
+    def _compute(self, db: Session, user_ids: Optional[Set[UUID]] = None) -> int:
+        pool = self._pool(db)
+        affinities = self._affinities(db, user_ids)
+        owned = self._owned(db, user_ids)
+        # Los pedidos explícitamente sin señales se guardan vacíos (degradan a destacados)
+        for user_id in (user_ids or set()) - affinities.keys():
+            affinities[user_id] = {}
+
+        now = time.time()
+        for user_id, affinity in affinities.items():
+            candidates = self._candidates(pool, affinity, owned.get(user_id, set()))
+            self._store(user_id, {"computedAt": now, "candidates": candidates})
+        FEED_USERS_PRECOMPUTED.inc(len(affinities))
+        return len(affinities)
+
+    @staticmethod
+    def _pool(db: Session) -> Dict[Optional[UUID], List[Candidate]]:
+        """
+        Catálogo por categoría con el puntaje de popularidad, de más a menos
+        vendido (una consulta de columnas, sin cargar eventos)
+        """
+        conditions = EventQuery().with_status().upcoming().where()
+        rows = db.execute(
+            select(Event.id, Event.category_id, Event.startDate, Event.total_sold)
+            .where(and_(*conditions))
+            .order_by(Event.total_sold.desc(), Event.id)
+        ).all()
+        top_sold = max((row.total_sold or 0 for row in rows), default=0)
+        scale = math.log1p(top_sold) or 1.0
+        pool = defaultdict(list)
+        for row in rows:
+            popularity = math.log1p(row.total_sold or 0) / scale
+            pool[row.category_id].append([str(row.id), str(row.category_id), epoch_seconds(row.startDate), popularity])
+        return pool
+
+    @staticmethod
+    def _affinities(db: Session, user_ids: Optional[Set[UUID]]) -> Dict[UUID, Dict[UUID, float]]:
+        """Afinidad por (usuario, categoría): preferencia activa + proporción de compras"""
+        affinities: Dict[UUID, Dict[UUID, float]] = defaultdict(lambda: defaultdict(float))
+
+        preferences = select(UserCategoryPreference.user_id, UserCategoryPreference.category_id).where(
+            UserCategoryPreference.is_active == True
+        )
+        if user_ids is not None:
+            preferences = preferences.where(UserCategoryPreference.user_id.in_(user_ids))
+        for user_id, category_id in db.execute(preferences):
+            affinities[user_id][category_id] += PREFERENCE_WEIGHT
+
+        since = datetime.utcnow() - timedelta(days=settings.FEED_PURCHASE_LOOKBACK_DAYS)
+        purchases = (
+            select(Purchase.user_id, Event.category_id, func.count(Purchase.id))
+            .join(Event, Event.id == Purchase.event_id)
+            .where(
+                Purchase.status == PurchaseStatus.COMPLETED,
+                Purchase.created_at >= since,
+                Event.category_id.isnot(None),
+            )
+            .group_by(Purchase.user_id, Event.category_id)
+        )
+        if user_ids is not None:
+            purchases = purchases.where(Purchase.user_id.in_(user_ids))
+        counts: Dict[UUID, Dict[UUID, int]] = defaultdict(dict)
+        for user_id, category_id, count in db.execute(purchases):
+            counts[user_id][category_id] = count
+        for user_id, by_category in counts.items():
+            top = max(by_category.values())
+            for category_id, count in by_category.items():
+                affinities[user_id][category_id] += PURCHASE_WEIGHT * count / top
+        return affinities
+
+    @staticmethod
+    def _owned(db: Session, user_ids: Optional[Set[UUID]]) -> Dict[UUID, Set[str]]:
+        """Eventos próximos que el usuario ya compró (no se le recomiendan)"""
+        stmt = (
+            select(Purchase.user_id, Purchase.event_id)
+            .join(Event, Event.id == Purchase.event_id)
+            .where(Purchase.status == PurchaseStatus.COMPLETED, Event.startDate >= datetime.utcnow())
+        )
+        if user_ids is not None:
+            stmt = stmt.where(Purchase.user_id.in_(user_ids))
+        owned: Dict[UUID, Set[str]] = defaultdict(set)
+        for user_id, event_id in db.execute(stmt):
+            owned[user_id].add(str(event_id))
+        return owned
+
+    @staticmethod
+    def _candidates(
+        pool: Dict[Optional[UUID], List[Candidate]], affinity: Dict[UUID, float], owned: Set[str]
+    ) -> List[Candidate]:
+        """
+        Los FEED_CANDIDATES de mayor puntaje base. Dentro de una categoría la
+        afinidad es constante, así que basta mirar sus FEED_CANDIDATES más
+        vendidos (sin contar los ya comprados).
+        """
+        limit = settings.FEED_CANDIDATES
+        scored = []
+        for category_id, weight in affinity.items():
+            taken = 0
+            for event_id, category, start_ts, popularity in pool.get(category_id, ()):
+                if event_id in owned:
+                    continue
+                scored.append([event_id, category, start_ts, round(weight + POPULARITY_WEIGHT * popularity, 4)])
+                taken += 1
+                if taken == limit:
+                    break
+        return heapq.nlargest(limit, scored, key=lambda c: c[3])
+
+    # ============= CACHÉ =============
+
+    def _store(self, user_id: UUID, data: dict) -> None:
+        try:
+            response_cache.backend.set(feed_key(user_id), orjson.dumps(data), [], settings.FEED_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Feed personalizado: escritura fallida ({e})")
+
+    def candidates(self, user_id: UUID) -> Optional[List[Candidate]]:
+        """Lista precalculada del usuario; None si no hay (o la caché no responde)"""
+        try:
+            body = response_cache.backend.get(feed_key(user_id))
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Feed personalizado: lectura fallida ({e})")
+            return None
+        if body is None:
+            return None
+        return orjson.loads(body)["candidates"]
+
+    def for_you(self, user_id: UUID, limit: int) -> Optional[List[UUID]]:
+        """
+        Ids del feed ya re-rankeados (una lectura de caché). None si el usuario
+        aún no tiene lista: se pide su cálculo y el llamador degrada a destacados.
+        """
+        candidates = self.candidates(user_id)
+        if candidates is None:
+            self.mark_dirty([user_feed_tag(user_id)])
+            return None
+        return [UUID(event_id) for event_id in rerank(candidates, limit)]
+
+
+event_feed = EventFeed()
+on_commit_invalidation(event_feed.mark_dirty)
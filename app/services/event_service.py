@@ -1,10 +1,19 @@
+import asyncio
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from fastapi import HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime, timezone
 
-from app.repositories.event_repository import EventRepository
+from app.repositories.event_repository import (
+    LISTING_FIELDS, EventRepository, AsyncEventRepository, geocode_event, refresh_event_aggregates
+)
+from app.repositories.event_query import supports_cursor
+from app.services.catalog_read_model import catalog_read_model
+from app.services.event_feed import event_feed
+from app.services.stock_counters import stock_counters
 from app.models.event import Event, EventStatus
 from app.models.event_category import EventCategory
 from app.schemas.event import (
@@ -13,10 +22,31 @@ from app.schemas.event import (
     EventDetailResponse,
     EventResponse,
     EventSearchResponse,
+    EventAutocompleteItem,
     EventListResponse,
     MessageResponse
 )
 from app.models.ticket_type import TicketType
+from app.core.config import settings
+from app.core.metrics import FEED_REQUESTS
+from app.core.response_cache import invalidate_event_on_commit
+from app.core.ttl_cache import TTLCache
+from app.utils.blob_store import get_blob_store, detect_image_mime
+from app.utils.counts import CountResult
+from app.utils.geo import haversine_km, parse_coordinates
+from app.utils.http_cache import Validators, latest, make_etag
+
+
+# Prefijos más tecleados ("con", "conc", "conci"...): se repiten entre usuarios
+# y toleran unos segundos de atraso, así que se sirven desde memoria
+autocomplete_cache = TTLCache(
+    maxsize=settings.AUTOCOMPLETE_CACHE_SIZE,
+    ttl_seconds=settings.AUTOCOMPLETE_CACHE_TTL_SECONDS
+)
+
+
+def normalize_prefix(prefix: str) -> str:
+    return " ".join(prefix.split()).lower()
 
 
 class EventService:
@@ -62,7 +92,7 @@ class EventService:
                 detail="Evento no encontrado"
             )
 
-        event_dict = event.to_dict() if hasattr(event, "to_dict") else {}
+        event_dict = event.to_dict(photo_size="hero") if hasattr(event, "to_dict") else {}
         return EventDetailResponse(**event_dict)
 
     # =========================================================
@@ -82,6 +112,11 @@ class EventService:
             except KeyError:
                 raise HTTPException(status_code=400, detail="Estado inválido")
 
+        if event_status == EventStatus.PUBLISHED:
+            cached = catalog_read_model.upcoming(skip, limit)
+            if cached is not None:
+                return cached
+
         events = self.event_repo.get_all(skip=skip, limit=limit, status=event_status)
         return [self._event_to_response(e) for e in events]
 
@@ -94,42 +129,11 @@ class EventService:
         limit: int = 20,
         status_filter: Optional[str] = None
     ) -> List[EventResponse]:
-        """Obtiene eventos futuros o activos"""
-        event_status = EventStatus.PUBLISHED
-        if status_filter:
-            try:
-                event_status = EventStatus[status_filter.upper()]
-            except KeyError:
-                raise HTTPException(status_code=400, detail="Estado inválido")
-
-        events = self.event_repo.get_all(skip=skip, limit=limit, status=event_status)
-        now = datetime.now(timezone.utc)
-        upcoming = [e for e in events if getattr(e, "endDate", None) and e.endDate.astimezone(timezone.utc) > now]
-                
-        return [self._event_to_response(e) for e in upcoming]
-    
-
-    def get_events_by_organizer(self, organizer_id: UUID):
-        """
-        Devuelve los eventos pertenecientes al organizador autenticado.
-        Usa la función correcta del repositorio.
-        """
-        events = self.event_repo.get_events_by_organizer_id(organizer_id)
+        """Obtiene eventos futuros o en curso (endDate posterior a ahora)"""
+        event_status = _parse_status_filter(status_filter)
+        events = self.event_repo.get_active(skip=skip, limit=limit, status=event_status)
         return [self._event_to_response(e) for e in events]
 
-    def get_events_vigentes_by_organizer(self, organizer_id: UUID):
-        events = self.event_repo.get_events_by_organizer_id(organizer_id)
-
-        # Fecha y hora actual aware (UTC)
-        now = datetime.now(timezone.utc)
-
-        vigentes = [
-            e for e in events
-            if e.status != EventStatus.CANCELLED and e.endDate.astimezone(timezone.utc) >= now
-        ]
-
-        return vigentes
-
     # =========================================================
     # 🔹 Búsqueda Avanzada
     # =========================================================
@@ -144,23 +148,31 @@ class EventService:
         location: Optional[str] = None,
         venue: Optional[str] = None,
         status_filter: Optional[str] = None,
+        near: Optional[str] = None,
+        radius_km: Optional[float] = None,
         page: int = 1,
-        page_size: int = 20
+        page_size: int = 20,
+        sort: str = "date",
+        cursor: Optional[str] = None,
+        count_mode: str = "auto"
     ) -> EventSearchResponse:
         """Búsqueda de eventos con múltiples filtros"""
 
-        # Validar estado
-        event_status = EventStatus.PUBLISHED
-        if status_filter:
-            try:
-                event_status = EventStatus[status_filter.upper()]
-            except KeyError:
-                raise HTTPException(status_code=400, detail="Estado inválido")
+        # Validar estado, ubicación y modo de paginación
+        event_status = _parse_status_filter(status_filter)
+        origin = _parse_near(near, sort)
+        _check_cursor_sort(query, sort, cursor)
+
+        # Sin texto ni ubicación ni cursor: desde el read model en memoria
+        if not (query or location or venue or origin or cursor) and event_status == EventStatus.PUBLISHED:
+            cached = _search_catalog(categories, min_price, max_price, start_date, end_date, sort, page, page_size)
+            if cached is not None:
+                return cached
 
         # Procesar categorías (slugs → IDs)
         category_ids = None
         if categories:
-            slugs = [c.strip() for c in categories.split(",") if c.strip()]
+            slugs = _split_slugs(categories)
             if slugs:
                 cats = (
                     self.db.query(EventCategory)
@@ -175,21 +187,10 @@ class EventService:
                     )
 
         # Procesar fechas
-        start_dt = None
-        end_dt = None
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de fecha de inicio inválido")
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Formato de fecha de fin inválido")
+        start_dt, end_dt = _parse_search_dates(start_date, end_date)
 
         # Consultar
-        events, total = self.event_repo.get_events(
+        events, total, next_cursor = self.event_repo.get_events(
             query=query,
             category_ids=category_ids,
             min_price=min_price,
@@ -199,24 +200,17 @@ class EventService:
             location=location,
             venue=venue,
             status=event_status,
-            page=page,
-            page_size=page_size
-        )
-
-        total_pages = (total + page_size - 1) // page_size
-        event_dicts = []
-        for e in events:
-            event_dict = e.to_dict() if hasattr(e, "to_dict") else {}
-            event_dicts.append(event_dict)
-
-        return EventSearchResponse(
-            events=event_dicts,
-            total=total,
+            near=origin,
+            radius_km=radius_km or settings.GEO_DEFAULT_RADIUS_KM,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            sort=sort,
+            cursor=cursor,
+            count_mode=count_mode
         )
 
+        return _build_search_response(events, total, page, page_size, next_cursor, origin)
+
     # =========================================================
     # 🔹 Actualizar Evento
     # =========================================================
@@ -250,8 +244,12 @@ class EventService:
         for field, value in update_data.items():
             if hasattr(event, field):
                 setattr(event, field, value)
+        geocode_event(event, update_data)
 
         event.updatedAt = datetime.now(timezone.utc)
+        if "totalCapacity" in update_data:
+            refresh_event_aggregates(self.db, event.id)
+        invalidate_event_on_commit(self.db, event.id, listing=bool(LISTING_FIELDS & update_data.keys()))
 
         self.db.commit()
         self.db.refresh(event)
@@ -279,6 +277,7 @@ class EventService:
             )
             
         self.db.delete(event)
+        invalidate_event_on_commit(self.db, event_id, listing=True)
         self.db.commit()
 
         return MessageResponse(message="Evento eliminado correctamente")
@@ -312,6 +311,7 @@ class EventService:
 
         # Si el evento cambió a PUBLISHED, enviar notificaciones
         if old_status != EventStatus.PUBLISHED and status_enum == EventStatus.PUBLISHED:
+            stock_counters.seed_event(self.db, event_id)
             self._send_new_event_notifications(updated)
 
         return self._event_to_response(updated)
@@ -380,6 +380,9 @@ class EventService:
     # 🔹 Listar próximos / destacados
     # =========================================================
     def get_featured_events(self, limit: int = 6) -> List[EventResponse]:
+        cached = catalog_read_model.featured(limit)
+        if cached is not None:
+            return cached
         events = self.event_repo.get_featured_events(limit=limit)
         return [self._event_to_response(e) for e in events]
 
@@ -402,8 +405,16 @@ class EventService:
         if not event:
             raise HTTPException(status_code=404, detail="Evento no encontrado")
 
-        event.photo = photo_bytes
+        mime = detect_image_mime(photo_bytes)
+        if mime not in settings.ALLOWED_FILE_TYPES:
+            raise HTTPException(status_code=400, detail="Formato de imagen no soportado")
+
+        # El blob anterior no se borra: por ser direccionado por contenido puede compartirse
+        event.photo_hash = get_blob_store().put(photo_bytes)
+        event.photo_mime = mime
+        event.photo_size = len(photo_bytes)
         event.updatedAt = datetime.now(timezone.utc)  
+        invalidate_event_on_commit(self.db, event.id)
         self.db.commit()
         self.db.refresh(event)
         return event
@@ -423,16 +434,9 @@ class EventService:
     
     def get_events_vigentes_by_organizer(self, organizer_id: UUID) -> List[Event]:
         """
-        Obtiene eventos vigentes (futuros y no cancelados) de un organizador
+        Obtiene eventos vigentes (no terminados y no cancelados) de un organizador
         """
-        now = datetime.now(timezone.utc)
-        events = self.db.query(Event).filter(
-            Event.organizer_id == organizer_id,
-            Event.startDate >= now,
-            Event.status != EventStatus.CANCELLED
-        ).order_by(Event.startDate.asc()).all()
-        
-        return events
+        return self.event_repo.get_vigentes_by_organizer(organizer_id)
 
 
     # =========================================================
@@ -440,59 +444,349 @@ class EventService:
     # =========================================================
     def _event_to_response(self, event: Event) -> EventResponse:
         """Convierte modelo SQLAlchemy a esquema Pydantic"""
-        # Crear diccionario de categoría si existe
-        category_dict = None
-        if event.category:
-            category_dict = {
-                "id": str(event.category.id),
-                "name": event.category.name,
-                "slug": event.category.slug,
-                "description": event.category.description,
-                "icon": event.category.icon,
-                "colorCode": event.category.color,
-                "isActive": event.category.is_active,
-                "isFeatured": event.category.is_featured,
-                "sortOrder": event.category.sort_order
-            }
-        
-        # Construir la lista de tipos de ticket de forma imperativa antes del return
-        ticket_types_list = []
-        if getattr(event, "ticket_types", None):
-            for tt in event.ticket_types:
-                if tt is not None:
-                    ticket_types_list.append({
-                        "id": str(tt.id),
-                        "name": tt.name,
-                        "price": float(tt.price) if tt.price else None,
-                        "quantity_available": tt.quantity_available, # La clave que necesita el router
-                        "sold_quantity": tt.sold_quantity, # La clave que necesita el router
-                        
-                        # (Puedes añadir los otros campos del ticket aquí si los necesitas)
-                        "description": tt.description,
-                        "original_price": float(tt.original_price) if tt.original_price else None,
-                        "min_purchase": tt.min_purchase,
-                        "max_purchase": tt.max_purchase,
-                        "is_active": tt.is_active
-                    })
-
-        return EventResponse(
-            id=event.id,
-            title=event.title,
-            description=event.description,
-            startDate=event.startDate,
-            endDate=event.endDate,
-            venue=event.venue,
-            totalCapacity=event.totalCapacity,
-            status=event.status.value,
-            photoUrl=f"/api/events/{event.id}/photo" if event.photo else None,
-            availableTickets=getattr(event, "available_tickets", 0),
-            isSoldOut=getattr(event, "is_sold_out", False),
-            organizerId=event.organizer_id,
-            categoryId=event.category_id,
-            category=category_dict,
-            minPrice=event.min_price,
-            maxPrice=event.max_price,
-            createdAt=event.createdAt,
-            updatedAt=event.updatedAt,
-            ticket_types=ticket_types_list
+        return event_to_response(event)
+
+
+def event_to_response(event: Event) -> EventResponse:
+    """Convierte modelo SQLAlchemy a esquema Pydantic"""
+    # Crear diccionario de categoría si existe
+    category_dict = None
+    if event.category:
+        category_dict = {
+            "id": str(event.category.id),
+            "name": event.category.name,
+            "slug": event.category.slug,
+            "description": event.category.description,
+            "icon": event.category.icon,
+            "colorCode": event.category.color,
+            "isActive": event.category.is_active,
+            "isFeatured": event.category.is_featured,
+            "sortOrder": event.category.sort_order
+        }
+    
+    # Construir la lista de tipos de ticket de forma imperativa antes del return
+    ticket_types_list = []
+    if getattr(event, "ticket_types", None):
+        for tt in event.ticket_types:
+            if tt is not None:
+                ticket_types_list.append({
+                    "id": str(tt.id),
+                    "name": tt.name,
+                    "price": float(tt.price) if tt.price else None,
+                    "quantity_available": tt.quantity_available, # La clave que necesita el router
+                    "sold_quantity": tt.sold_quantity, # La clave que necesita el router
+                    
+                    # (Puedes añadir los otros campos del ticket aquí si los necesitas)
+                    "description": tt.description,
+                    "original_price": float(tt.original_price) if tt.original_price else None,
+                    "min_purchase": tt.min_purchase,
+                    "max_purchase": tt.max_purchase,
+                    "is_active": tt.is_active
+                })
+
+    return EventResponse(
+        id=event.id,
+        title=event.title,
+        description=event.description,
+        startDate=event.startDate,
+        endDate=event.endDate,
+        venue=event.venue,
+        latitude=event.latitude,
+        longitude=event.longitude,
+        totalCapacity=event.totalCapacity,
+        status=event.status.value,
+        photoUrl=event.photo_path,
+        availableTickets=getattr(event, "available_tickets", 0),
+        isSoldOut=getattr(event, "is_sold_out", False),
+        organizerId=event.organizer_id,
+        categoryId=event.category_id,
+        category=category_dict,
+        minPrice=event.min_price,
+        maxPrice=event.max_price,
+        createdAt=event.createdAt,
+        updatedAt=event.updatedAt,
+        ticket_types=ticket_types_list
+    )
+
+
+def _parse_status_filter(status_filter: Optional[str]) -> EventStatus:
+    event_status = EventStatus.PUBLISHED
+    if status_filter:
+        try:
+            event_status = EventStatus[status_filter.upper()]
+        except KeyError:
+            raise HTTPException(status_code=400, detail="Estado inválido")
+    return event_status
+
+
+def _split_slugs(categories: str) -> List[str]:
+    return [c.strip() for c in categories.split(",") if c.strip()]
+
+
+def _parse_search_dates(start_date: Optional[str], end_date: Optional[str]):
+    start_dt = None
+    end_dt = None
+    if start_date:
+        try:
+            start_dt = datetime.fromisoformat(start_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de fecha de inicio inválido")
+    if end_date:
+        try:
+            end_dt = datetime.fromisoformat(end_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Formato de fecha de fin inválido")
+    return start_dt, end_dt
+
+
+def _parse_near(near: Optional[str], sort: str) -> Optional[Tuple[float, float]]:
+    if not near:
+        if sort == "distance":
+            raise HTTPException(status_code=400, detail="sort=distance requiere el parámetro near=lat,lon")
+        return None
+    try:
+        return parse_coordinates(near)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Parámetro near inválido: usa near=lat,lon")
+
+
+def _search_catalog(
+    categories: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    sort: str,
+    page: int,
+    page_size: int
+) -> Optional[EventSearchResponse]:
+    start_dt, end_dt = _parse_search_dates(start_date, end_date)
+    result = catalog_read_model.search(
+        category_slugs=(_split_slugs(categories) if categories else None) or None,
+        min_price=min_price,
+        max_price=max_price,
+        start_date=start_dt,
+        end_date=end_dt,
+        sort=sort,
+        page=page,
+        page_size=page_size
+    )
+    if result is None:
+        return None
+    items, total, next_cursor = result
+    return EventSearchResponse(
+        events=items,
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=(total + page_size - 1) // page_size,
+        next_cursor=next_cursor
+    )
+
+
+def _events_to_dicts(events: List[Event], origin: Optional[Tuple[float, float]] = None) -> List[dict]:
+    items = [e.to_dict() if hasattr(e, "to_dict") else {} for e in events]
+    if origin is not None:
+        # Todos tienen coordenadas: el filtro near= descarta los que no
+        for event, item in zip(events, items):
+            item["distanceKm"] = round(haversine_km(*origin, event.latitude, event.longitude), 2)
+    return items
+
+
+def _check_cursor_sort(query: Optional[str], sort: str, cursor: Optional[str]) -> None:
+    if cursor and not supports_cursor(query, sort):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La paginación por cursor solo está disponible con sort=date, newest o popularity; usa page"
+        )
+
+
+def _build_search_response(
+    events: List[Event],
+    count: Optional[CountResult],
+    page: int,
+    page_size: int,
+    next_cursor: Optional[str] = None,
+    origin: Optional[Tuple[float, float]] = None
+) -> EventSearchResponse:
+    # Con cursor no se cuenta: total y total_pages quedan en None
+    total = count.total if count else None
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
+    return EventSearchResponse(
+        events=_events_to_dicts(events, origin),
+        total=total,
+        total_is_exact=count.exact if count else True,
+        page=page,
+        page_size=page_size,
+        total_pages=total_pages,
+        next_cursor=next_cursor
+    )
+
+
+class AsyncEventService:
+    """
+    Variante async de las lecturas públicas de EventService.
+    Usa AsyncSession para no bloquear el event loop en los endpoints más concurridos.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.event_repo = AsyncEventRepository(db)
+
+    async def get_event_by_id(self, event_id: UUID) -> EventDetailResponse:
+        event = await self.event_repo.get_by_id(event_id)
+        if not event:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Evento no encontrado"
+            )
+
+        # to_dict() toca relaciones perezosas (category.events); run_sync las resuelve sin bloquear
+        event_dict = await self.db.run_sync(lambda _: event.to_dict(photo_size="hero"))
+        return EventDetailResponse(**event_dict)
+
+    async def get_event_validators(self, event_id: UUID) -> Optional[Validators]:
+        """ETag/Last-Modified del detalle (evento + ticket_types); None si no existe"""
+        version = await self.event_repo.get_detail_version(event_id)
+        if version is None:
+            return None
+        updated_at, ticket_types_updated_at, ticket_type_count = version
+        return Validators(
+            etag=make_etag("event", event_id, updated_at, ticket_types_updated_at, ticket_type_count),
+            last_modified=latest(updated_at, ticket_types_updated_at),
+        )
+
+    async def get_all_events(
+        self,
+        skip: int = 0,
+        limit: int = 20,
+        status_filter: Optional[str] = None
+    ) -> List[EventResponse]:
+        event_status = _parse_status_filter(status_filter)
+        if event_status == EventStatus.PUBLISHED:
+            cached = catalog_read_model.upcoming(skip, limit)
+            if cached is not None:
+                return cached
+        events = await self.event_repo.get_all(skip=skip, limit=limit, status=event_status)
+        return [event_to_response(e) for e in events]
+
+    async def get_featured_events(self, limit: int = 6) -> List[EventResponse]:
+        cached = catalog_read_model.featured(limit)
+        if cached is not None:
+            return cached
+        events = await self.event_repo.get_featured_events(limit=limit)
+        return [event_to_response(e) for e in events]
+
+    async def get_for_you_events(self, user_id: UUID, limit: int = 20) -> Tuple[List[EventResponse], str]:
+        """
+        Feed personalizado: (eventos, origen). Lee la lista precalculada del
+        usuario y completa con destacados si no alcanza; sin lista, destacados.
+        """
+        ranked = await asyncio.to_thread(event_feed.for_you, user_id, limit)  # GET a Redis: fuera del event loop
+        if not ranked:
+            FEED_REQUESTS.labels("featured").inc()
+            return await self.get_featured_events(limit), "featured"
+
+        # Los eventos salen del read model del catálogo; la base solo para lo que no esté
+        found = catalog_read_model.responses(ranked) or {}
+        missing = [event_id for event_id in ranked if event_id not in found]
+        if missing:
+            for event in await self.event_repo.get_upcoming_by_ids(missing):
+                found[event.id] = event_to_response(event)
+        events = [found[event_id] for event_id in ranked if event_id in found]
+
+        source = "personalized"
+        if len(events) < limit:
+            source = "padded"
+            included = {e.id for e in events}
+            featured = await self.get_featured_events(limit + len(events))
+            events += [e for e in featured if e.id not in included][:limit - len(events)]
+        FEED_REQUESTS.labels(source).inc()
+        return events, source
+
+    async def autocomplete(self, prefix: str, limit: int = 8) -> List[EventAutocompleteItem]:
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+
+        key = (prefix, limit)
+        cached = autocomplete_cache.get(key)
+        if cached is not None:
+            return cached
+
+        rows = await self.event_repo.autocomplete(
+            prefix,
+            limit=limit,
+            similarity_threshold=settings.AUTOCOMPLETE_SIMILARITY_THRESHOLD
+        )
+        items = [EventAutocompleteItem.model_validate(row) for row in rows]
+        autocomplete_cache.set(key, items)
+        return items
+
+    async def search_events(
+        self,
+        query: Optional[str] = None,
+        categories: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        location: Optional[str] = None,
+        venue: Optional[str] = None,
+        status_filter: Optional[str] = None,
+        near: Optional[str] = None,
+        radius_km: Optional[float] = None,
+        page: int = 1,
+        page_size: int = 20,
+        sort: str = "date",
+        cursor: Optional[str] = None,
+        count_mode: str = "auto"
+    ) -> EventSearchResponse:
+        event_status = _parse_status_filter(status_filter)
+        origin = _parse_near(near, sort)
+        _check_cursor_sort(query, sort, cursor)
+
+        # Sin texto ni ubicación ni cursor: desde el read model en memoria
+        if not (query or location or venue or origin or cursor) and event_status == EventStatus.PUBLISHED:
+            cached = _search_catalog(categories, min_price, max_price, start_date, end_date, sort, page, page_size)
+            if cached is not None:
+                return cached
+
+        category_ids = None
+        if categories:
+            slugs = _split_slugs(categories)
+            if slugs:
+                result = await self.db.execute(
+                    select(EventCategory.id)
+                    .where(EventCategory.slug.in_(slugs), EventCategory.is_active == True)
+                )
+                category_ids = list(result.scalars().all())
+                if not category_ids:
+                    return EventSearchResponse(
+                        events=[], total=0, page=page, page_size=page_size, total_pages=0
+                    )
+
+        start_dt, end_dt = _parse_search_dates(start_date, end_date)
+
+        events, total, next_cursor = await self.event_repo.get_events(
+            query=query,
+            category_ids=category_ids,
+            min_price=min_price,
+            max_price=max_price,
+            start_date=start_dt,
+            end_date=end_dt,
+            location=location,
+            venue=venue,
+            status=event_status,
+            near=origin,
+            radius_km=radius_km or settings.GEO_DEFAULT_RADIUS_KM,
+            page=page,
+            page_size=page_size,
+            sort=sort,
+            cursor=cursor,
+            count_mode=count_mode
+        )
+
+        return await self.db.run_sync(
+            lambda _: _build_search_response(events, total, page, page_size, next_cursor, origin)
         )
@@ -0,0 +1,322 @@
+"""
+Reservas de stock de las compras de tickets.
+
+Al crear la compra PENDING se reserva cada tipo de ticket con un UPDATE
+condicional (held_quantity += n solo si quedan n sin vender ni reservar): dos
+compradores nunca obtienen el mismo stock, sin leer-y-luego-escribir. La
+reserva vence a los PURCHASE_HOLD_MINUTES (la preferencia de MercadoPago
+expira a la misma hora) y:
+
+- pago aprobado: se convierte en venta (held → sold) en finalize_purchase_transaction;
+- pago rechazado o cancelado: se libera desde el webhook;
+- checkout abandonado: la libera el barrido (HoldSweeper) y la compra pasa a CANCELLED.
+
+Convertir y liberar primero "reclaman" la reserva (hold_expires_at → NULL con
+un UPDATE condicional, anotando hold_outcome), así el webhook y el barrido
+nunca la descuentan dos veces. Un pago aprobado cuya reserva se liberó o venció
+solo se vende si aún queda stock; una ya convertida nunca se vende de nuevo.
+
+Con contadores de stock (app/services/stock_counters.py) reservar, convertir y
+liberar operan sobre Redis y los deltas se vuelcan a ticket_types en lotes;
+el reclamo de la reserva sigue siendo un UPDATE sobre la fila de la compra.
+
+Los tipos se bloquean siempre en el mismo orden (por id) para que dos compras
+de varios tipos no se interbloqueen. La reserva no toca la fila del evento,
+para no serializar todas las compras del evento en un mismo lock:
+available_tickets (que descuenta lo reservado) se recalcula fuera de la
+transacción del comprador. Sin contadores, los eventos con reservas o
+liberaciones confirmadas se recalculan en lote desde HoldSweeper cada
+EVENT_AGGREGATES_REFRESH_SECONDS, un commit por evento; con contadores lo hace
+el volcado.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import event as sa_event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import STOCK_HOLDS
+from app.core.response_cache import invalidate_event_on_commit
+from app.models.purchase import Purchase, PurchaseStatus
+from app.models.ticket_type import TicketType
+from app.repositories.event_repository import refresh_event_aggregates
+from app.services.stock_counters import stock_counters
+
+logger = logging.getLogger(__name__)
+
+# Eventos cuyas reservas cambiaron en la transacción (session.info) y, ya confirmados, en el proceso
+_STALE_EVENTS = "inventory_stale_events"
+_stale_events: Set[UUID] = set()
+_stale_lock = threading.Lock()
+
+# Lo que queda a la venta: ni vendido ni reservado
+REMAINING = TicketType.quantity_available - TicketType.sold_quantity - TicketType.held_quantity
+
+OPEN_STATUSES = (PurchaseStatus.PENDING, PurchaseStatus.PROCESSING)
+
+
+def ticket_quantities(details: List[dict]) -> Dict[UUID, int]:
+    """{ticket_type_id: cantidad} sumando los ticket_details de una compra"""
+    quantities: Dict[UUID, int] = {}
+    for detail in details:
+        ticket_type_id = UUID(str(detail["ticket_type_id"]))
+        quantities[ticket_type_id] = quantities.get(ticket_type_id, 0) + int(detail["quantity"])
+    return quantities
+
+
+def purchase_quantities(purchase: Purchase) -> Dict[UUID, int]:
+    """ticket_quantities de los ticket_details guardados en notes"""
+    try:
+        details = json.loads(purchase.notes or "{}").get("ticket_details", [])
+    except json.JSONDecodeError:
+        return {}
+    return ticket_quantities(details)
+
+
+class InventoryService:
+
+    @staticmethod
+    def _take(db: Session, ticket_type_id, quantity: int, column) -> bool:
+        """column += quantity solo si quedan quantity disponibles (atómico en la fila)"""
+        result = db.execute(
+            update(TicketType)
+            .where(TicketType.id == ticket_type_id, REMAINING >= quantity)
+            .values({column: column + quantity})
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def _claim(db: Session, purchase: Purchase, outcome: str) -> bool:
+        """Quita la reserva activa de la compra anotando cómo terminó; True solo para quien la quitó"""
+        result = db.execute(
+            update(Purchase)
+            .where(Purchase.id == purchase.id, Purchase.hold_expires_at.isnot(None))
+            .values(hold_expires_at=None, hold_outcome=outcome)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def _touch_event(db: Session, event_id: UUID) -> None:
+        """
+        Caché del evento al confirmar y, sin contadores, available_tickets
+        pendiente de recalcular por HoldSweeper (con contadores, por el volcado)
+        """
+        invalidate_event_on_commit(db, event_id)
+        if not stock_counters.enabled:
+            db.info.setdefault(_STALE_EVENTS, set()).add(event_id)
+
+    @staticmethod
+    def _take_all(db: Session, quantities: List[Tuple[UUID, int]], column) -> Optional[Tuple[UUID, int]]:
+        """_take de todos los tipos en orden; (tipo, disponibles) del primero que no alcanza"""
+        for ticket_type_id, quantity in sorted(quantities, key=lambda q: str(q[0])):
+            if not InventoryService._take(db, ticket_type_id, quantity, column):
+                return ticket_type_id, db.scalar(select(REMAINING).where(TicketType.id == ticket_type_id)) or 0
+        return None
+
+    @staticmethod
+    def hold(db: Session, selections: List[Tuple[TicketType, int]]) -> datetime:
+        """
+        Reserva todos los (tipo, cantidad) o ninguno y devuelve el vencimiento.
+        Sin stock suficiente deshace la transacción y responde 400.
+        """
+        names = {ticket_type.id: ticket_type.name for ticket_type, _ in selections}
+        quantities = [(ticket_type.id, quantity) for ticket_type, quantity in selections]
+        if stock_counters.enabled:
+            short = stock_counters.reserve(db, quantities)
+        else:
+            short = InventoryService._take_all(db, quantities, TicketType.held_quantity)
+        if short:
+            ticket_type_id, available = short
+            db.rollback()
+            STOCK_HOLDS.labels("sold_out").inc()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No hay suficiente stock para {names[ticket_type_id]}. Disponibles: {max(0, available)}"
+            )
+        # remainingQuantity del detalle y de los tipos cambió: sin esto la caché (y el 304) lo muestran viejo
+        for event_id in {ticket_type.event_id for ticket_type, _ in selections}:
+            InventoryService._touch_event(db, event_id)
+        STOCK_HOLDS.labels("held").inc()
+        return datetime.now(timezone.utc) + timedelta(minutes=settings.PURCHASE_HOLD_MINUTES)
+
+    @staticmethod
+    def convert(db: Session, purchase: Purchase, quantities: Dict[UUID, int]) -> bool:
+        """
+        Pago aprobado: la reserva pasa a venta (True) o, si se liberó o venció,
+        se vende lo que quede (False); sin stock responde 409. Una reserva ya
+        convertida no se vuelve a vender.
+        """
+        if InventoryService._claim(db, purchase, "converted"):
+            if stock_counters.enabled:
+                stock_counters.convert(db, quantities)
+            else:
+                for ticket_type_id, quantity in sorted(quantities.items()):
+                    db.execute(
+                        update(TicketType)
+                        .where(TicketType.id == ticket_type_id)
+                        .values(
+                            held_quantity=TicketType.held_quantity - quantity,
+                            sold_quantity=TicketType.sold_quantity + quantity
+                        )
+                    )
+            STOCK_HOLDS.labels("converted").inc()
+            return True
+
+        outcome = db.scalar(select(Purchase.hold_outcome).where(Purchase.id == purchase.id))
+        if outcome == "converted":
+            # Otra aprobación ya la vendió: el stock ya está descontado
+            logger.warning(f"⚠️ Compra {purchase.id}: la reserva ya se había convertido en venta")
+            return True
+
+        # Reserva vencida o liberada (o compra anterior a las reservas)
+        if stock_counters.enabled:
+            short = stock_counters.reserve(db, list(quantities.items()), sell=True)
+        else:
+            short = InventoryService._take_all(db, list(quantities.items()), TicketType.sold_quantity)
+        if short:
+            STOCK_HOLDS.labels("late_sold_out").inc()
+            logger.error(
+                f"❌ Compra {purchase.id} aprobada sin stock: su reserva venció y el tipo "
+                f"{short[0]} se agotó (requiere reembolso)"
+            )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La reserva de la compra venció y ya no queda stock"
+            )
+        STOCK_HOLDS.labels("late_sale").inc()
+        return False
+
+    @staticmethod
+    def release(db: Session, purchase: Purchase, outcome: str = "released") -> bool:
+        """Devuelve al stock la reserva activa de la compra (no hace commit)"""
+        if not InventoryService._claim(db, purchase, outcome):
+            return False
+        quantities = purchase_quantities(purchase)
+        if stock_counters.enabled:
+            stock_counters.release(db, quantities)
+        else:
+            for ticket_type_id, quantity in sorted(quantities.items()):
+                db.execute(
+                    update(TicketType)
+                    .where(TicketType.id == ticket_type_id)
+                    .values(held_quantity=TicketType.held_quantity - quantity)
+                )
+        InventoryService._touch_event(db, purchase.event_id)
+        STOCK_HOLDS.labels(outcome).inc()
+        return True
+
+    @staticmethod
+    def sweep_expired(db: Session, now: Optional[datetime] = None, batch: Optional[int] = None) -> int:
+        """
+        Libera hasta batch reservas vencidas y cancela sus compras abiertas (no
+        hace commit). SKIP LOCKED: varios workers barren sin esperarse.
+        """
+        now = now or datetime.now(timezone.utc)
+        purchases = (
+            db.query(Purchase)
+            .filter(Purchase.hold_expires_at.isnot(None), Purchase.hold_expires_at < now)
+            .order_by(Purchase.hold_expires_at)
+            .limit(batch or settings.PURCHASE_HOLD_SWEEP_BATCH)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        released = 0
+        for purchase in purchases:
+            if InventoryService.release(db, purchase, outcome="expired"):
+                released += 1
+                if purchase.status in OPEN_STATUSES:
+                    purchase.status = PurchaseStatus.CANCELLED
+                    purchase.refund_reason = "Checkout vencido: reserva de stock liberada"
+        return released
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _queue_stale_events(session: Session) -> None:
+    event_ids = session.info.pop(_STALE_EVENTS, None)
+    if event_ids:
+        with _stale_lock:
+            _stale_events.update(event_ids)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_stale_events(session: Session) -> None:
+    session.info.pop(_STALE_EVENTS, None)
+
+
+class HoldSweeper:
+    """
+    Hilo que libera las reservas vencidas cada PURCHASE_HOLD_SWEEP_SECONDS y
+    recalcula available_tickets de los eventos con reservas cambiadas cada
+    EVENT_AGGREGATES_REFRESH_SECONDS
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stock-hold-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def sweep(self) -> int:
+        """Barre en lotes hasta que no quedan vencidas"""
+        total = 0
+        while True:
+            with SessionLocal() as db:
+                released = InventoryService.sweep_expired(db)
+                db.commit()
+            total += released
+            if released < settings.PURCHASE_HOLD_SWEEP_BATCH:
+                break
+        if total:
+            logger.info(f"🧹 Reservas de stock vencidas liberadas: {total}")
+        return total
+
+    def refresh_events(self) -> int:
+        """Agregados de los eventos pendientes, cada uno en su propia transacción corta"""
+        with _stale_lock:
+            event_ids = list(_stale_events)
+            _stale_events.clear()
+        for event_id in event_ids:
+            try:
+                with SessionLocal() as db:
+                    refresh_event_aggregates(db, event_id)
+                    db.commit()
+            except Exception as e:
+                with _stale_lock:
+                    _stale_events.add(event_id)  # se reintenta en la siguiente vuelta
+                logger.warning(f"⚠️ No se pudieron recalcular los agregados del evento {event_id} ({e})")
+        return len(event_ids)
+
+    def _run(self) -> None:
+        last_sweep = None
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if last_sweep is None or now - last_sweep >= settings.PURCHASE_HOLD_SWEEP_SECONDS:
+                last_sweep = now
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.warning(f"⚠️ Barrido de reservas fallido ({e})")
+            self.refresh_events()
+            self._stop.wait(settings.EVENT_AGGREGATES_REFRESH_SECONDS)
+
+
+hold_sweeper = HoldSweeper()
@@ -13,7 +13,8 @@ from app.models.payment import Payment, PaymentMethod, PaymentStatus
 from app.models.user import User
 #nuevo para correos
 from app.utils.email_service import email_service
-from app.utils.qr_generator import generate_qr_image, generate_ticket_qr_data
+from app.core.metrics import TICKETS_ISSUED
+from app.utils.qr_generator import generate_ticket_qr_data, qr_data_url, ticket_qr_payload
 
 
 
@@ -75,7 +76,7 @@ class MarketplaceService:
                 raise Exception("No se encontró el ticket original asociado al listado.")
             
             # Guardar el QR original antes de invalidarlo
-            original_ticket_qr = original_ticket.qrCode or ""
+            original_ticket_qr = ticket_qr_payload(original_ticket.id, original_ticket.event_id, original_ticket.qrCode)
             
             # 3. Invalidar el ticket original (del vendedor)
             original_ticket.status = TicketStatus.TRANSFERRED
@@ -130,6 +131,7 @@ class MarketplaceService:
             # 7. Commit de todas las operaciones
             self.db.commit()
             self.db.refresh(new_ticket)
+            TICKETS_ISSUED.labels("marketplace").inc()
 
             # -------------------------------------------
             # 8. Enviar correos al comprador y vendedor
@@ -148,8 +150,8 @@ class MarketplaceService:
             # 2. Generar imagen QR en base64
             from app.utils.imgbb_upload import upload_qr_to_imgbb
 
-            # genera el QR EN BASE64 como ya lo haces
-            qr_image_base64 = generate_qr_image(qr_payload)
+            # QR en base64 (desde la caché de imágenes de QR)
+            qr_image_base64 = qr_data_url(qr_payload)
 
             # súbelo a imgbb
             qr_url = upload_qr_to_imgbb(qr_image_base64)
@@ -1,5 +1,6 @@
 import mercadopago
 from app.core.config import settings
+from app.core.metrics import PAYMENT_PREFERENCES_CREATED
 from app.models.purchase import Purchase
 from app.models.user import User
 from decimal import Decimal
@@ -44,6 +45,10 @@ class PaymentService:
             "expires": False,
             "binary_mode": True
         }
+        if purchase.hold_expires_at:
+            # El checkout cierra cuando vence la reserva de stock
+            preference_data["expires"] = True
+            preference_data["expiration_date_to"] = purchase.hold_expires_at.isoformat(timespec="milliseconds")
         
         logger.info(f"📝 Creando preferencia de pago para compra {purchase.id}")
         logger.debug(f"Preference data: {preference_data}")
@@ -54,6 +59,7 @@ class PaymentService:
             logger.error(f"❌ Error al crear preferencia MP: {preference_response}")
             raise Exception(f"Error al crear preferencia MP: {preference_response.get('response')}")
         
+        PAYMENT_PREFERENCES_CREATED.labels("event").inc()
         logger.info(f"✅ Preferencia creada exitosamente: {preference_response['response']['id']}")
         return preference_response["response"]
 
@@ -119,6 +125,7 @@ class PaymentService:
             logger.error(f"❌ Error al crear preferencia de marketplace: {preference_response}")
             raise Exception(f"Error al crear preferencia MP: {preference_response.get('response')}")
 
+        PAYMENT_PREFERENCES_CREATED.labels("marketplace").inc()
         logger.info(f"✅ Preferencia de marketplace creada: {preference_response['response']['id']}")
         logger.info(f"💡 Nota: El pago irá a la cuenta de la plataforma. La transferencia al vendedor se procesará después.")
         
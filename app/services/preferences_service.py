@@ -5,6 +5,7 @@ from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
+from app.core.response_cache import invalidate_on_commit, user_feed_tag
 from app.models.user import User
 from app.models.event_category import EventCategory
 from app.models.user_category_preference import UserCategoryPreference
@@ -115,6 +116,7 @@ class PreferencesService:
             )
             self.db.add(preference)
 
+        invalidate_on_commit(self.db, user_feed_tag(user_id))  # recalcular /events/for-you
         self.db.commit()
         self.db.refresh(preference)
 
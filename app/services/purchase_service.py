@@ -1,10 +1,12 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import event as sa_event, exists, insert, or_
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Dict, List
 import uuid
 import logging
 import json
+import threading
 from fastapi import HTTPException, status
 
 from app.models.purchase import Purchase, PurchaseStatus
@@ -15,11 +17,52 @@ from app.models.event import Event
 from app.models.user import User
 from app.models.promotion import Promotion, PromotionStatus
 from app.utils.email_service import email_service
-# Si tienes qr_generator.py, impórtalo. Si no, comenta esta línea.
-from app.utils.qr_generator import generate_ticket_qr_data, generate_qr_image
+from app.core.metrics import PURCHASES_FINALIZED, TICKETS_ISSUED
+from app.core.response_cache import invalidate_on_commit, user_feed_tag
+from app.utils.qr_generator import generate_ticket_qr_data, qr_data_urls
+from app.utils.pagination import Keyset
+from app.repositories.event_repository import refresh_event_aggregates
+from app.services.inventory_service import InventoryService, ticket_quantities
+from app.services.stock_counters import stock_counters
 
 logger = logging.getLogger(__name__)
 
+# hold_outcome de una compra pagada que no obtuvo stock: requiere reembolso
+REFUND_PENDING = "refund_pending"
+
+# "Mis compras", más recientes primero (índice ix_purchases_user_created_id)
+PURCHASE_KEYSET = Keyset("created_at", [Purchase.created_at, Purchase.id], descending=True)
+
+# Emails de tickets pendientes del commit de la sesión (session.info)
+_TICKET_EMAILS = "purchase_ticket_emails"
+
+
+def send_ticket_email(to_email: str, tickets: List[dict], **email) -> None:
+    """QR del pedido (generados en lote) y envío; corre en su propio hilo"""
+    try:
+        qr_images = qr_data_urls(ticket["qrCode"] for ticket in tickets)
+        email_service.send_ticket_email(
+            to_email=to_email,
+            tickets=[{**ticket, "qrCode": qr_images[ticket["qrCode"]]} for ticket in tickets],
+            **email
+        )
+        logger.info(f"📧 Email con tickets enviado correctamente a {to_email}")
+    except Exception as email_error:
+        logger.error(f"❌ Error enviando email con tickets: {str(email_error)}")
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _send_pending_ticket_emails(session: Session) -> None:
+    for email in session.info.pop(_TICKET_EMAILS, []):
+        # El commit puede ocurrir en el event loop: el SMTP va en un hilo aparte
+        threading.Thread(target=send_ticket_email, kwargs=email, name="ticket-email", daemon=True).start()
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _discard_pending_ticket_emails(session: Session) -> None:
+    session.info.pop(_TICKET_EMAILS, None)
+
+
 class PurchaseService:
 
     @staticmethod
@@ -75,7 +118,7 @@ class PurchaseService:
         promotion_code: str = None
     ) -> tuple[Purchase, list]:
         """
-        Crea una compra en estado PENDING y valida el stock.
+        Crea una compra en estado PENDING y reserva su stock hasta hold_expires_at.
         """
         # 1. Obtener y validar el evento
         event = db.query(Event).filter(Event.id == event_id).first()
@@ -103,21 +146,17 @@ class PurchaseService:
             if not ticket_type:
                 raise HTTPException(status_code=404, detail=f"Tipo de ticket {t_id} no encontrado")
             
-            # ✅ CORRECCIÓN: Calcular stock disponible manualmente
-            available_stock = ticket_type.quantity_available - ticket_type.sold_quantity
-            
-            if available_stock < qty:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"No hay suficiente stock para {ticket_type.name}. Disponibles: {available_stock}"
-                )
-
             ticket_selections.append({
                 "ticket_type": ticket_type,
                 "quantity": qty,
                 "ticket_type_id": str(t_id)  # ✅ Guardar el ID como string para JSON
             })
 
+        # 2.1 Reservar el stock (UPDATE condicional por tipo): se confirma junto con la compra
+        hold_expires_at = InventoryService.hold(
+            db, [(selection["ticket_type"], selection["quantity"]) for selection in ticket_selections]
+        )
+
         # 3. Validar Promoción
         promotion = None
         print(">>> PROMOTION CODE RECIBIDO:", promotion_code)
@@ -179,7 +218,8 @@ class PurchaseService:
             unit_price=avg_unit_price,
             buyer_email="", 
             promotion_id=promotion.id if promotion else None,
-            notes=notes_json  # ✅ Guardar detalles de tickets
+            notes=notes_json,  # ✅ Guardar detalles de tickets
+            hold_expires_at=hold_expires_at
         )
         
         db.add(new_purchase)
@@ -190,6 +230,106 @@ class PurchaseService:
         
         return new_purchase, mp_items
 
+    @staticmethod
+    def _build_ticket_rows(db: Session, purchase: Purchase, quantities: Dict[uuid.UUID, int]) -> List[dict]:
+        """
+        Filas de los tickets de la compra para un INSERT masivo. Los ids se
+        generan aquí (no hace falta un flush por ticket para armar el contenido
+        del QR) y los tipos se cargan en una sola consulta.
+        """
+        ticket_types = {
+            ticket_type.id: ticket_type
+            for ticket_type in db.query(TicketType).filter(TicketType.id.in_(list(quantities)))
+        }
+        rows = []
+        for ticket_type_id, quantity in quantities.items():
+            ticket_type = ticket_types.get(ticket_type_id)
+            if not ticket_type:
+                logger.error(f"❌ Ticket type {ticket_type_id} not found, skipping")
+                continue
+
+            logger.info(f"✅ Creating {quantity} tickets for type: {ticket_type.name}")
+            for _ in range(quantity):
+                ticket_id = uuid.uuid4()
+                rows.append({
+                    "id": ticket_id,
+                    "event_id": purchase.event_id,
+                    "user_id": purchase.user_id,
+                    "purchase_id": purchase.id,
+                    "payment_id": purchase.payment_id,
+                    "ticket_type_id": ticket_type_id,
+                    "status": TicketStatus.ACTIVE,
+                    "price": ticket_type.price,
+                    # Solo el contenido: la imagen se genera en /tickets/{id}/qr.png
+                    "qrCode": generate_ticket_qr_data(str(ticket_id), str(purchase.event_id)),
+                    "isValid": True,
+                })
+        return rows
+
+    @staticmethod
+    def _send_tickets_on_commit(db: Session, purchase: Purchase, ticket_rows: List[dict]) -> None:
+        """
+        Programa el email de los tickets para cuando la sesión confirme: los QR y
+        el SMTP no corren con la transacción (y la fila del evento) abierta
+        """
+        event = db.query(Event).filter(Event.id == purchase.event_id).first()
+        user = db.query(User).filter(User.id == purchase.user_id).first()
+
+        if not event:
+            raise Exception("Evento no encontrado durante finalización")
+        if not user:
+            raise Exception("Usuario no encontrado durante finalización")
+
+        db.info.setdefault(_TICKET_EMAILS, []).append(dict(
+            to_email=purchase.buyer_email,
+            first_name=user.firstName if user.firstName else "Cliente",
+            event_title=event.title,
+            event_date=event.startDate.strftime("%d/%m/%Y %H:%M"),
+            event_venue=event.venue,
+            tickets=[
+                {"id": str(row["id"]), "qrCode": row["qrCode"], "price": float(row["price"])}
+                for row in ticket_rows
+            ]
+        ))
+
+    @staticmethod
+    def _fail_for_refund(db: Session, purchase: Purchase, payment_info: dict) -> Purchase:
+        """
+        Pago aprobado sin stock (la reserva venció y el tipo se agotó): deshace
+        la finalización y confirma, en su propia transacción, la compra FAILED
+        con el pago registrado y pendiente de reembolso. Así el webhook responde
+        200 sin perder el cobro.
+        """
+        db.rollback()
+        purchase = (
+            db.query(Purchase)
+            .filter(Purchase.id == purchase.id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+        if purchase.hold_outcome != REFUND_PENDING:
+            payment = Payment(
+                user_id=purchase.user_id,
+                amount=purchase.total_amount,
+                paymentMethod=PaymentMethod.MERCADOPAGO,
+                status=PaymentStatus.COMPLETED,
+                transactionId=str(payment_info.get("id")),
+                paymentDate=datetime.now(timezone.utc)
+            )
+            db.add(payment)
+            db.flush()
+            purchase.payment_id = payment.id
+            purchase.payment_date = datetime.now(timezone.utc)
+            purchase.payment_reference = str(payment_info.get("id"))
+            purchase.status = PurchaseStatus.FAILED
+            purchase.hold_outcome = REFUND_PENDING
+            purchase.refund_reason = "Pago aprobado sin stock: la reserva venció y el tipo se agotó"
+        db.commit()
+        PURCHASES_FINALIZED.labels("refund_pending").inc()
+        logger.error(f"❌ Compra {purchase.id} FAILED con el pago {payment_info.get('id')} pendiente de reembolso")
+        return purchase
+
     @staticmethod
     def finalize_purchase_transaction(
         db: Session,
@@ -197,8 +337,26 @@ class PurchaseService:
         payment_info: dict
     ) -> Purchase:
         """
-        Finaliza una compra exitosa: Genera tickets y actualiza stock.
+        Finaliza una compra exitosa: convierte la reserva en venta y genera los tickets.
         """
+        # Dos notificaciones de aprobación a la vez: la segunda espera el lock de
+        # la fila y, al obtenerlo, ve la compra ya finalizada
+        purchase = (
+            db.query(Purchase)
+            .filter(Purchase.id == purchase.id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+        has_tickets = db.query(exists().where(Ticket.purchase_id == purchase.id)).scalar()
+        if purchase.status == PurchaseStatus.COMPLETED and has_tickets:
+            # Notificación repetida de MercadoPago: los tickets ya se emitieron
+            logger.info(f"ℹ️ Compra {purchase.id} ya finalizada, se ignora")
+            return purchase
+        if purchase.hold_outcome == REFUND_PENDING:
+            logger.info(f"ℹ️ Compra {purchase.id} ya registrada para reembolso, se ignora")
+            return purchase
+
         try:
             logger.info(f"🔄 Iniciando finalización de compra {purchase.id}")
             
@@ -252,104 +410,43 @@ class PurchaseService:
                     "price": float(first_tt.price)
                 }]
             
-            # 4. Generar tickets para cada tipo
-            tickets_created = 0
-            for detail in ticket_details:
-                ticket_type_id = detail["ticket_type_id"]
-                quantity = detail["quantity"]
-                
-                # Verificar que el ticket_type existe
-                ticket_type = db.query(TicketType).filter(TicketType.id == ticket_type_id).first()
-                if not ticket_type:
-                    logger.error(f"❌ Ticket type {ticket_type_id} not found, skipping")
-                    continue
-                
-                logger.info(f"✅ Creating {quantity} tickets for type: {ticket_type.name}")
-                
-                # Generar los tickets para este tipo
-                for i in range(quantity):
-                    try:
-                        new_ticket = Ticket(
-                            event_id=purchase.event_id,
-                            user_id=purchase.user_id,
-                            purchase_id=purchase.id,
-                            status=TicketStatus.ACTIVE,
-                            ticket_type_id=ticket_type_id,
-                            price=ticket_type.price,
-                            isValid=True,
-                            payment_id=purchase.payment_id
-                        )
-                        
-                        db.add(new_ticket)
-                        db.flush()  # Para obtener el ID antes de generar el QR
-                        
-                        # Generar QR
-                        try:
-                            qr_payload = generate_ticket_qr_data(str(new_ticket.id), str(purchase.event_id))
-                            new_ticket.qrCode = generate_qr_image(qr_payload)
-                            logger.info(f"✅ QR generated for ticket {new_ticket.id}")
-                        except Exception as qr_error:
-                            logger.warning(f"⚠️ Could not generate QR: {qr_error}")
-                        
-                        tickets_created += 1
-                        logger.info(f"✅ Ticket {tickets_created} created for type {ticket_type.name}")
-                        
-                    except Exception as ticket_error:
-                        logger.error(f"❌ Error creating ticket: {str(ticket_error)}")
-                        raise Exception(f"Error al crear ticket: {str(ticket_error)}")
-                
-                # Actualizar stock vendido para este tipo de ticket
-                try:
-                    ticket_type.sold_quantity += quantity
-                    logger.info(f"✅ Stock updated for {ticket_type.name}: sold_quantity = {ticket_type.sold_quantity}")
-                except Exception as stock_error:
-                    logger.error(f"❌ Error updating stock: {str(stock_error)}")
-                    raise Exception(f"Error al actualizar stock: {str(stock_error)}")
-            
-            # 5. Flush para guardar todos los cambios
-            db.flush()
-            logger.info(f"✅ Compra {purchase.id} finalizada exitosamente. {tickets_created} tickets creados")
-            
-            # 6. Enviar email con los tickets
-            event = db.query(Event).filter(Event.id == purchase.event_id).first()
-            user = db.query(User).filter(User.id == purchase.user_id).first()
-
-            if not event:
-                raise Exception("Evento no encontrado durante finalización")
-            if not user:
-                raise Exception("Usuario no encontrado durante finalización")
-            
+            # 3.1 La reserva pasa a venta (o se vende lo que quede si venció): un UPDATE por tipo
+            quantities = ticket_quantities(ticket_details)
             try:
-                # Preparar datos de tickets
-                ticket_data = [
-                    {
-                        "id": str(t.id),
-                        "qrCode": t.qrCode,
-                        "price": float(t.price)
-                    }
-                    for t in purchase.tickets
-                ]
-
-                email_service.send_ticket_email(
-                    to_email=purchase.buyer_email,
-                    first_name=user.firstName if user.firstName else "Cliente",
-                    event_title=event.title,
-                    event_date=event.startDate.strftime("%d/%m/%Y %H:%M"),
-                    event_venue=event.venue,
-                    tickets=ticket_data
-                )
+                InventoryService.convert(db, purchase, quantities)
+            except HTTPException as e:
+                if e.status_code != status.HTTP_409_CONFLICT:
+                    raise
+                return PurchaseService._fail_for_refund(db, purchase, payment_info)
 
-                logger.info(f"📧 Email con tickets enviado correctamente a {purchase.buyer_email}")
+            # 4. Generar los tickets de todos los tipos en un solo INSERT
+            ticket_rows = PurchaseService._build_ticket_rows(db, purchase, quantities)
+            if ticket_rows:
+                db.execute(insert(Ticket), ticket_rows)
+            db.expire(purchase, ["tickets"])
+            tickets_created = len(ticket_rows)
+
+            # 5. Flush para guardar todos los cambios
+            db.flush()
+            invalidate_on_commit(db, user_feed_tag(purchase.user_id))  # la compra cambia su feed
 
-            except Exception as email_error:
-                logger.error(f"❌ Error enviando email con tickets: {str(email_error)}")
+            # 6. Email con los tickets: se envía después del commit del llamador
+            PurchaseService._send_tickets_on_commit(db, purchase, ticket_rows)
 
+            # 7. Vendidos/disponibles del evento al final, justo antes del commit: la fila del
+            #    evento queda bloqueada lo menos posible (con contadores lo hace el volcado)
+            if not stock_counters.enabled:
+                refresh_event_aggregates(db, purchase.event_id)
+            logger.info(f"✅ Compra {purchase.id} finalizada exitosamente. {tickets_created} tickets creados")
+            PURCHASES_FINALIZED.labels("success").inc()
+            TICKETS_ISSUED.labels("purchase").inc(tickets_created)
             return purchase
 
         except Exception as e:
             logger.error(f"❌ Error al finalizar compra {purchase.id}: {str(e)}")
             logger.error(f"❌ Error type: {type(e).__name__}")
             logger.error(f"❌ Error details: {repr(e)}")
+            PURCHASES_FINALIZED.labels("failed").inc()
             
             # Marcar compra como fallida
             try:
@@ -365,17 +462,22 @@ class PurchaseService:
         db: Session,
         user_id: uuid.UUID,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        cursor: str = None
     ) -> tuple:
-        query = db.query(Purchase).filter(
-            Purchase.user_id == user_id
-        ).order_by(Purchase.created_at.desc())
-        
-        total = query.count()
-        offset = (page - 1) * page_size
-        purchases = query.offset(offset).limit(page_size).all()
-        
-        return purchases, total
+        """Devuelve (compras, total, next_cursor); con cursor no se cuenta (total None)"""
+        query = db.query(Purchase).filter(Purchase.user_id == user_id)
+
+        if cursor:
+            total, offset = None, 0
+            query = query.filter(PURCHASE_KEYSET.after(PURCHASE_KEYSET.decode(cursor)))
+        else:
+            total, offset = query.count(), (page - 1) * page_size
+
+        purchases = query.order_by(*PURCHASE_KEYSET.order_by()).offset(offset).limit(page_size + 1).all()
+        purchases, next_cursor = PURCHASE_KEYSET.paginate(purchases, page_size)
+
+        return purchases, total, next_cursor
 
     @staticmethod
     def get_purchase_details(
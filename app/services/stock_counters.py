@@ -0,0 +1,635 @@
+"""
+Contadores de stock de los tipos de ticket en Redis, con escritura diferida.
+
+Con STOCK_COUNTERS_BACKEND activo, las reservas de las compras y las consultas
+de disponibilidad no tocan la fila de ticket_types (la más disputada en una
+salida a la venta): cada tipo tiene en Redis lo que queda a la venta y un
+script Lua lo descuenta o devuelve de forma atómica (todos los tipos de la
+compra o ninguno).
+
+- Siembra: al publicar el evento (y al editar sus tipos) se copia
+  quantity_available - sold_quantity - held_quantity; si falta, se siembra
+  al primer uso. Siempre el evento entero: el set de tipos del evento (que
+  lee la disponibilidad) se escribe recién con todos sus contadores.
+- Cada cambio deja su delta de held/sold pendiente; StockReconciler los
+  vuelca en lotes a ticket_types.held_quantity/sold_quantity (un UPDATE y un
+  commit por tipo) cada STOCK_COUNTERS_FLUSH_SECONDS y recalcula los agregados
+  del evento. Si el UPDATE de un tipo falla (p. ej. ck_ticket_types_stock) su
+  delta vuelve a quedar pendiente y se registra; el resto del lote se vuelca.
+- Deriva: tras volcar, el contador debe ser igual a lo que dice la base menos
+  los deltas aún pendientes. Si no (Redis reiniciado, edición por fuera de la
+  app), se corrige al valor de la base y se cuenta en STOCK_COUNTER_DRIFT.
+- Los cambios hechos dentro de una transacción se deshacen si esta no llega a
+  confirmarse (p. ej. la compra falla después de reservar). Si el proceso cae
+  entre Redis y el commit no hay quien los deshaga: la revisión completa
+  compara held con las compras que tienen reserva activa y libera el exceso
+  que sigue ahí en la revisión siguiente (reservas huérfanas).
+- Sin Redis las compras responden 503 (la base va atrasada en los deltas sin
+  volcar: reservar en ella vendería de más); la disponibilidad se lee de la base.
+
+Backends: "redis" (el cliente de la caché de respuestas), "memory" (el mismo
+algoritmo en el proceso, un Redis de mentira para tests y desarrollo con un
+solo worker) y "off" (reservas con UPDATE condicional en la base, ver
+inventory_service). "auto" usa Redis si la caché de respuestas lo usa y si no
+queda apagado: con varios workers, contadores en memoria venderían de más.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import redis
+from sqlalchemy import event as sa_event, select, update
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import STOCK_COUNTER_DRIFT, STOCK_COUNTER_FLUSHES
+from app.core.response_cache import RedisBackend, response_cache
+from app.models.purchase import Purchase
+from app.models.ticket_type import TicketType
+from app.repositories.event_repository import refresh_event_aggregates
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ticketify:stock:"
+PENDING = KEY_PREFIX + "pending"  # hash "<tipo>:held" / "<tipo>:sold" -> delta sin volcar
+FLUSHING = KEY_PREFIX + "flushing"  # deltas que se están volcando
+LOCK = KEY_PREFIX + "lock"  # volcado y siembra no se cruzan entre workers
+
+# (tipo, delta de restantes, delta de held, delta de sold)
+Op = Tuple[str, int, int, int]
+
+NOT_SEEDED, SHORT, APPLIED = -1, 0, 1
+
+# KEYS: contador de cada tipo + PENDING. ARGV: check, luego (id, restantes, held, sold) por tipo
+APPLY_SCRIPT = """
+local n = #KEYS - 1
+for i = 1, n do
+  local v = redis.call('GET', KEYS[i])
+  if not v then return {-1, i, 0} end
+  if ARGV[1] == '1' and tonumber(v) + tonumber(ARGV[4 * i - 1]) < 0 then return {0, i, tonumber(v)} end
+end
+for i = 1, n do
+  local id = ARGV[4 * i - 2]
+  redis.call('INCRBY', KEYS[i], ARGV[4 * i - 1])
+  if ARGV[4 * i] ~= '0' then redis.call('HINCRBY', KEYS[n + 1], id .. ':held', ARGV[4 * i]) end
+  if ARGV[4 * i + 1] ~= '0' then redis.call('HINCRBY', KEYS[n + 1], id .. ':sold', ARGV[4 * i + 1]) end
+end
+return {1, 0, 0}
+"""
+
+# KEYS: contador, PENDING, FLUSHING. ARGV: id, restantes en la base, overwrite
+SEED_SCRIPT = """
+local id = ARGV[1]
+local inflight = 0
+for _, h in ipairs({KEYS[2], KEYS[3]}) do
+  inflight = inflight + (tonumber(redis.call('HGET', h, id .. ':held')) or 0)
+                      + (tonumber(redis.call('HGET', h, id .. ':sold')) or 0)
+end
+local value = tonumber(ARGV[2]) - inflight
+local previous = redis.call('GET', KEYS[1])
+if previous and ARGV[3] ~= '1' then return {previous, previous} end
+redis.call('SET', KEYS[1], value)
+return {previous or '', tostring(value)}
+"""
+
+# Pasa PENDING a FLUSHING; si quedó un FLUSHING de un volcado interrumpido se reintenta ese
+TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+  if redis.call('EXISTS', KEYS[1]) == 0 then return {} end
+  redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# Lo que quedó sin volcar en FLUSHING vuelve a PENDING
+RESTORE_SCRIPT = """
+local d = redis.call('HGETALL', KEYS[2])
+for i = 1, #d, 2 do redis.call('HINCRBY', KEYS[1], d[i], d[i + 1]) end
+redis.call('DEL', KEYS[2])
+return #d / 2
+"""
+
+UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+def counter_key(ticket_type_id: str) -> str:
+    return f"{KEY_PREFIX}{ticket_type_id}"
+
+
+def event_key(event_id: str) -> str:
+    return f"{KEY_PREFIX}event:{event_id}"
+
+
+def parse_deltas(fields: Dict[str, int]) -> Dict[str, List[int]]:
+    """{"<tipo>:held": n, "<tipo>:sold": m} -> {tipo: [held, sold]}"""
+    deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for field, value in fields.items():
+        ticket_type_id, column = field.rsplit(":", 1)
+        deltas[ticket_type_id][0 if column == "held" else 1] += int(value)
+    return deltas
+
+
+# ============= BACKENDS =============
+
+class MemoryCounterBackend:
+    """Mismas operaciones que RedisCounterBackend, en el proceso (tests, un solo worker)"""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.events: Dict[str, set] = {}
+        self.pending: Dict[str, int] = defaultdict(int)
+        self.flushing: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+
+    def apply(self, ops: List[Op], check: bool) -> Tuple[int, int, int]:
+        with self._lock:
+            for i, (ticket_type_id, remaining, _, _) in enumerate(ops, 1):
+                value = self.counters.get(ticket_type_id)
+                if value is None:
+                    return NOT_SEEDED, i, 0
+                if check and value + remaining < 0:
+                    return SHORT, i, value
+            for ticket_type_id, remaining, held, sold in ops:
+                self.counters[ticket_type_id] += remaining
+                if held:
+                    self.pending[f"{ticket_type_id}:held"] += held
+                if sold:
+                    self.pending[f"{ticket_type_id}:sold"] += sold
+            return APPLIED, 0, 0
+
+    def seed(self, ticket_type_id: str, db_remaining: int, overwrite: bool) -> Tuple[Optional[int], int]:
+        with self._lock:
+            inflight = sum(
+                h.get(f"{ticket_type_id}:{column}", 0)
+                for h in (self.pending, self.flushing) for column in ("held", "sold")
+            )
+            previous = self.counters.get(ticket_type_id)
+            if previous is not None and not overwrite:
+                return previous, previous
+            self.counters[ticket_type_id] = db_remaining - inflight
+            return previous, self.counters[ticket_type_id]
+
+    def get(self, ticket_type_ids: List[str]) -> List[Optional[int]]:
+        with self._lock:
+            return [self.counters.get(ticket_type_id) for ticket_type_id in ticket_type_ids]
+
+    def event_ids(self, event_id: str) -> Optional[List[str]]:
+        with self._lock:
+            ids = self.events.get(event_id)
+            return sorted(ids) if ids else None
+
+    def seeded_ids(self) -> List[str]:
+        with self._lock:
+            return list(self.counters)
+
+    def pending_deltas(self, ticket_type_ids: List[str]) -> List[Tuple[int, int]]:
+        with self._lock:
+            return [
+                tuple(
+                    self.pending.get(f"{ticket_type_id}:{column}", 0)
+                    + self.flushing.get(f"{ticket_type_id}:{column}", 0)
+                    for column in ("held", "sold")
+                )
+                for ticket_type_id in ticket_type_ids
+            ]
+
+    def index_event(self, event_id: str, ticket_type_ids: List[str]) -> None:
+        with self._lock:
+            self.events[event_id] = set(ticket_type_ids)
+
+    def take(self) -> Dict[str, int]:
+        with self._lock:
+            if not self.flushing:
+                self.flushing = {k: v for k, v in self.pending.items() if v}
+                self.pending.clear()
+            return dict(self.flushing)
+
+    def discard(self, fields: List[str]) -> None:
+        """Deltas ya volcados a la base"""
+        with self._lock:
+            for field in fields:
+                self.flushing.pop(field, None)
+
+    def finish(self, ok: bool) -> None:
+        with self._lock:
+            if not ok:
+                for field, value in self.flushing.items():
+                    self.pending[field] += value
+            self.flushing = {}
+
+    @contextmanager
+    def lock(self):
+        with self._reconcile_lock:
+            yield
+
+
+class RedisCounterBackend:
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self._apply = client.register_script(APPLY_SCRIPT)
+        self._seed = client.register_script(SEED_SCRIPT)
+        self._take = client.register_script(TAKE_SCRIPT)
+        self._restore = client.register_script(RESTORE_SCRIPT)
+        self._unlock = client.register_script(UNLOCK_SCRIPT)
+
+    def apply(self, ops: List[Op], check: bool) -> Tuple[int, int, int]:
+        args = ["1" if check else "0"]
+        for op in ops:
+            args.extend(op)
+        result, index, value = self._apply(keys=[counter_key(op[0]) for op in ops] + [PENDING], args=args)
+        return int(result), int(index), int(value)
+
+    def seed(self, ticket_type_id: str, db_remaining: int, overwrite: bool) -> Tuple[Optional[int], int]:
+        previous, value = self._seed(
+            keys=[counter_key(ticket_type_id), PENDING, FLUSHING],
+            args=[ticket_type_id, db_remaining, "1" if overwrite else "0"]
+        )
+        return (int(previous) if previous else None), int(value)
+
+    def get(self, ticket_type_ids: List[str]) -> List[Optional[int]]:
+        if not ticket_type_ids:
+            return []
+        values = self.client.mget([counter_key(ticket_type_id) for ticket_type_id in ticket_type_ids])
+        return [int(value) if value is not None else None for value in values]
+
+    def event_ids(self, event_id: str) -> Optional[List[str]]:
+        ids = self.client.smembers(event_key(event_id))
+        return sorted(i.decode() for i in ids) if ids else None
+
+    def seeded_ids(self) -> List[str]:
+        ids = set()
+        for key in self.client.scan_iter(match=f"{KEY_PREFIX}event:*", count=500):
+            ids.update(i.decode() for i in self.client.smembers(key))
+        return list(ids)
+
+    def pending_deltas(self, ticket_type_ids: List[str]) -> List[Tuple[int, int]]:
+        if not ticket_type_ids:
+            return []
+        fields = [f"{ticket_type_id}:{column}" for ticket_type_id in ticket_type_ids for column in ("held", "sold")]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hmget(PENDING, fields)
+        pipe.hmget(FLUSHING, fields)
+        pending, flushing = pipe.execute()
+        totals = [int(p or 0) + int(f or 0) for p, f in zip(pending, flushing)]
+        return [(totals[i], totals[i + 1]) for i in range(0, len(totals), 2)]
+
+    def index_event(self, event_id: str, ticket_type_ids: List[str]) -> None:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(event_key(event_id))
+        if ticket_type_ids:
+            pipe.sadd(event_key(event_id), *ticket_type_ids)
+        pipe.execute()
+
+    def take(self) -> Dict[str, int]:
+        flat = self._take(keys=[PENDING, FLUSHING])
+        return {flat[i].decode(): int(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+    def discard(self, fields: List[str]) -> None:
+        self.client.hdel(FLUSHING, *fields)
+
+    def finish(self, ok: bool) -> None:
+        if ok:
+            self.client.delete(FLUSHING)
+        else:
+            self._restore(keys=[PENDING, FLUSHING])
+
+    @contextmanager
+    def lock(self, timeout: float = 10.0):
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while not self.client.set(LOCK, token, nx=True, px=int(timeout * 1000)):
+            if time.monotonic() > deadline:
+                raise TimeoutError("Contadores de stock: lock de volcado ocupado")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self._unlock(keys=[LOCK], args=[token])
+
+
+# ============= CONTADORES =============
+
+_UNDO = "stock_counters_undo"
+
+
+class StockCounters:
+    def __init__(self):
+        self._backend = None
+        self._resolved = False
+        self._lock = threading.Lock()
+        self._orphans: Dict[str, int] = {}  # exceso de held visto en la última revisión completa
+
+    @property
+    def backend(self):
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    self._backend = self._create_backend()
+                    self._resolved = True
+        return self._backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def _create_backend():
+        kind = settings.STOCK_COUNTERS_BACKEND
+        if kind == "off":
+            return None
+        if kind == "memory":
+            return MemoryCounterBackend()
+        if kind not in ("redis", "auto"):
+            raise ValueError(f"STOCK_COUNTERS_BACKEND desconocido: {kind}")
+        cache_backend = response_cache.backend
+        if isinstance(cache_backend, RedisBackend):
+            return RedisCounterBackend(cache_backend.client)
+        if kind == "redis":
+            return RedisCounterBackend(redis.Redis.from_url(settings.REDIS_URL))
+        return None
+
+    # ----- siembra -----
+
+    def seed(self, db: Session, event_id, overwrite: bool = True) -> Dict[str, Tuple[Optional[int], int]]:
+        """
+        Copia a Redis lo que queda a la venta de cada tipo del evento según la
+        base, menos los deltas aún sin volcar, y después reemplaza el set de
+        tipos del evento. Devuelve {tipo: (valor anterior, valor sembrado)}.
+        """
+        with self.backend.lock():
+            rows = db.execute(
+                select(
+                    TicketType.id,
+                    TicketType.quantity_available - TicketType.sold_quantity - TicketType.held_quantity
+                ).where(TicketType.event_id == event_id)
+            ).all()
+            seeded = {str(row[0]): self.backend.seed(str(row[0]), int(row[1]), overwrite) for row in rows}
+            self.backend.index_event(str(event_id), list(seeded))  # sin los tipos eliminados
+            return seeded
+
+    def seed_event(self, db: Session, event_id: UUID, overwrite: bool = True) -> None:
+        """Al publicar o editar los tipos del evento (después del commit)"""
+        if not self.enabled:
+            return
+        try:
+            self.seed(db, event_id, overwrite)
+        except (redis.RedisError, TimeoutError) as e:
+            logger.warning(f"⚠️ Contadores de stock: no se pudo sembrar el evento {event_id} ({e})")
+
+    # ----- operaciones de las compras -----
+
+    def _apply(self, db: Session, ops: List[Op], check: bool) -> Tuple[int, int, int]:
+        """Aplica ops (sembrando lo que falte) y programa su inversa si la transacción no se confirma"""
+        try:
+            result = self.backend.apply(ops, check)
+            if result[0] == NOT_SEEDED:
+                event_ids = db.execute(
+                    select(TicketType.event_id).where(TicketType.id.in_([UUID(op[0]) for op in ops])).distinct()
+                ).scalars().all()
+                for event_id in event_ids:
+                    self.seed(db, event_id, overwrite=False)
+                result = self.backend.apply(ops, check)
+        except (redis.RedisError, TimeoutError) as e:
+            logger.error(f"❌ Contadores de stock: Redis no responde ({e})")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El inventario no está disponible, intenta nuevamente en unos segundos",
+                headers={"Retry-After": "5"}
+            )
+        if result[0] == APPLIED:
+            if not db.in_transaction():
+                db.begin()  # sin consultas previas no hay transacción que termine y deshaga
+            db.info.setdefault(_UNDO, []).extend((t, -r, -h, -s) for t, r, h, s in ops)
+        return result
+
+    def reserve(self, db: Session, quantities: List[Tuple[UUID, int]], sell: bool = False) -> Optional[Tuple[UUID, int]]:
+        """
+        Descuenta todos los (tipo, cantidad) o ninguno: como reserva (held) o,
+        con sell, como venta directa. Devuelve (tipo, disponibles) del primero
+        que no alcanza, o None si se descontó. Las cantidades de un mismo tipo
+        se suman: cada op se valida sola contra el contador.
+        """
+        merged: Dict[str, int] = {}
+        for ticket_type_id, quantity in quantities:
+            merged[str(ticket_type_id)] = merged.get(str(ticket_type_id), 0) + quantity
+        ops = [(t, -q, 0 if sell else q, q if sell else 0) for t, q in sorted(merged.items())]
+        result, index, available = self._apply(db, ops, check=True)
+        if result == APPLIED:
+            return None
+        return UUID(ops[index - 1][0]), max(0, available)
+
+    def convert(self, db: Session, quantities: Dict[UUID, int]) -> None:
+        """Reserva -> venta: los restantes no cambian"""
+        self._apply(db, [(str(t), 0, -q, q) for t, q in sorted(quantities.items())], check=False)
+
+    def release(self, db: Session, quantities: Dict[UUID, int]) -> None:
+        """Devuelve una reserva al stock"""
+        self._apply(db, [(str(t), q, -q, 0) for t, q in sorted(quantities.items())], check=False)
+
+    def pending(self, ticket_type_ids: List[UUID]) -> Dict[UUID, Tuple[int, int]]:
+        """
+        {tipo: (held, sold)} aún sin volcar a ticket_types. Sin Redis responde
+        503: validar contra la base atrasada dejaría borrar o achicar tipos con
+        reservas o ventas recientes
+        """
+        try:
+            deltas = self.backend.pending_deltas([str(t) for t in ticket_type_ids])
+        except redis.RedisError as e:
+            logger.error(f"❌ Contadores de stock: Redis no responde ({e})")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="El inventario no está disponible, intenta nuevamente en unos segundos",
+                headers={"Retry-After": "5"}
+            )
+        return dict(zip(ticket_type_ids, deltas))
+
+    def available(self, db: Session, event_id: UUID) -> Optional[Dict[str, int]]:
+        """{tipo: restantes} del evento, sin tocar la base salvo para sembrar; None si Redis no responde"""
+        try:
+            ids = self.backend.event_ids(str(event_id))
+            if ids is None:
+                self.seed_event(db, event_id, overwrite=False)
+                ids = self.backend.event_ids(str(event_id)) or []
+            values = self.backend.get(ids)
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Contadores de stock: Redis no responde, disponibilidad desde la base ({e})")
+            return None
+        return {
+            ticket_type_id: max(0, value)
+            for ticket_type_id, value in zip(ids, values) if value is not None
+        }
+
+    # ----- volcado a la base -----
+
+    def reconcile(self, drift_check_all: bool = False) -> int:
+        """Vuelca los deltas pendientes en ticket_types y corrige la deriva; devuelve tipos volcados"""
+        with self.backend.lock():
+            fields = self.backend.take()
+            deltas = parse_deltas(fields)
+            with SessionLocal() as db:
+                failed, event_ids = [], set()
+                for ticket_type_id, (held, sold) in deltas.items():
+                    # Un commit por tipo: una fila que no acepta su delta no frena al resto
+                    try:
+                        event_id = db.execute(
+                            update(TicketType)
+                            .where(TicketType.id == UUID(ticket_type_id))
+                            .values(
+                                held_quantity=TicketType.held_quantity + held,
+                                sold_quantity=TicketType.sold_quantity + sold
+                            )
+                            .returning(TicketType.event_id)
+                        ).scalar()
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        failed.append(ticket_type_id)
+                        logger.error(
+                            f"❌ Contadores de stock: no se pudo volcar held {held:+d} / sold {sold:+d} "
+                            f"de {ticket_type_id} ({e}); queda pendiente"
+                        )
+                        continue
+                    self.backend.discard([f"{ticket_type_id}:held", f"{ticket_type_id}:sold"])
+                    if event_id is not None:
+                        event_ids.add(event_id)
+                if deltas:
+                    self.backend.finish(ok=not failed)
+                    STOCK_COUNTER_FLUSHES.labels("failed" if failed else "success").inc()
+
+                # Vendidos/disponibles del evento y su caché (remainingQuantity incluye held)
+                try:
+                    for event_id in event_ids:
+                        refresh_event_aggregates(db, event_id)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"⚠️ Contadores de stock: no se pudieron recalcular los eventos ({e})")
+
+                check = self.backend.seeded_ids() if drift_check_all else list(deltas)
+                if drift_check_all:
+                    self._release_orphans(db, check)
+                self._correct_drift(db, check)
+        return len(deltas) - len(failed)
+
+    def _release_orphans(self, db: Session, ticket_type_ids: List[str]) -> None:
+        """
+        held (base + deltas sin volcar) por encima de lo que suman las compras
+        con reserva activa. Un exceso recién visto puede ser una compra que aún
+        no hizo commit: se libera solo lo que ya estaba en la revisión anterior.
+        """
+        from app.services.inventory_service import purchase_quantities  # importa este módulo
+
+        rows = db.execute(
+            select(TicketType.id, TicketType.event_id, TicketType.held_quantity)
+            .where(TicketType.id.in_([UUID(i) for i in ticket_type_ids]))
+        ).all() if ticket_type_ids else []
+        active: Dict[str, int] = defaultdict(int)
+        if rows:
+            holds = db.query(Purchase).filter(
+                Purchase.event_id.in_({row[1] for row in rows}), Purchase.hold_expires_at.isnot(None)
+            )
+            for purchase in holds:
+                for ticket_type_id, quantity in purchase_quantities(purchase).items():
+                    active[str(ticket_type_id)] += quantity
+
+        orphans = {}
+        ids = [str(row[0]) for row in rows]
+        for (ticket_type_id, _, held), (extra, _) in zip(rows, self.backend.pending_deltas(ids)):
+            ticket_type_id = str(ticket_type_id)
+            excess = held + extra - active[ticket_type_id]
+            if excess <= 0:
+                continue
+            stale = min(excess, self._orphans.get(ticket_type_id, 0))
+            if stale:
+                self.backend.apply([(ticket_type_id, stale, -stale, 0)], check=False)
+                STOCK_COUNTER_DRIFT.inc()
+                logger.warning(f"⚠️ Contadores de stock: {stale} reservas huérfanas de {ticket_type_id} liberadas")
+            orphans[ticket_type_id] = excess - stale
+        self._orphans = orphans
+
+    def _correct_drift(self, db: Session, ticket_type_ids: List[str]) -> None:
+        rows = db.execute(
+            select(TicketType.id,
+                   TicketType.quantity_available - TicketType.sold_quantity - TicketType.held_quantity)
+            .where(TicketType.id.in_([UUID(i) for i in ticket_type_ids]))
+        ).all() if ticket_type_ids else []
+        for ticket_type_id, db_remaining in rows:
+            previous, value = self.backend.seed(str(ticket_type_id), int(db_remaining), True)
+            if previous is not None and previous != value:
+                STOCK_COUNTER_DRIFT.inc()
+                logger.warning(
+                    f"⚠️ Contador de stock de {ticket_type_id} desviado: Redis {previous}, base {value} (corregido)"
+                )
+
+
+stock_counters = StockCounters()
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _forget_undo(session: Session) -> None:
+    session.info.pop(_UNDO, None)
+
+
+@sa_event.listens_for(Session, "after_transaction_end")
+def _undo_uncommitted(session: Session, transaction) -> None:
+    # Rollback o sesión cerrada sin commit: se devuelve lo que la transacción descontó
+    if transaction.parent is not None:
+        return
+    undo = session.info.pop(_UNDO, None)
+    if undo:
+        try:
+            stock_counters.backend.apply(undo, check=False)
+        except redis.RedisError as e:
+            logger.error(f"❌ Contadores de stock: no se pudo deshacer {undo} ({e}); la deriva se corrige al volcar")
+
+
+class StockReconciler:
+    """Hilo que vuelca los contadores cada STOCK_COUNTERS_FLUSH_SECONDS"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._checked_at = 0.0
+
+    def start(self) -> None:
+        if not stock_counters.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stock-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if stock_counters.enabled:
+            try:
+                stock_counters.reconcile()  # lo último antes de apagar
+            except Exception as e:
+                logger.warning(f"⚠️ Contadores de stock: volcado final fallido ({e})")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                check_all = time.monotonic() - self._checked_at >= settings.STOCK_COUNTERS_DRIFT_CHECK_SECONDS
+                stock_counters.reconcile(drift_check_all=check_all)
+                if check_all:
+                    self._checked_at = time.monotonic()
+            except Exception as e:
+                logger.warning(f"⚠️ Contadores de stock: volcado fallido ({e})")
+            self._stop.wait(settings.STOCK_COUNTERS_FLUSH_SECONDS)
+
+
+stock_reconciler = StockReconciler()
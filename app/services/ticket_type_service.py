@@ -1,17 +1,22 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
 from app.repositories.ticket_type_repository import TicketTypeRepository
-from app.repositories.event_repository import EventRepository
+from app.repositories.event_repository import EventRepository, refresh_event_aggregates
 from app.schemas.ticket_type import (
     TicketTypeCreate, 
     TicketTypeUpdate, 
     TicketTypeResponse,
-    TicketTypeUpdateItem
+    TicketTypeUpdateItem,
+    TicketTypeAvailability
 )
 from app.models.ticket_type import TicketType
+from app.services.inventory_service import REMAINING
+from app.services.stock_counters import stock_counters
+from app.utils.http_cache import Validators, latest, make_etag
 from app.models.event import Event
 
 
@@ -50,6 +55,7 @@ class TicketTypeService:
         
         # Create ticket type
         ticket_type = self.ticket_type_repo.create_ticket_type(event_id, ticket_type_data)
+        self._refresh_event_aggregates(event_id)
         
         return self._ticket_type_to_response(ticket_type)
     
@@ -81,6 +87,7 @@ class TicketTypeService:
             event_id, 
             ticket_types_data
         )
+        self._refresh_event_aggregates(event_id)
         
         return [self._ticket_type_to_response(tt) for tt in ticket_types]
 
@@ -95,6 +102,7 @@ class TicketTypeService:
         }
 
         ids_sent = set()
+        stock = self._committed_stock(existing.values())
 
         for it in items:
             if it.id:
@@ -103,6 +111,8 @@ class TicketTypeService:
                 if not tt:
                     continue
 
+                self._check_quantity(tt, it.quantity, stock[tt.id])
+                ids_sent.add(str(tt.id))
                 tt.name = it.name
                 tt.description = it.description
                 tt.price = it.price
@@ -128,12 +138,15 @@ class TicketTypeService:
          # ELIMINAR los que ya no existen en el payload
         for tt_id, tt in existing.items():
             if tt_id not in ids_sent:
-                # si ya tiene vendidas, no lo borres
-                if tt.sold_quantity and tt.sold_quantity > 0:
+                # si ya tiene vendidas o reservas en curso, no lo borres
+                if sum(stock[tt.id]) > 0:
                     continue
                 self.db.delete(tt)
 
+        self.db.flush()
+        refresh_event_aggregates(self.db, event_id)
         self.db.commit()
+        stock_counters.seed_event(self.db, event_id)
         return self.get_ticket_types_by_event(event_id, active_only=False)
     
     def get_ticket_type_by_id(self, ticket_type_id: UUID) -> TicketTypeResponse:
@@ -168,6 +181,33 @@ class TicketTypeService:
         
         return [self._ticket_type_to_response(tt) for tt in ticket_types]
     
+    def get_availability(self, event_id: UUID) -> List[TicketTypeAvailability]:
+        """Restantes por tipo: de los contadores de stock si están activos y responden, si no una consulta"""
+        remaining = stock_counters.available(self.db, event_id) if stock_counters.enabled else None
+        if remaining is None:
+            remaining = {
+                str(ticket_type_id): max(0, value)
+                for ticket_type_id, value in self.db.execute(
+                    select(TicketType.id, REMAINING).where(TicketType.event_id == event_id)
+                )
+            }
+        return [
+            TicketTypeAvailability(ticketTypeId=ticket_type_id, remaining=value)
+            for ticket_type_id, value in remaining.items()
+        ]
+
+    def get_ticket_types_validators(self, event_id: UUID, active_only: bool = False) -> Optional[Validators]:
+        """ETag/Last-Modified de los tipos del evento; None si el evento no existe"""
+        version = self.ticket_type_repo.get_event_version(event_id, active_only)
+        if version is None:
+            return None
+        event_updated_at, updated_at, count = version
+        return Validators(
+            etag=make_etag("ticket-types", event_id, active_only, event_updated_at, updated_at, count),
+            # Borrar un tipo no deja updated_at, pero sí toca el evento (agregados)
+            last_modified=latest(event_updated_at, updated_at),
+        )
+
     def update_ticket_type(
         self, 
         ticket_type_id: UUID, 
@@ -181,8 +221,11 @@ class TicketTypeService:
                 detail="Tipo de entrada no encontrado"
             )
         
-        # If updating quantity, validate against event capacity
+        # If updating quantity, validate against sold/held stock and event capacity
         if ticket_type_data.quantity_available is not None:
+            self._check_quantity(
+                ticket_type, ticket_type_data.quantity_available, self._committed_stock([ticket_type])[ticket_type.id]
+            )
             event = self.event_repo.get_event_by_id(ticket_type.event_id)
             current_capacity = self.ticket_type_repo.get_total_capacity_by_event(
                 ticket_type.event_id
@@ -200,6 +243,7 @@ class TicketTypeService:
             ticket_type_id, 
             ticket_type_data
         )
+        self._refresh_event_aggregates(updated_ticket_type.event_id)
         
         return self._ticket_type_to_response(updated_ticket_type)
     
@@ -220,6 +264,7 @@ class TicketTypeService:
             ticket_type_id, 
             is_active
         )
+        self._refresh_event_aggregates(updated_ticket_type.event_id)
         
         return self._ticket_type_to_response(updated_ticket_type)
     
@@ -233,19 +278,59 @@ class TicketTypeService:
             )
         
         # Check if any tickets have been sold
-        if ticket_type.sold_quantity > 0:
+        sold, held = self._committed_stock([ticket_type])[ticket_type.id]
+        if sold > 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No se puede eliminar un tipo de entrada con tickets vendidos"
             )
         
+        if held > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se puede eliminar un tipo de entrada con reservas en curso"
+            )
+        
+        event_id = ticket_type.event_id
         success = self.ticket_type_repo.delete_ticket_type(ticket_type_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Error al eliminar el tipo de entrada"
             )
+        self._refresh_event_aggregates(event_id)
     
+    @staticmethod
+    def _committed_stock(ticket_types: Iterable[TicketType]) -> Dict[UUID, Tuple[int, int]]:
+        """
+        (vendidas, reservadas) de cada tipo. Con contadores de stock la fila va
+        atrasada: se suman los deltas aún sin volcar, si no el volcado posterior
+        chocaría con un tipo borrado o con ck_ticket_types_stock
+        """
+        stock = {tt.id: (tt.sold_quantity or 0, tt.held_quantity or 0) for tt in ticket_types}
+        if stock_counters.enabled:
+            for ticket_type_id, (held, sold) in stock_counters.pending(list(stock)).items():
+                db_sold, db_held = stock[ticket_type_id]
+                stock[ticket_type_id] = (db_sold + sold, db_held + held)
+        return stock
+
+    @staticmethod
+    def _check_quantity(ticket_type: TicketType, quantity: int, stock: Tuple[int, int]) -> None:
+        """La cantidad no puede quedar por debajo de lo vendido y reservado (ck_ticket_types_stock)"""
+        committed = sum(stock)
+        if quantity < committed:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La cantidad de {ticket_type.name} ({quantity}) no puede ser menor que las "
+                       f"entradas vendidas o reservadas ({committed})"
+            )
+
+    def _refresh_event_aggregates(self, event_id: UUID) -> None:
+        """Precios y stock agregados del evento y sus contadores (el repositorio ya hizo commit de los tipos)"""
+        refresh_event_aggregates(self.db, event_id)
+        self.db.commit()
+        stock_counters.seed_event(self.db, event_id)
+
     def _ticket_type_to_response(self, ticket_type: TicketType) -> TicketTypeResponse:
         """Convert TicketType model to TicketTypeResponse"""
         return TicketTypeResponse(
@@ -0,0 +1,374 @@
+"""
+Sala de espera virtual para salidas a la venta muy demandadas.
+
+Opt-in por evento: Event.waiting_room_rate = compradores admitidos por segundo.
+Con sala activa, POST /purchases/create-preference exige un queueToken ya
+admitido, así la base de datos y MercadoPago reciben a lo sumo esa tasa de
+compras aunque lleguen miles de compradores a la vez.
+
+- POST /events/{id}/queue: el comprador se forma y recibe un token con su turno
+  (seq). Repetirlo devuelve el mismo turno mientras el token viva.
+- GET /events/{id}/queue/{token}: posición, ETA y si ya fue admitido. No toca la
+  base de datos: es una operación en Redis (o en memoria).
+- Un token bucket por evento avanza "admitted" (último turno admitido): se
+  rellena a rate fichas por segundo hasta rate * WAITING_ROOM_BURST_SECONDS y
+  cada ficha admite al siguiente de la fila (FIFO). Se calcula al vuelo en cada
+  join/consulta, sin hilo de fondo.
+- Un token admitido sirve para una compra: admit lo reclama de forma atómica
+  (otra compra simultánea con el mismo token recibe 403), se consume al crear
+  la preferencia y vuelve a la sala si la compra falla.
+
+El estado vive en Redis (script Lua atómico, compartido entre workers; el
+cliente de la caché de respuestas si esta usa Redis). Sin Redis las salas
+activas responden 503: dejar pasar a todos es lo que la sala evita. Solo con
+WAITING_ROOM_BACKEND=memory vive en el proceso, válido con un único worker
+(desarrollo).
+"""
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from uuid import UUID
+
+import redis
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import WAITING_ROOM
+from app.core.response_cache import RedisBackend, response_cache
+from app.core.ttl_cache import TTLCache
+from app.models.event import Event
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ticketify:wr:"
+
+# Rellena el bucket, suma el turno nuevo (join = 1) y admite lo que alcance.
+# Sin rate/burst (consultas de estado) usa los guardados por el último join.
+ADVANCE_SCRIPT = """
+local s = redis.call('HMGET', KEYS[1], 'seq', 'admitted', 'tokens', 'ts', 'rate', 'burst')
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2]) or tonumber(s[5]) or 0
+local burst = tonumber(ARGV[3]) or tonumber(s[6]) or 0
+local seq = (tonumber(s[1]) or 0) + tonumber(ARGV[4])
+local admitted = tonumber(s[2]) or 0
+local tokens = tonumber(s[3]) or burst
+local ts = tonumber(s[4]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local admit = math.min(math.floor(tokens), seq - admitted)
+admitted = admitted + admit
+tokens = tokens - admit
+redis.call('HSET', KEYS[1], 'seq', seq, 'admitted', admitted, 'tokens', tostring(tokens),
+           'ts', tostring(now), 'rate', tostring(rate), 'burst', tostring(burst))
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {seq, admitted, tostring(rate)}
+"""
+
+
+@dataclass
+class Turn:
+    token: str
+    seq: int
+    admitted: int  # último turno admitido de la sala
+    rate: float
+
+    @property
+    def position(self) -> int:
+        """Lugar en la fila (1 = el siguiente en entrar, 0 = admitido)"""
+        return max(0, self.seq - self.admitted)
+
+    @property
+    def eta_seconds(self) -> float:
+        return self.position / self.rate if self.rate else 0.0
+
+
+def advance(room: dict, now: float, rate: float, burst: float, join: int) -> None:
+    """Mismo cálculo que ADVANCE_SCRIPT, sobre el estado en memoria"""
+    tokens = min(burst, room.get("tokens", burst) + max(0.0, now - room.get("ts", now)) * rate)
+    room["seq"] = room.get("seq", 0) + join
+    admit = min(int(tokens), room["seq"] - room.get("admitted", 0))
+    room["admitted"] = room.get("admitted", 0) + admit
+    room["tokens"] = tokens - admit
+    room["ts"], room["rate"], room["burst"] = now, rate, burst
+
+
+# ============= ALMACENES =============
+
+class MemoryRoomStore:
+    """Salas en el proceso: con varios workers cada uno tendría su propia fila"""
+
+    def __init__(self, token_ttl_seconds: float):
+        self.rooms: Dict[str, dict] = {}
+        self.tokens = TTLCache(maxsize=200_000, ttl_seconds=token_ttl_seconds)  # token -> (event, user, seq)
+        self.users = TTLCache(maxsize=200_000, ttl_seconds=token_ttl_seconds)  # (event, user) -> token
+        self._lock = threading.Lock()
+
+    def join(self, event_id: str, user_id: str, rate: float, burst: float, now: float) -> Turn:
+        with self._lock:
+            room = self.rooms.setdefault(event_id, {})
+            token = self.users.get((event_id, user_id))
+            record = self.tokens.get(token) if token else None
+            if record is None:
+                advance(room, now, rate, burst, join=1)
+                token = secrets.token_urlsafe(24)
+                record = (event_id, user_id, room["seq"])
+                self.tokens.set(token, record)
+                self.users.set((event_id, user_id), token)
+            else:
+                advance(room, now, rate, burst, join=0)
+            return Turn(token, record[2], room["admitted"], room["rate"])
+
+    def status(self, event_id: str, token: str, now: float) -> Optional[tuple]:
+        with self._lock:
+            record = self.tokens.get(token)
+            room = self.rooms.get(event_id)
+            if record is None or record[0] != event_id or room is None:
+                return None
+            advance(room, now, room["rate"], room["burst"], join=0)
+            return record[1], Turn(token, record[2], room["admitted"], room["rate"])
+
+    def claim(self, event_id: str, user_id: str, token: str, now: float) -> Optional[Turn]:
+        """Saca el token de la sala si ya fue admitido: una segunda compra no lo encuentra"""
+        with self._lock:
+            record = self.tokens.get(token)
+            room = self.rooms.get(event_id)
+            if record is None or record[0] != event_id or record[1] != user_id or room is None:
+                return None
+            advance(room, now, room["rate"], room["burst"], join=0)
+            turn = Turn(token, record[2], room["admitted"], room["rate"])
+            if not turn.position:
+                self.tokens.delete(token)
+            return turn
+
+    def release(self, event_id: str, user_id: str, turn: Turn) -> None:
+        with self._lock:
+            self.tokens.set(turn.token, (event_id, user_id, turn.seq))
+
+    def consume(self, event_id: str, user_id: str, turn: Turn) -> None:
+        with self._lock:
+            self.tokens.delete(turn.token)
+            self.users.delete((event_id, user_id))
+
+
+class RedisRoomStore:
+    """
+    ticketify:wr:room:<evento> (hash del bucket), ticketify:wr:token:<evento>:<token>
+    ("<usuario>:<seq>"), ticketify:wr:user:<evento>:<usuario> (token vigente) y
+    ticketify:wr:claim:<evento>:<token> (token admitido en uso por una compra)
+    """
+
+    def __init__(self, client: redis.Redis, token_ttl_seconds: int):
+        self.client = client
+        self.ttl = token_ttl_seconds
+        self._advance = client.register_script(ADVANCE_SCRIPT)
+
+    @staticmethod
+    def _room_key(event_id: str) -> str:
+        return f"{KEY_PREFIX}room:{event_id}"
+
+    @staticmethod
+    def _token_key(event_id: str, token: str) -> str:
+        return f"{KEY_PREFIX}token:{event_id}:{token}"
+
+    @staticmethod
+    def _user_key(event_id: str, user_id: str) -> str:
+        return f"{KEY_PREFIX}user:{event_id}:{user_id}"
+
+    @staticmethod
+    def _claim_key(event_id: str, token: str) -> str:
+        return f"{KEY_PREFIX}claim:{event_id}:{token}"
+
+    def _run(self, event_id: str, now: float, rate="", burst="", join: int = 0):
+        seq, admitted, rate = self._advance(
+            keys=[self._room_key(event_id)], args=[now, rate, burst, join, self.ttl]
+        )
+        return int(seq), int(admitted), float(rate)
+
+    def join(self, event_id: str, user_id: str, rate: float, burst: float, now: float) -> Turn:
+        token = self.client.get(self._user_key(event_id, user_id))
+        record = self.client.get(self._token_key(event_id, token.decode())) if token else None
+        if record is not None:
+            _, admitted, rate = self._run(event_id, now, rate, burst)
+            return Turn(token.decode(), int(record.decode().rsplit(":", 1)[1]), admitted, rate)
+
+        seq, admitted, rate = self._run(event_id, now, rate, burst, join=1)
+        token = secrets.token_urlsafe(24)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._token_key(event_id, token), f"{user_id}:{seq}", ex=self.ttl)
+        pipe.set(self._user_key(event_id, user_id), token, ex=self.ttl)
+        pipe.execute()
+        return Turn(token, seq, admitted, rate)
+
+    def status(self, event_id: str, token: str, now: float) -> Optional[tuple]:
+        record = self.client.get(self._token_key(event_id, token))
+        if record is None:
+            return None
+        user_id, seq = record.decode().rsplit(":", 1)
+        _, admitted, rate = self._run(event_id, now)
+        return user_id, Turn(token, int(seq), admitted, rate)
+
+    def claim(self, event_id: str, user_id: str, token: str, now: float) -> Optional[Turn]:
+        """
+        Marca el token admitido como en uso con SET NX: de varias compras
+        simultáneas con el mismo token solo una obtiene la marca
+        """
+        record = self.client.get(self._token_key(event_id, token))
+        if record is None:
+            return None
+        owner, seq = record.decode().rsplit(":", 1)
+        if owner != user_id:
+            return None
+        _, admitted, rate = self._run(event_id, now)
+        turn = Turn(token, int(seq), admitted, rate)
+        if not turn.position and not self.client.set(self._claim_key(event_id, token), 1, nx=True, ex=self.ttl):
+            return None
+        return turn
+
+    def release(self, event_id: str, user_id: str, turn: Turn) -> None:
+        self.client.delete(self._claim_key(event_id, turn.token))
+
+    def consume(self, event_id: str, user_id: str, turn: Turn) -> None:
+        self.client.delete(
+            self._token_key(event_id, turn.token),
+            self._user_key(event_id, user_id),
+            self._claim_key(event_id, turn.token),
+        )
+
+
+# ============= SALA DE ESPERA =============
+
+class WaitingRoom:
+    def __init__(self):
+        self._store = None
+        self._lock = threading.Lock()
+        # event_id -> tasa (0 = sin sala): una consulta por evento y worker cada pocos segundos
+        self._rates = TTLCache(maxsize=1024, ttl_seconds=settings.WAITING_ROOM_CONFIG_TTL_SECONDS)
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._create_store()
+        return self._store
+
+    @staticmethod
+    def _create_store():
+        kind = settings.WAITING_ROOM_BACKEND
+        if kind == "memory":
+            return MemoryRoomStore(settings.WAITING_ROOM_TOKEN_TTL_SECONDS)
+        if kind != "redis":
+            raise ValueError(f"WAITING_ROOM_BACKEND desconocido: {kind}")
+        backend = response_cache.backend
+        if isinstance(backend, RedisBackend):
+            client = backend.client
+        else:
+            # La caché cayó a memoria: la sala usa Redis igual y responde 503 mientras no conecte
+            client = redis.Redis.from_url(
+                settings.REDIS_URL,
+                socket_timeout=settings.RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.RESPONSE_CACHE_REDIS_TIMEOUT_SECONDS,
+            )
+        return RedisRoomStore(client, settings.WAITING_ROOM_TOKEN_TTL_SECONDS)
+
+    def rate_for(self, db: Session, event_id: UUID) -> int:
+        rate = self._rates.get(event_id)
+        if rate is None:
+            rate = db.query(Event.waiting_room_rate).filter(Event.id == event_id).scalar() or 0
+            self._rates.set(event_id, rate)
+        return rate
+
+    @staticmethod
+    def _unavailable(e: redis.RedisError) -> HTTPException:
+        # Sin la fila no se deja pasar a nadie: abrirla sería lo que la sala evita
+        logger.error(f"❌ Sala de espera: Redis no responde ({e})")
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="La sala de espera no está disponible, intenta nuevamente en unos segundos",
+            headers={"Retry-After": "5"}
+        )
+
+    def join(self, db: Session, event_id: UUID, user_id: UUID) -> Optional[Turn]:
+        """Turno del usuario en la sala del evento; None si el evento no tiene sala"""
+        rate = self.rate_for(db, event_id)
+        if not rate:
+            return None
+        burst = max(1.0, rate * settings.WAITING_ROOM_BURST_SECONDS)
+        try:
+            turn = self.store.join(str(event_id), str(user_id), rate, burst, time.time())
+        except redis.RedisError as e:
+            raise self._unavailable(e)
+        WAITING_ROOM.labels("joined").inc()
+        return turn
+
+    def status(self, event_id: UUID, token: str) -> Turn:
+        try:
+            found = self.store.status(str(event_id), token, time.time())
+        except redis.RedisError as e:
+            raise self._unavailable(e)
+        if found is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Turno no encontrado o vencido: vuelve a formarte en la sala de espera"
+            )
+        return found[1]
+
+    def admit(self, db: Session, event_id: UUID, user_id: UUID, token: Optional[str]) -> Optional[Turn]:
+        """
+        Control de entrada de la compra. Sin sala devuelve None; con sala exige
+        un token admitido del mismo usuario (429 con Retry-After si aún espera)
+        y lo reclama: queda en uso hasta consume (compra creada) o release
+        (la compra falló).
+        """
+        if not self.rate_for(db, event_id):
+            return None
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+                detail=f"Este evento tiene sala de espera: fórmate en /api/events/{event_id}/queue"
+            )
+        try:
+            turn = self.store.claim(str(event_id), str(user_id), token, time.time())
+        except redis.RedisError as e:
+            raise self._unavailable(e)
+        if turn is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Turno de la sala de espera inválido, vencido o ya en uso"
+            )
+        if turn.position:
+            WAITING_ROOM.labels("not_admitted").inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Aún no es tu turno: estás en el lugar {turn.position} de la fila",
+                headers={"Retry-After": str(poll_after(turn))}
+            )
+        WAITING_ROOM.labels("admitted").inc()
+        return turn
+
+    def release(self, event_id: UUID, user_id: UUID, turn: Turn) -> None:
+        """La compra falló: el turno vuelve a estar disponible para reintentar"""
+        try:
+            self.store.release(str(event_id), str(user_id), turn)
+            WAITING_ROOM.labels("released").inc()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Sala de espera: no se pudo liberar el turno ({e})")
+
+    def consume(self, event_id: UUID, user_id: UUID, turn: Turn) -> None:
+        """El turno ya se usó para crear una compra"""
+        try:
+            self.store.consume(str(event_id), str(user_id), turn)
+            WAITING_ROOM.labels("consumed").inc()
+        except redis.RedisError as e:
+            logger.warning(f"⚠️ Sala de espera: no se pudo consumir el turno ({e})")
+
+
+def poll_after(turn: Turn) -> int:
+    """Segundos sugeridos hasta la próxima consulta: la mitad del ETA, entre 1 y el máximo"""
+    return int(min(settings.WAITING_ROOM_MAX_POLL_SECONDS, max(1.0, turn.eta_seconds / 2)))
+
+
+waiting_room = WaitingRoom()
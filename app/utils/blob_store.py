@@ -0,0 +1,129 @@
+"""
+Almacén de blobs direccionado por contenido (fotos de eventos, etc.)
+
+Cada blob se guarda bajo su SHA-256, así que subir dos veces la misma imagen no
+duplica el archivo y la clave sirve directamente como ETag. La tabla que lo usa
+solo guarda hash, tipo MIME y tamaño.
+
+El backend es intercambiable (BLOB_STORE_BACKEND); por ahora existe "local",
+que escribe en BLOB_STORE_DIR con un árbol ab/cd/<hash> para no llenar un solo
+directorio.
+"""
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def detect_image_mime(data: bytes) -> Optional[str]:
+    """Tipo MIME a partir de los magic bytes (no confiamos en el content-type del cliente)"""
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    return None
+
+
+class BlobStore(ABC):
+    """Interfaz de un backend de blobs"""
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Guarda los bytes y devuelve su hash (idempotente)"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def read(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    """Backend en disco local"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        if len(key) != 64 or not all(c in "0123456789abcdef" for c in key):
+            raise ValueError(f"Clave de blob inválida: {key!r}")
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data: bytes) -> str:
+        key = content_hash(data)
+        path = self._path(key)
+        if path.exists():
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: nunca se sirve un archivo a medio escribir
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def read(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+_BACKENDS = {
+    "local": lambda: LocalBlobStore(settings.BLOB_STORE_DIR),
+}
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        try:
+            _store = _BACKENDS[settings.BLOB_STORE_BACKEND]()
+        except KeyError:
+            raise ValueError(f"BLOB_STORE_BACKEND desconocido: {settings.BLOB_STORE_BACKEND}")
+    return _store
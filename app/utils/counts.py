@@ -0,0 +1,123 @@
+"""
+Totales baratos para listados paginados.
+
+- exacto: COUNT sobre una consulta de solo ids (sin joinedload ni ORDER BY),
+  cacheado unos segundos por conjunto de filtros normalizado;
+- estimado: filas estimadas por el planner de PostgreSQL (EXPLAIN, sin
+  ejecutar la consulta), para búsquedas amplias donde contar cuesta más que
+  traer la página.
+
+Modos: "exact", "estimated" y "auto" (estimado solo si el planner espera al
+menos COUNT_ESTIMATE_THRESHOLD filas). En otros motores siempre es exacto.
+"""
+import json
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Hashable, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+COUNT_MODES = ("auto", "exact", "estimated")
+
+count_cache = TTLCache(maxsize=settings.COUNT_CACHE_SIZE, ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS)
+
+
+class CountResult(NamedTuple):
+    total: int
+    exact: bool
+
+
+# ============= CLAVE DE CACHÉ =============
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, str):
+        return " ".join(value.split()).lower() or None
+    if isinstance(value, (list, tuple, set)):
+        items = tuple(sorted(str(_normalize(v)) for v in value))
+        return items or None
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal, float)):
+        return str(value)
+    return value
+
+
+def count_cache_key(scope: str, **filters: Any) -> tuple:
+    """("events", ("query", "rock"), ...): filtros vacíos fuera, texto y listas normalizados"""
+    normalized = ((name, _normalize(value)) for name, value in filters.items())
+    return (scope,) + tuple(sorted((name, value) for name, value in normalized if value is not None))
+
+
+# ============= ESTIMACIÓN DEL PLANNER =============
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <select> conservando los parámetros enlazados del driver"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _plan_rows(plan: Any) -> int:
+    # psycopg2/asyncpg devuelven el JSON ya decodificado o como texto según el driver
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _use_estimate(mode: str, dialect_name: str) -> bool:
+    return mode != "exact" and dialect_name == "postgresql"
+
+
+def _resolve(mode: str, estimate: int) -> bool:
+    """¿Devolver la estimación en lugar de contar?"""
+    return mode == "estimated" or estimate >= settings.COUNT_ESTIMATE_THRESHOLD
+
+
+# ============= API =============
+
+def count_rows(db: Session, id_stmt, key: tuple, mode: str = "auto") -> CountResult:
+    """Total de filas de id_stmt (un select de solo ids con los filtros del listado)"""
+    cached = count_cache.get(key)
+    if cached is not None:
+        return CountResult(cached, True)
+
+    if _use_estimate(mode, db.get_bind().dialect.name):
+        estimate = _plan_rows(db.execute(Explain(id_stmt)).scalar())
+        if _resolve(mode, estimate):
+            return CountResult(estimate, False)
+
+    total = db.execute(select(func.count()).select_from(id_stmt.subquery())).scalar() or 0
+    count_cache.set(key, total)
+    return CountResult(total, True)
+
+
+async def count_rows_async(db: AsyncSession, id_stmt, key: tuple, mode: str = "auto") -> CountResult:
+    cached = count_cache.get(key)
+    if cached is not None:
+        return CountResult(cached, True)
+
+    if _use_estimate(mode, db.get_bind().dialect.name):
+        estimate = _plan_rows((await db.execute(Explain(id_stmt))).scalar())
+        if _resolve(mode, estimate):
+            return CountResult(estimate, False)
+
+    total = (await db.execute(select(func.count()).select_from(id_stmt.subquery()))).scalar() or 0
+    count_cache.set(key, total)
+    return CountResult(total, True)
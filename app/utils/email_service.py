@@ -10,6 +10,7 @@ from email.mime.text import MIMEText
 from typing import Optional
 
 from app.core.config import settings
+from app.core.metrics import EMAILS
 from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
 from email import encoders
@@ -67,10 +68,12 @@ class EmailService:
                 server.send_message(msg)
 
             print(f"✅ Email enviado a {to_email}: {subject}")
+            EMAILS.labels("sent").inc()
             return True
 
         except Exception as e:
             print(f"❌ Error al enviar email a {to_email}: {str(e)}")
+            EMAILS.labels("failed").inc()
             return False
 
     def send_welcome_email(self, to_email: str, first_name: str) -> bool:
@@ -325,10 +328,12 @@ class EmailService:
                 server.send_message(msg)
 
             print(f"✅ Email enviado a {to_email}")
+            EMAILS.labels("sent").inc()
             return True
 
         except Exception as e:
             print(f"❌ Error al enviar email a {to_email}: {str(e)}")
+            EMAILS.labels("failed").inc()
             return False
 
     def send_ticket_email(
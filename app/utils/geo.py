@@ -0,0 +1,54 @@
+"""
+Distancias sobre la esfera terrestre para la búsqueda "eventos cerca de mí".
+
+El filtro por radio se hace en dos pasos: primero una caja (bounding box) de
+latitud/longitud que cubre el círculo, que resuelve el índice btree
+(status, latitude, longitude) sin calcular nada, y luego la distancia exacta
+con la fórmula de haversine solo sobre las filas que caen en la caja.
+"""
+import math
+from typing import NamedTuple, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180  # ~111.2 km
+
+
+class BoundingBox(NamedTuple):
+    min_lat: float
+    max_lat: float
+    # None si la caja cruza el antimeridiano o un polo: no se filtra por longitud
+    min_lon: Optional[float]
+    max_lon: Optional[float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> BoundingBox:
+    """Caja que contiene todos los puntos a radius_km o menos de (lat, lon)"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return BoundingBox(max(min_lat, -90.0), min(max_lat, 90.0), None, None)
+
+    dlon = dlat / math.cos(math.radians(lat))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180 or max_lon > 180:
+        return BoundingBox(min_lat, max_lat, None, None)
+    return BoundingBox(min_lat, max_lat, min_lon, max_lon)
+
+
+def parse_coordinates(value: str) -> Tuple[float, float]:
+    """"-12.05,-77.04" → (lat, lon); ValueError si el formato o el rango no son válidos"""
+    parts = value.split(",")
+    if len(parts) != 2:
+        raise ValueError("se esperaba 'lat,lon'")
+    lat, lon = (float(p) for p in parts)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("coordenadas fuera de rango")
+    return lat, lon
@@ -0,0 +1,108 @@
+"""
+Geocodificación de recintos (venue → latitud/longitud) al crear o editar eventos.
+
+El backend es intercambiable (GEOCODER_BACKEND):
+- "offline": tabla local de ciudades y distritos del Perú, sin red ni claves;
+  resuelve "Estadio Nacional, Lima" o "Teatro Municipal, Arequipa" al centro de
+  la ciudad (o distrito) mencionado;
+- "none": no geocodifica (los eventos sin coordenadas no aparecen con near=).
+
+Un backend real (Nominatim, Google...) solo necesita implementar geocode() y
+registrarse en _BACKENDS. Si no se reconoce el lugar se devuelve None y el
+evento queda sin coordenadas; nunca se bloquea la creación.
+"""
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+Coordinates = Tuple[float, float]
+
+
+def normalize_place(text: str) -> str:
+    """Minúsculas y sin tildes: "Cusco", "CUSCO" y "Cuzco" se comparan igual que en la tabla"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class Geocoder(ABC):
+    """Interfaz de un backend de geocodificación"""
+
+    @abstractmethod
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        ...
+
+
+class NullGeocoder(Geocoder):
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        return None
+
+
+# Primero distritos y recintos conocidos (más precisos), luego ciudades
+OFFLINE_PLACES = [
+    ("estadio nacional", (-12.0670, -77.0336)),
+    ("costa verde", (-12.1290, -77.0380)),
+    ("miraflores", (-12.1211, -77.0297)),
+    ("barranco", (-12.1494, -77.0217)),
+    ("san isidro", (-12.0977, -77.0365)),
+    ("santiago de surco", (-12.1459, -76.9917)),
+    ("surco", (-12.1459, -76.9917)),
+    ("san borja", (-12.1000, -76.9960)),
+    ("la molina", (-12.0800, -76.9410)),
+    ("jesus maria", (-12.0700, -77.0450)),
+    ("pueblo libre", (-12.0740, -77.0630)),
+    ("san miguel", (-12.0770, -77.0900)),
+    ("callao", (-12.0566, -77.1181)),
+    ("lima", (-12.0464, -77.0428)),
+    ("cusco", (-13.5319, -71.9675)),
+    ("cuzco", (-13.5319, -71.9675)),
+    ("arequipa", (-16.4090, -71.5375)),
+    ("trujillo", (-8.1118, -79.0288)),
+    ("chiclayo", (-6.7714, -79.8409)),
+    ("piura", (-5.1945, -80.6328)),
+    ("iquitos", (-3.7437, -73.2516)),
+    ("huancayo", (-12.0651, -75.2049)),
+    ("tacna", (-18.0146, -70.2536)),
+    ("puno", (-15.8402, -70.0219)),
+    ("ica", (-14.0678, -75.7286)),
+    ("cajamarca", (-7.1638, -78.5003)),
+    ("chimbote", (-9.0853, -78.5783)),
+    ("ayacucho", (-13.1588, -74.2232)),
+    ("pucallpa", (-8.3791, -74.5539)),
+    ("huaraz", (-9.5278, -77.5278)),
+    ("tarapoto", (-6.4825, -76.3733)),
+]
+
+
+class OfflineGeocoder(Geocoder):
+    """Coincidencia por palabra completa contra OFFLINE_PLACES (la primera gana)"""
+
+    def __init__(self, places=OFFLINE_PLACES):
+        self.places = [(re.compile(rf"\b{re.escape(name)}\b"), coords) for name, coords in places]
+
+    def geocode(self, address: str) -> Optional[Coordinates]:
+        text = normalize_place(address or "")
+        for pattern, coords in self.places:
+            if pattern.search(text):
+                return coords
+        return None
+
+
+_BACKENDS = {
+    "offline": OfflineGeocoder,
+    "none": NullGeocoder,
+}
+
+_geocoder: Optional[Geocoder] = None
+
+
+def get_geocoder() -> Geocoder:
+    global _geocoder
+    if _geocoder is None:
+        try:
+            _geocoder = _BACKENDS[settings.GEOCODER_BACKEND]()
+        except KeyError:
+            raise ValueError(f"GEOCODER_BACKEND desconocido: {settings.GEOCODER_BACKEND}")
+    return _geocoder
@@ -0,0 +1,91 @@
+"""
+GET condicional (ETag / Last-Modified → 304 Not Modified).
+
+Los endpoints calculan primero sus validadores con una consulta mínima
+(timestamps y conteos, o el hash de contenido de una foto) y, si el cliente ya
+tiene esa versión, responden 304 sin ejecutar la consulta pesada ni serializar
+el cuerpo. If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response, status
+
+# Las respuestas JSON pueden cambiar en cualquier momento: el cliente las guarda
+# pero revalida siempre (barato gracias al 304)
+REVALIDATE = "no-cache"
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fuerte a partir de las piezas que identifican la versión del recurso"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def latest(*values: Optional[datetime]) -> Optional[datetime]:
+    present = [v for v in values if v is not None]
+    return max(present) if present else None
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(validators: Validators, cache_control: str = REVALIDATE) -> Dict[str, str]:
+    headers = {"ETag": validators.etag, "Cache-Control": cache_control}
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = _http_date(validators.last_modified)
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Comparación débil: W/"x" y "x" son la misma versión para un GET
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in candidates)
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    last_modified = validators.last_modified
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # Last-Modified viaja con resolución de segundos
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified(validators: Validators, cache_control: str = REVALIDATE) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(validators, cache_control))
+
+
+def with_validators(result: Any, response: Response, validators: Validators, cache_control: str = REVALIDATE) -> Any:
+    """
+    Añade ETag/Last-Modified a la respuesta 200. Si el endpoint devuelve un
+    Response ya construido (p. ej. desde la caché de respuestas) se le ponen
+    directamente; si no, van en el Response inyectado por FastAPI.
+    """
+    target = result if isinstance(result, Response) else response
+    target.headers.update(validator_headers(validators, cache_control))
+    return result
@@ -0,0 +1,166 @@
+"""
+Derivados de imágenes (thumb / card / hero) en WebP y JPEG.
+
+Las variantes se generan con Pillow en un pool de procesos (decodificar y
+redimensionar es CPU puro y bloquearía el event loop) y se cachean en disco
+por hash del original: como el original es inmutable para ese hash, el derivado
+también lo es y no hace falta ningún índice.
+
+    IMAGE_DERIVATIVES_DIR/ab/<hash>/v1/card.webp
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+# Caja máxima (ancho, alto); se conserva la proporción y nunca se amplía
+VARIANT_SIZES: Dict[str, Tuple[int, int]] = {
+    "thumb": (160, 160),
+    "card": (640, 400),
+    "hero": (1600, 900),
+}
+VARIANT_FORMATS: Dict[str, str] = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+# Subir al cambiar tamaños o calidad: invalida todos los derivados cacheados
+VARIANT_VERSION = "v1"
+
+CHUNK_SIZE = 64 * 1024
+
+
+def render_variant(data: bytes, size: str, fmt: str) -> bytes:
+    """Genera una variante. Función de módulo para poder ejecutarla en otro proceso."""
+    return render_variants(data, [(size, fmt)])[(size, fmt)]
+
+
+def render_variants(data: bytes, variants) -> Dict[Tuple[str, str], bytes]:
+    """Decodifica el original una sola vez y genera todas las variantes pedidas"""
+    source = Image.open(io.BytesIO(data))
+    source = ImageOps.exif_transpose(source)
+    has_alpha = source.mode in ("RGBA", "LA") or (source.mode == "P" and "transparency" in source.info)
+
+    result = {}
+    for size, fmt in variants:
+        image = source.copy()
+        image.thumbnail(VARIANT_SIZES[size], Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "webp":
+            image = image.convert("RGBA" if has_alpha else "RGB")
+            image.save(out, format="WEBP", quality=80, method=4)
+        else:
+            image = image.convert("RGB")
+            image.save(out, format="JPEG", quality=82, optimize=True, progressive=True)
+        result[(size, fmt)] = out.getvalue()
+    return result
+
+
+def all_variants():
+    return [(size, fmt) for size in VARIANT_SIZES for fmt in VARIANT_FORMATS]
+
+
+def pick_format(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """Formato explícito (?format=) o negociado por la cabecera Accept"""
+    if requested in VARIANT_FORMATS:
+        return requested
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+# ============= CACHÉ EN DISCO =============
+
+class DerivativeCache:
+    """Derivados en disco, indexados por hash del original + variante"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, source_hash: str, size: str, fmt: str) -> Path:
+        if size not in VARIANT_SIZES or fmt not in VARIANT_FORMATS:
+            raise ValueError(f"Variante desconocida: {size}.{fmt}")
+        if len(source_hash) != 64 or not all(c in "0123456789abcdef" for c in source_hash):
+            raise ValueError(f"Hash inválido: {source_hash!r}")
+        return self.root / source_hash[:2] / source_hash / VARIANT_VERSION / f"{size}.{fmt}"
+
+    def exists(self, source_hash: str, size: str, fmt: str) -> bool:
+        return self.path(source_hash, size, fmt).exists()
+
+    def put(self, source_hash: str, size: str, fmt: str, data: bytes) -> None:
+        path = self.path(source_hash, size, fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def read(self, source_hash: str, size: str, fmt: str) -> bytes:
+        return self.path(source_hash, size, fmt).read_bytes()
+
+    def iter_chunks(self, source_hash: str, size: str, fmt: str) -> Iterator[bytes]:
+        with open(self.path(source_hash, size, fmt), "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+
+derivative_cache = DerivativeCache(settings.IMAGE_DERIVATIVES_DIR)
+
+
+# ============= POOL DE PROCESOS =============
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: el hijo no hereda locks ni conexiones del proceso de uvicorn
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def render_in_pool(data: bytes, variants) -> Dict[Tuple[str, str], bytes]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), render_variants, data, list(variants))
+
+
+async def generate_derivatives(source_hash: str, data: bytes) -> None:
+    """Genera y cachea todas las variantes de un original recién subido"""
+    missing = [(size, fmt) for size, fmt in all_variants() if not derivative_cache.exists(source_hash, size, fmt)]
+    if not missing:
+        return
+    rendered = await render_in_pool(data, missing)
+    for (size, fmt), output in rendered.items():
+        derivative_cache.put(source_hash, size, fmt, output)
+
+
+async def ensure_derivative(source_hash: str, size: str, fmt: str, load_source) -> bool:
+    """
+    Garantiza que la variante exista (la genera bajo demanda si falta, p. ej.
+    fotos migradas antes de existir el pipeline). load_source() devuelve los
+    bytes del original o None.
+    """
+    if derivative_cache.exists(source_hash, size, fmt):
+        return True
+    data = load_source()
+    if not data:
+        return False
+    await generate_derivatives(source_hash, data)
+    return derivative_cache.exists(source_hash, size, fmt)
@@ -0,0 +1,89 @@
+"""
+Paginación por cursor (keyset).
+
+En lugar de OFFSET, cada página continúa desde la clave de orden de la última
+fila devuelta, p. ej. (startDate, id): la consulta es un index seek sobre el
+índice compuesto correspondiente y cuesta lo mismo en la página 1 que en la 500.
+
+El cursor es opaco para el cliente (base64 url-safe de un JSON con el nombre
+del orden y los valores de la última fila). Los listados siguen aceptando
+page/page_size; en ese modo también devuelven next_cursor para poder pasar a
+cursor desde la primera página.
+"""
+import base64
+import binascii
+import decimal
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, tuple_
+
+
+class Keyset:
+    """
+    Orden estable para paginar por cursor: columnas de orden (la última debe
+    ser única, normalmente id) y una única dirección para todas.
+    """
+
+    def __init__(self, name: str, columns: Sequence, descending: bool = False):
+        self.name = name
+        self.columns = list(columns)
+        self.descending = descending
+
+    def order_by(self) -> list:
+        return [c.desc() if self.descending else c.asc() for c in self.columns]
+
+    def after(self, values: Sequence[Any]):
+        """Filas posteriores a la clave dada: (a, b) > (x, y), o < si es descendente"""
+        row = tuple_(*self.columns)
+        key = tuple_(*[literal(v, type_=c.type) for c, v in zip(self.columns, values)])
+        return row < key if self.descending else row > key
+
+    # ============= CURSOR OPACO =============
+
+    def encode(self, item: Any) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(item, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else str(value))
+        payload = json.dumps({"s": self.name, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if payload["s"] != self.name or len(payload["v"]) != len(self.columns):
+                raise ValueError("cursor de otro orden")
+            return [
+                _parse_value(column.type.python_type, raw)
+                for column, raw in zip(self.columns, payload["v"])
+            ]
+        except (ValueError, KeyError, TypeError, binascii.Error, decimal.InvalidOperation):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginación inválido"
+            )
+
+    def paginate(
+        self,
+        rows: list,
+        page_size: int,
+        item: Callable[[Any], Any] = lambda row: row
+    ) -> Tuple[list, Optional[str]]:
+        """
+        Recibe hasta page_size + 1 filas (la extra solo indica que hay más) y
+        devuelve la página y el cursor de la siguiente, o None si es la última.
+        """
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, self.encode(item(rows[-1]))
+
+
+def _parse_value(python_type: type, raw: str) -> Any:
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    return python_type(raw)
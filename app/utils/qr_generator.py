@@ -1,11 +1,40 @@
 """
 QR Code Generator Utility
-Genera códigos QR visuales como imágenes en formato base64
+
+Los tickets guardan solo el contenido del QR (generate_ticket_qr_data); la
+imagen se genera bajo demanda en PNG o SVG (render_qr) y se cachea en memoria
+(LRU) y en disco por hash del contenido, que es también su ETag:
+
+    QR_CACHE_DIR/ab/<hash>.png
+
+Para muchos QR a la vez (pedidos grandes, reenvío de tickets) render_qr_batch
+los reparte en un pool de procesos (generar el PNG es CPU puro) y
+QRCache.get_many lo usa para los que no están en caché.
+
+generate_qr_image es la forma anterior (data URL en base64 guardada en el
+ticket); los correos usan qr_data_url, que pasa por la caché.
 """
+import hashlib
+import multiprocessing
+import os
+import tempfile
 import qrcode
+import qrcode.image.svg
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from io import BytesIO
+from pathlib import Path
 import base64
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+
+QR_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+# Subir al cambiar tamaño o corrección de errores: invalida las imágenes cacheadas
+QR_RENDER_VERSION = "v1"
 
 
 def generate_qr_image(data: str, size: int = 10, border: int = 2) -> str:
@@ -77,3 +106,192 @@ def generate_ticket_qr_data(ticket_id: str, event_id: str) -> str:
         "type": "TICKET_VALIDATION"
     }
     return json.dumps(qr_data)
+
+
+def ticket_qr_payload(ticket_id, event_id, stored: Optional[str]) -> str:
+    """
+    Contenido del QR de un ticket: el guardado en qrCode o, si falta o es una
+    imagen de antes de generarlas bajo demanda, el que corresponde al ticket
+    """
+    if stored and not stored.startswith(("data:", "QR_ERROR_")):
+        return stored
+    return generate_ticket_qr_data(str(ticket_id), str(event_id))
+
+
+# ============= RENDER BAJO DEMANDA =============
+
+ERROR_CORRECTION = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+def render_qr(data: str, fmt: str, error_correction: str = "M", box_size: int = 10) -> bytes:
+    """
+    Imagen del QR en PNG o SVG. Por defecto corrección M (15%): el contenido es
+    corto y se muestra en pantalla o impreso sin logo encima, H solo agrandaba el QR.
+    """
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECTION[error_correction], box_size=box_size, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    if fmt == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    elif fmt == "png":
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    else:
+        raise ValueError(f"Formato de QR desconocido: {fmt}")
+    return buffer.getvalue()
+
+
+def render_qr_chunk(datas: List[str], fmt: str, error_correction: str, box_size: int) -> List[Tuple[str, bytes]]:
+    """Varios QR en una sola tarea. Función de módulo para poder ejecutarla en otro proceso."""
+    return [(data, render_qr(data, fmt, error_correction, box_size)) for data in datas]
+
+
+# ============= RENDER EN LOTE (POOL DE PROCESOS) =============
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: el hijo no hereda locks ni conexiones del proceso de uvicorn
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.QR_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def render_qr_batch(
+    datas: Iterable[str],
+    fmt: str = "png",
+    error_correction: str = "M",
+    box_size: int = 10,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Genera muchos QR repartidos en el pool de procesos y los devuelve
+    (contenido, imagen) a medida que terminan, no en el orden de entrada.
+    Lotes chicos (menos de QR_POOL_MIN_BATCH) se generan en el proceso: el
+    viaje al pool cuesta más que el render.
+    """
+    datas = list(datas)
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"Formato de QR desconocido: {fmt}")
+    if error_correction not in ERROR_CORRECTION:
+        raise ValueError(f"Corrección de errores desconocida: {error_correction}")
+    if len(datas) < settings.QR_POOL_MIN_BATCH:
+        for data in datas:
+            yield data, render_qr(data, fmt, error_correction, box_size)
+        return
+
+    pool = get_process_pool()
+    # Varias tareas por worker: reparte bien sin pagar un viaje por QR
+    size = chunk_size or max(1, min(64, -(-len(datas) // (settings.QR_PROCESS_WORKERS * 4))))
+    futures = [
+        pool.submit(render_qr_chunk, datas[i:i + size], fmt, error_correction, box_size)
+        for i in range(0, len(datas), size)
+    ]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def qr_hash(data: str, fmt: str) -> str:
+    """Hash de la imagen (contenido + formato + versión del render): clave de caché y ETag"""
+    return hashlib.sha256(f"{QR_RENDER_VERSION}:{fmt}:{data}".encode("utf-8")).hexdigest()
+
+
+def qr_version(data: str, fmt: str) -> str:
+    """Valor de ?v= en la URL de la imagen (Ticket.qr_url): prefijo de qr_hash"""
+    return qr_hash(data, fmt)[:16]
+
+
+class QRCache:
+    """Imágenes de QR por hash: LRU en memoria delante de la caché en disco"""
+
+    def __init__(self, root: str, maxsize: int):
+        self.root = Path(root)
+        # El hash fija el contenido: no hace falta que venza
+        self.memory = TTLCache(maxsize=maxsize, ttl_seconds=float("inf"))
+
+    def path(self, digest: str, fmt: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.{fmt}"
+
+    def get(self, data: str, fmt: str) -> bytes:
+        """Imagen del QR: de memoria, de disco o recién generada (y guardada en ambas)"""
+        digest = qr_hash(data, fmt)
+        image = self.memory.get(digest)
+        if image is not None:
+            return image
+        path = self.path(digest, fmt)
+        try:
+            image = path.read_bytes()
+        except FileNotFoundError:
+            image = render_qr(data, fmt)
+            self._write(path, image)
+        self.memory.set(digest, image)
+        return image
+
+    def get_many(self, datas: Iterable[str], fmt: str) -> Dict[str, bytes]:
+        """Como get para varios contenidos; los que faltan se generan en lote"""
+        images: Dict[str, bytes] = {}
+        missing = []
+        for data in dict.fromkeys(datas):
+            digest = qr_hash(data, fmt)
+            image = self.memory.get(digest)
+            if image is None:
+                try:
+                    image = self.path(digest, fmt).read_bytes()
+                except FileNotFoundError:
+                    missing.append(data)
+                    continue
+                self.memory.set(digest, image)
+            images[data] = image
+        for data, image in render_qr_batch(missing, fmt):
+            digest = qr_hash(data, fmt)
+            self._write(self.path(digest, fmt), image)
+            self.memory.set(digest, image)
+            images[data] = image
+        return images
+
+    def cached(self, data: str, fmt: str) -> Optional[bytes]:
+        """Solo de memoria (sin disco ni render), para responder sin salir del event loop"""
+        return self.memory.get(qr_hash(data, fmt))
+
+    @staticmethod
+    def _write(path: Path, image: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(image)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+qr_cache = QRCache(settings.QR_CACHE_DIR, settings.QR_MEMORY_CACHE_SIZE)
+
+
+def qr_data_url(data: str) -> str:
+    """PNG del QR (cacheado) como data URL en base64, para adjuntar en correos"""
+    return "data:image/png;base64," + base64.b64encode(qr_cache.get(data, "png")).decode("utf-8")
+
+
+def qr_data_urls(datas: Iterable[str]) -> Dict[str, str]:
+    """qr_data_url de varios contenidos, generando en lote los que no están en caché"""
+    return {
+        data: "data:image/png;base64," + base64.b64encode(image).decode("utf-8")
+        for data, image in qr_cache.get_many(datas, "png").items()
+    }
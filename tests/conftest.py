@@ -0,0 +1,8 @@
+"""Los modelos usan tipos de PostgreSQL; en SQLite los UUID van como texto"""
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(UUID, "sqlite")
+def _uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
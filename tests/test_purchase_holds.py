@@ -0,0 +1,80 @@
+"""
+Reservas de stock de las compras (app/services/inventory_service.py) con
+contadores en memoria: muchos compradores a la vez nunca reservan de más.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registra todos los modelos)
+from app.core.config import settings
+from app.core.response_cache import MemoryBackend, response_cache
+from app.models.ticket_type import TicketType
+from app.services import inventory_service, stock_counters as counters_module
+from app.services.inventory_service import InventoryService
+from app.services.stock_counters import StockCounters
+
+BUYERS = 1000
+STOCK = 100
+
+
+@pytest.fixture
+def Session(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    TicketType.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(counters_module, "SessionLocal", factory)
+    monkeypatch.setattr(counters_module, "refresh_event_aggregates", lambda db, event_id: None)
+    # La reserva invalida la caché del evento al confirmar: sin Redis
+    monkeypatch.setattr(response_cache, "_backend", MemoryBackend(100, 60))
+    return factory
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_COUNTERS_BACKEND", "memory")
+    counters = StockCounters()
+    monkeypatch.setattr(counters_module, "stock_counters", counters)
+    monkeypatch.setattr(inventory_service, "stock_counters", counters)
+    return counters
+
+
+@pytest.fixture
+def ticket_type(Session, counters):
+    """Tipo con STOCK entradas, ya sembrado en los contadores"""
+    event_id = uuid.uuid4()
+    with Session() as db:
+        general = TicketType(event_id=event_id, name="General", price=50, quantity_available=STOCK)
+        db.add(general)
+        db.commit()
+        counters.seed_event(db, event_id)
+        return TicketType(id=general.id, event_id=event_id, name="General")
+
+
+def test_parallel_holds_never_oversell(Session, counters, ticket_type):
+    def buy(_):
+        with Session() as db:
+            try:
+                InventoryService.hold(db, [(ticket_type, 1)])
+            except HTTPException as e:
+                assert e.status_code == 400
+                return False
+            db.commit()
+            return True
+
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        held = sum(pool.map(buy, range(BUYERS)))
+
+    assert held == STOCK
+    assert counters.backend.get([str(ticket_type.id)]) == [0]
+    assert counters.backend.pending[f"{ticket_type.id}:held"] == STOCK
+
+    counters.reconcile()
+    with Session() as db:
+        flushed = db.get(TicketType, ticket_type.id)
+        assert (flushed.held_quantity, flushed.sold_quantity) == (STOCK, 0)
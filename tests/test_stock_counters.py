@@ -0,0 +1,211 @@
+"""
+Contadores de stock (app/services/stock_counters.py) con MemoryCounterBackend
+sobre SQLite: siembra, reservas, deshacer al hacer rollback y volcado.
+"""
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import redis
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registra todos los modelos)
+from app.core.config import settings
+from app.models.purchase import Purchase
+from app.models.ticket_type import TicketType
+from app.services import stock_counters as module
+from app.services.stock_counters import MemoryCounterBackend, StockCounters
+
+
+@pytest.fixture
+def Session(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    TicketType.__table__.create(engine)
+    Purchase.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(module, "SessionLocal", factory)
+    monkeypatch.setattr(module, "refresh_event_aggregates", lambda db, event_id: None)
+    return factory
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    monkeypatch.setattr(settings, "STOCK_COUNTERS_BACKEND", "memory")
+    counters = StockCounters()
+    monkeypatch.setattr(module, "stock_counters", counters)  # lo usa el listener que deshace
+    assert isinstance(counters.backend, MemoryCounterBackend)
+    return counters
+
+
+@pytest.fixture
+def event(Session):
+    """Evento con dos tipos: (event_id, general, vip)"""
+    event_id = uuid.uuid4()
+    with Session() as db:
+        general = TicketType(event_id=event_id, name="General", price=50, quantity_available=10, sold_quantity=2, held_quantity=1)
+        vip = TicketType(event_id=event_id, name="VIP", price=150, quantity_available=5)
+        db.add_all([general, vip])
+        db.commit()
+        return event_id, general.id, vip.id
+
+
+def counter(counters, ticket_type_id):
+    return counters.backend.get([str(ticket_type_id)])[0]
+
+
+def held_sold(Session, ticket_type_id):
+    with Session() as db:
+        ticket_type = db.get(TicketType, ticket_type_id)
+        return ticket_type.held_quantity, ticket_type.sold_quantity
+
+
+def test_seed_copies_remaining_minus_deltas_in_flight(Session, counters, event):
+    event_id, general, vip = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+        assert counters.available(db, event_id) == {str(general): 7, str(vip): 5}
+
+        counters.backend.apply([(str(general), -3, 3, 0)], check=True)  # reserva aún sin volcar
+        counters.seed_event(db, event_id)
+        assert counter(counters, general) == 4
+
+
+def test_lazy_seed_covers_the_whole_event(Session, counters, event):
+    event_id, general, vip = event
+    with Session() as db:
+        assert counters.reserve(db, [(vip, 2)]) is None
+        db.commit()
+        assert counters.available(db, event_id) == {str(general): 7, str(vip): 3}
+
+
+def test_reserve_is_all_or_nothing(Session, counters, event):
+    event_id, general, vip = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+        assert counters.reserve(db, [(general, 2), (vip, 6)]) == (vip, 5)
+        db.commit()
+    assert counter(counters, general) == 7
+    assert not any(counters.backend.pending.values())
+
+
+def test_reserve_merges_entries_of_the_same_type(Session, counters, event):
+    event_id, general, vip = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+        assert counters.reserve(db, [(vip, 3), (vip, 3)]) == (vip, 5)
+        assert counter(counters, vip) == 5
+
+        assert counters.reserve(db, [(vip, 2), (general, 1), (vip, 3)]) is None
+        db.commit()
+    assert counter(counters, vip) == 0
+    assert counters.backend.pending[f"{vip}:held"] == 5
+
+
+def test_rollback_undoes_and_commit_keeps(Session, counters, event):
+    event_id, general, _ = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+
+    with Session() as db:
+        counters.reserve(db, [(general, 3)])
+        assert counter(counters, general) == 4
+        db.rollback()
+    assert counter(counters, general) == 7
+    assert not any(counters.backend.pending.values())
+
+    with Session() as db:
+        counters.reserve(db, [(general, 3)])
+    assert counter(counters, general) == 7  # cerrada sin commit
+
+    with Session() as db:
+        counters.reserve(db, [(general, 3)])
+        db.commit()
+    assert counter(counters, general) == 4
+    assert counters.backend.pending[f"{general}:held"] == 3
+
+
+def test_reconcile_flushes_deltas(Session, counters, event):
+    event_id, general, _ = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+        counters.reserve(db, [(general, 3)])
+        db.commit()
+    assert counters.reconcile() == 1
+    assert held_sold(Session, general) == (4, 2)
+
+    with Session() as db:
+        counters.convert(db, {general: 3})
+        db.commit()
+    counters.reconcile()
+    assert held_sold(Session, general) == (1, 5)
+    assert counter(counters, general) == 4
+    assert not counters.backend.flushing and not any(counters.backend.pending.values())
+
+
+def test_reconcile_keeps_failing_delta_pending(Session, counters, event):
+    event_id, general, vip = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+    counters.backend.apply([(str(general), 0, -5, 0), (str(vip), -1, 1, 0)], check=False)  # held < 0 en general
+
+    assert counters.reconcile() == 1
+    assert held_sold(Session, vip) == (1, 0)
+    assert held_sold(Session, general) == (1, 2)
+    assert counters.backend.pending[f"{general}:held"] == -5
+    assert not counters.backend.flushing
+
+
+def test_pending_reports_deltas_not_yet_flushed(Session, counters, event):
+    event_id, general, vip = event
+    with Session() as db:
+        counters.seed_event(db, event_id)
+        counters.reserve(db, [(general, 2)])
+        counters.reserve(db, [(vip, 1)], sell=True)
+        db.commit()
+    assert counters.pending([general, vip]) == {general: (2, 0), vip: (0, 1)}
+
+    counters.reconcile()
+    assert counters.pending([general, vip]) == {general: (0, 0), vip: (0, 0)}
+    assert held_sold(Session, general) == (3, 2)
+
+
+def test_orphan_holds_released_on_second_check(Session, counters, event):
+    event_id, general, _ = event
+    with Session() as db:
+        # La reserva previa (held 1) es de una compra con reserva activa
+        db.add(Purchase(
+            id=uuid.uuid4(), user_id=uuid.uuid4(), event_id=event_id, total_amount=50, subtotal=50,
+            quantity=1, unit_price=50, buyer_email="a@b.c",
+            hold_expires_at=datetime.now(timezone.utc) + timedelta(minutes=15),
+            notes=json.dumps({"ticket_details": [{"ticket_type_id": str(general), "quantity": 1}]})
+        ))
+        db.commit()
+        counters.seed_event(db, event_id)
+        counters.reserve(db, [(general, 2)])  # el proceso cae antes de crear la compra
+        db.commit()
+
+    counters.reconcile(drift_check_all=True)
+    assert counter(counters, general) == 5  # recién visto: podría ser una compra en curso
+    counters.reconcile(drift_check_all=True)
+    assert counter(counters, general) == 7
+    counters.reconcile()
+    assert held_sold(Session, general) == (1, 2)
+
+
+def test_redis_down_fails_closed_for_purchases(Session, counters, event, monkeypatch):
+    event_id, general, _ = event
+
+    def down(*args, **kwargs):
+        raise redis.ConnectionError("Connection refused")
+
+    monkeypatch.setattr(counters.backend, "apply", down)
+    monkeypatch.setattr(counters.backend, "event_ids", down)
+    with Session() as db:
+        with pytest.raises(HTTPException) as error:
+            counters.reserve(db, [(general, 1)])
+        assert error.value.status_code == 503
+        assert counters.available(db, event_id) is None  # la disponibilidad se lee de la base